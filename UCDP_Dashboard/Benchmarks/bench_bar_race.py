@@ -0,0 +1,60 @@
+"""Bar-race data pipeline for tab_three: the original melt/groupby path vs the cube pipeline.
+
+Times the full 1989-2024 range for a spread of top-N sizes. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_bar_race [--repeat 20]
+"""
+import argparse
+import time
+
+from Dataset.bar_race import CONFLICT_TYPE_LABELS, bar_race, build_bar_race
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+
+
+def melt_pipeline(handler, year_range, countries, n):
+    """tab_three's data path before the dedicated pipeline existed."""
+    filtered = handler.filter_data(year_range, countries)
+    melted = filtered.melt(
+        id_vars=["year_cy", "country_cy"],
+        value_vars=list(CONFLICT_TYPE_LABELS),
+        var_name="Conflict Type",
+        value_name="Deaths",
+    )
+    melted["Conflict Type"] = melted["Conflict Type"].map(CONFLICT_TYPE_LABELS)
+    total_deaths = melted.groupby(["year_cy", "country_cy"])["Deaths"].sum().reset_index()
+    n = min(n, melted["country_cy"].nunique())
+    top = total_deaths.groupby("country_cy")["Deaths"].sum().nlargest(n).index.tolist()
+    merged = melted[melted["country_cy"].isin(top)].copy()
+    max_total = total_deaths.groupby(["year_cy", "country_cy"])["Deaths"].sum().max()
+    return top, merged, max_total
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    args = parser.parse_args()
+
+    handler = UCDP_Data(columns=VIEW_COLUMNS, compact=True)
+    cube = handler.aggregates()
+    year_range = handler.get_year_range()
+    print(f"year range {year_range[0]}-{year_range[1]}, {len(cube.countries)} countries")
+    for n in args.top:
+        legacy = per_call(lambda: melt_pipeline(handler, year_range, None, n), args.repeat)
+        fresh = per_call(lambda: build_bar_race(cube, year_range, None, n), args.repeat)
+        bar_race(cube, year_range, None, n)
+        memoized = per_call(lambda: bar_race(cube, year_range, None, n), args.repeat * 100)
+        print(
+            f"N={n:<4} melt+groupby={legacy * 1e3:7.2f} ms  pipeline={fresh * 1e3:6.2f} ms  "
+            f"memoized={memoized * 1e6:6.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
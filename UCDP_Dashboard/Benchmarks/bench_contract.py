@@ -0,0 +1,60 @@
+"""Per-rerun cost of clean_death_counts before and after the validated-once data contract.
+
+Run from UCDP_Dashboard/:  python -m Benchmarks.bench_contract [--repeat 200]
+"""
+import argparse
+import time
+import warnings
+
+import pandas as pd
+
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+
+# The filter combinations the tabs issue on their default views
+CASES = [
+    ((2000, 2020), None, None),
+    ((1989, 2024), None, None),
+    ((2000, 2020), None, "Africa"),
+    ((2000, 2020), ["Syria", "Iraq", "Afghanistan"], None),
+]
+
+
+def legacy_clean_death_counts(df):
+    """clean_death_counts as it was before the contract: re-coerce on every call."""
+    for col in ["sb_total_deaths_best_cy", "ns_total_deaths_best_cy", "os_total_deaths_best_cy"]:
+        if col not in df.columns:
+            df[col] = 0
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("Int64")
+    return df
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in CASES:
+            fn(*case)
+    return (time.perf_counter() - start) / (repeat * len(CASES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, handler in [
+        ("typed", UCDP_Data(columns=VIEW_COLUMNS)),
+        ("compact", UCDP_Data(columns=VIEW_COLUMNS, compact=True)),
+    ]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # the legacy path writes into a slice and warns every call
+            before = per_call(lambda *c: legacy_clean_death_counts(handler.filter_data(*c)), args.repeat)
+        after = per_call(lambda *c: handler.clean_death_counts(handler.filter_data(*c)), args.repeat)
+        filter_only = per_call(handler.filter_data, args.repeat)
+        print(
+            f"{label:<8} filter+clean before={before * 1e3:6.3f} ms  after={after * 1e3:6.3f} ms  "
+            f"(filter alone {filter_only * 1e3:6.3f} ms)  saved per rerun={(before - after) * 1e3:6.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Dyad lookups through Dataset.dyads.DyadIndex versus scanning the raw dyad strings.
+
+Times the one-off index build, then "which country-years list dyad X" by id and by name,
+and a name search, each against the scan a view would otherwise run on every rerun
+(split the "; "-joined cells of every row, or substring-match them). Ids and names are
+sampled from the dataset. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_dyads [--samples 200]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from Dataset.dataset import UCDP_Data, DYAD_VIEW_COLUMNS
+from Dataset.dyads import DyadIndex, SEPARATOR
+
+
+def timed(fn, args_list) -> list[float]:
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1e6)
+    return times
+
+
+def report(label: str, times: list[float]) -> None:
+    times = sorted(times)
+    print(f"{label:<32} {statistics.median(times):>10.1f} {times[int(0.95 * (len(times) - 1))]:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    df = UCDP_Data(columns=DYAD_VIEW_COLUMNS, shared=False).data
+    start = time.perf_counter()
+    index = DyadIndex(df)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms  {index.stats()}\n")
+
+    rng = random.Random(0)
+    sample_ids = [(int(i),) for i in rng.sample(list(index.ids), min(args.samples, len(index.ids)))]
+    sample_names = [(n,) for n in rng.sample(list(index.names), min(args.samples, len(index.names)))]
+    sample_words = [(" ".join(w[:4] for w in n.lower().split()[:2]),) for (n,) in sample_names]
+    # The scans work on the frame's own strings, per type, as a view without the index would
+    columns = {t: (df[f"{t}_dyad_ids_cy"].astype(str).to_numpy(), df[f"{t}_dyad_names_cy"].astype(str).to_numpy())
+               for t in ("sb", "ns", "os")}
+
+    def scan_id(dyad_id):
+        target = str(dyad_id)
+        return [r for ids, _ in columns.values() for r, cell in enumerate(ids) if target in cell.split(SEPARATOR)]
+
+    def scan_name(name):
+        return [r for _, names in columns.values() for r, cell in enumerate(names) if name in cell.split(SEPARATOR)]
+
+    def scan_search(text):
+        words = text.split()
+        found = set()
+        for _, names in columns.values():
+            for cell in names:
+                found.update(n for n in cell.split(SEPARATOR) if all(w in n.lower() for w in words))
+        return found
+
+    def index_id(dyad_id):
+        code = index.id_code(dyad_id)
+        return index.rows_for_id(code), index.names_for_id(code)
+
+    print(f"{'microseconds':<32} {'p50':>10} {'p95':>10}")
+    report("id -> rows, index", timed(index_id, sample_ids))
+    report("id -> rows, scan", timed(scan_id, sample_ids[:20]))
+    report("name -> rows, index", timed(lambda n: index.rows_for_name(index.name_code(n)), sample_names))
+    report("name -> rows, scan", timed(scan_name, sample_names[:20]))
+    report("search, index", timed(index.search, sample_words))
+    report("search, scan", timed(scan_search, sample_words[:20]))
+
+    # Same answers both ways (scan rows are in file order, the index's in (year, country) order)
+    for (dyad_id,) in sample_ids[:20]:
+        assert np.array_equal(np.sort(index_id(dyad_id)[0]), np.sort(scan_id(dyad_id)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Check the indexed filter engine against the original boolean-mask filter, then time both.
+
+Run from UCDP_Dashboard/:  python -m Benchmarks.bench_filter [--scale 10] [--cases 300]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Dataset.filter_index import FilterIndex
+
+
+def mask_filter(df, year_range, countries=None, region=None):
+    """The boolean-mask implementation filter_data used before the index existed."""
+    filtered = df[(df["year_cy"] >= year_range[0]) & (df["year_cy"] <= year_range[1])]
+    if region:
+        filtered = filtered[filtered["region_cy"] == region]
+    if countries:
+        if isinstance(countries, str):
+            countries = [countries]
+        filtered = filtered[filtered["country_cy"].isin(countries)]
+    return filtered
+
+
+def scale_up(df, factor):
+    """Replicate the frame `factor` times, giving each copy its own country names."""
+    if factor <= 1:
+        return df
+    copies = []
+    for i in range(factor):
+        copy = df.copy()
+        if i:
+            copy["country_cy"] = copy["country_cy"] + f" #{i}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def random_cases(df, n, seed=0):
+    rng = random.Random(seed)
+    countries = list(df["country_cy"].dropna().unique())
+    regions = sorted(df["region_cy"].dropna().unique())
+    year_min, year_max = int(df["year_cy"].min()), int(df["year_cy"].max())
+    cases = [((2000, 2020), None, None), ((year_min, year_max), None, None)]
+    for _ in range(n):
+        lo = rng.randint(year_min - 3, year_max)
+        hi = rng.randint(lo, year_max + 3)
+        picked = rng.sample(countries, rng.choice([0, 0, 1, 3, 8]))
+        if rng.random() < 0.1:
+            picked.append("Not A Country")
+        if len(picked) == 1 and rng.random() < 0.5:
+            picked = picked[0]  # single country passed as a string
+        region = rng.choice([None, None, *regions, "Atlantis"])
+        cases.append(((lo, hi), picked or None, region))
+    return cases
+
+
+def check_equivalence(df, index, cases):
+    for year_range, countries, region in cases:
+        expected = mask_filter(df, year_range, countries, region)
+        got = df.iloc[np.sort(index.query(year_range, countries, region))]
+        pd.testing.assert_frame_equal(got, expected)
+        # Positions must also come back in (year, country) order
+        ordered = df.iloc[index.query(year_range, countries, region)]
+        keys = list(zip(ordered["year_cy"], ordered["country_cy"]))
+        assert keys == sorted(keys), (year_range, countries, region)
+
+
+def time_per_call(fn, cases, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for case in cases:
+            fn(*case)
+        best = min(best, time.perf_counter() - start)
+    return best / len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--cases", type=int, default=300)
+    args = parser.parse_args()
+
+    handler = UCDP_Data(columns=VIEW_COLUMNS)
+    base = handler.data
+    for year_range, countries, region in random_cases(base, args.cases, seed=1):
+        pd.testing.assert_frame_equal(
+            handler.filter_data(year_range, countries, region), mask_filter(base, year_range, countries, region)
+        )
+
+    for factor in args.scale:
+        df = scale_up(base, factor)
+        start = time.perf_counter()
+        index = FilterIndex(df)
+        build = time.perf_counter() - start
+        cases = random_cases(df, args.cases)
+        check_equivalence(df, index, cases)
+
+        mask = time_per_call(lambda *c: mask_filter(df, *c), cases)
+        positions = time_per_call(index.query, cases)
+        rows = time_per_call(lambda *c: df.iloc[np.sort(index.query(*c))], cases)
+        print(
+            f"x{factor:<5} rows={len(df):>9,}  equivalent on {len(cases)} cases  build={build * 1e3:7.1f} ms  "
+            f"mask={mask * 1e3:7.3f} ms  index positions={positions * 1e3:7.3f} ms  index rows={rows * 1e3:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Streaming GED ingestion: time and peak memory per chunk size, against reading the whole file.
+
+Writes a synthetic GED-shaped event file from the country-year dataset (each country-year's
+deaths split over events, plus wide text columns like the real file), ingests it, and checks
+that the country-year totals come back unchanged. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_ged [--events-per-row 200] [--chunksize 10000 100000]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Dataset import ged
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+
+
+def synthetic_ged(cy: pd.DataFrame, path: Path, events_per_row: int, seed: int = 0) -> int:
+    """Write events whose `best` sums to each country-year total; returns the number of events."""
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="") as out:
+        for code, column in ged.VIOLENCE_TYPE_COLUMNS.items():
+            rows = cy[cy[column] > 0]
+            # Split each total into events_per_row parts (fewer when the total is smaller)
+            parts = np.minimum(rows[column].to_numpy(), events_per_row)
+            idx = np.repeat(np.arange(len(rows)), parts)
+            share = rng.random(len(idx))
+            totals = np.repeat(rows[column].to_numpy(), parts)
+            weight = share / np.bincount(idx, weights=share)[idx]
+            best = np.floor(weight * totals).astype(np.int64)
+            # Put the rounding remainder on the first event of each country-year
+            first = np.r_[0, np.flatnonzero(np.diff(idx)) + 1]
+            best[first] += rows[column].to_numpy() - np.bincount(idx, weights=best).astype(np.int64)
+            events = pd.DataFrame({
+                "id": np.arange(written, written + len(idx)),
+                "year": rows["year_cy"].to_numpy()[idx],
+                "type_of_violence": code,
+                "dyad_name": "Government of X - Y",
+                "country": rows["country_cy"].to_numpy()[idx],
+                "country_id": rows["country_id_cy"].to_numpy()[idx],
+                "region": rows["region_cy"].to_numpy()[idx],
+                "source_article": "Agence France Presse,2019-01-01;Reuters,2019-01-02 " * 3,
+                "latitude": rng.uniform(-60, 70, len(idx)).round(4),
+                "longitude": rng.uniform(-180, 180, len(idx)).round(4),
+                "best": best,
+            })
+            events.to_csv(out, index=False, header=written == 0)
+            written += len(idx)
+    return written
+
+
+def traced(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def whole_file(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path, usecols=ged.GED_COLUMNS)
+    return df.groupby(["country_id", "year", "type_of_violence"])["best"].sum()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events-per-row", type=int, default=200)
+    parser.add_argument("--chunksize", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    cy = UCDP_Data(columns=VIEW_COLUMNS, shared=False).data
+    cy = cy.astype({c: "int64" for c in ged.VIOLENCE_TYPE_COLUMNS.values()})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "GEDEvent_synthetic.csv"
+        events = synthetic_ged(cy, path, args.events_per_row)
+        print(f"{events:,} events, {path.stat().st_size / 2**20:.0f} MiB\n")
+        print(f"{'read':<24} {'seconds':>8} {'peak MiB':>9}")
+
+        _, seconds, peak = traced(lambda: whole_file(path))
+        print(f"{'whole file':<24} {seconds:>8.2f} {peak / 2**20:>9.1f}")
+        for chunksize in args.chunksize:
+            result, seconds, peak = traced(lambda: ged.aggregate_events(path, chunksize))
+            print(f"{f'chunks of {chunksize:,}':<24} {seconds:>8.2f} {peak / 2**20:>9.1f}")
+
+        # Round trip: every country-year with deaths comes back with the same totals
+        expected = cy[cy["cumulative_total_deaths_in_orgvio_best_cy"] > 0].set_index(["country_id_cy", "year_cy"])
+        got = result.set_index(["country_id_cy", "year_cy"]).loc[expected.index]
+        for column in [*ged.VIOLENCE_TYPE_COLUMNS.values(), "cumulative_total_deaths_in_orgvio_best_cy"]:
+            assert (got[column].to_numpy() == expected[column].to_numpy()).all(), column
+        print(f"\n{len(result):,} country-years, totals match the source")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Startup import cost per tab, measured in fresh interpreters.
+
+Each measurement imports streamlit first (main.py always pays for it), then the tab module,
+and reports the extra time the tab adds. The landing page line runs the module-level imports
+of main.py itself, and names any heavy library they pull in. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_imports [--runs 5]
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from Tabs.registry import TABS
+
+APP_DIR = Path(__file__).resolve().parent.parent
+HEAVY = ["pandas", "numpy", "pyarrow", "plotly"]
+
+PROBE = """
+import json, sys, time
+import streamlit
+before = set(sys.modules)
+start = time.perf_counter()
+exec(sys.argv[1], {})
+imported = time.perf_counter() - start
+start = time.perf_counter()
+if sys.argv[2]:
+    module_name, class_name = sys.argv[2].split(":")
+    getattr(sys.modules[module_name], class_name)()
+constructed = time.perf_counter() - start
+heavy = [m for m in json.loads(sys.argv[3]) if m in sys.modules and m not in before]
+print(json.dumps({"import": imported, "init": constructed, "heavy": heavy}))
+"""
+
+
+def landing_imports() -> str:
+    """main.py's module-level import statements, as source."""
+    source = (APP_DIR / "main.py").read_text(encoding="utf-8")
+    return "\n".join(ast.get_source_segment(source, node) for node in ast.parse(source).body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(statements, constructor, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, statements, constructor, json.dumps(HEAVY)],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return (
+        statistics.median(s["import"] for s in samples),
+        statistics.median(s["init"] for s in samples),
+        samples[-1]["heavy"],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    landing_import, _, heavy = measure(landing_imports(), "", args.runs)
+    print(f"{'landing page (main.py imports)':<32} import={landing_import * 1e3:8.1f} ms"
+          + (f"  loads {', '.join(heavy)}" if heavy else ""))
+    for name, (module_name, class_name) in TABS.items():
+        imported, constructed, _ = measure(f"import {module_name}", f"{module_name}:{class_name}", args.runs)
+        print(f"{name:<32} import={imported * 1e3:8.1f} ms  init={constructed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
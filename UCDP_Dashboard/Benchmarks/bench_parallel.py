@@ -0,0 +1,79 @@
+"""Scaling of the aggregation executor with worker count.
+
+Sums synthetic event-level rows (random year/country cells, four death columns) into the
+cube grid with 1, 2, 4, ... workers for each pool kind, then times a full AggregateCube build
+on a replicated copy of the dataset. Speedups are relative to the serial run and are capped
+by the cores this process may use (printed first). Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_parallel [--rows 2000000 20000000] [--workers 1 2 4 8 16]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from Dataset.aggregates import AggregateCube
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Dataset.parallel import AggregationExecutor
+
+N_YEARS, N_COUNTRIES, N_COLUMNS = 36, 200, 4
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def replicated(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """`factor` copies of the country-year rows, each with its own country names."""
+    copies = [df.assign(country_cy=df["country_cy"].astype(str) + f" #{i}") for i in range(factor)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[2_000_000, 20_000_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--pools", nargs="+", default=["thread", "process"])
+    parser.add_argument("--cube-scale", type=int, default=500, help="dataset copies for the cube build")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"usable cores: {cores}\n")
+    rng = np.random.default_rng(0)
+
+    print(f"{'grid sums':<28} {'workers':>7} {'best s':>8} {'median s':>9} {'speedup':>8}")
+    for rows in args.rows:
+        cells = rng.integers(0, N_YEARS * N_COUNTRIES, rows)
+        values = rng.integers(0, 1000, (N_COLUMNS, rows))
+        for pool in args.pools:
+            serial = None
+            for workers in args.workers:
+                executor = AggregationExecutor(workers=workers, min_rows=1, pool=pool)
+                executor.grid_sums(cells[:1000], values[:, :1000], N_YEARS * N_COUNTRIES)  # start the pool
+                best, median = best_of(lambda: executor.grid_sums(cells, values, N_YEARS * N_COUNTRIES), args.repeat)
+                executor.shutdown()
+                serial = serial or best
+                print(f"{f'{rows:,} rows, {pool}':<28} {workers:>7} {best:>8.3f} {median:>9.3f} {serial / best:>7.2f}x")
+
+    df = UCDP_Data(columns=VIEW_COLUMNS, compact=True, shared=False).data
+    big = replicated(df, args.cube_scale)
+    print(f"\nAggregateCube build, {len(big):,} rows x {big['country_cy'].nunique():,} countries")
+    serial = None
+    for workers in args.workers:
+        executor = AggregationExecutor(workers=workers)
+        best, median = best_of(lambda: AggregateCube(big, executor=executor), args.repeat)
+        executor.shutdown()
+        serial = serial or best
+        print(f"{'cube build, thread':<28} {workers:>7} {best:>8.3f} {median:>9.3f} {serial / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
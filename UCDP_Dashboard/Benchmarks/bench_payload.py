@@ -0,0 +1,48 @@
+"""Payload bytes of the animated charts (tab_three, tab_five) before and after figure_payload.optimize.
+
+"before" is the figure as the tabs used to build it (sparse bar-race frames, unoptimized);
+"after" is what the tabs now cache and send. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_payload
+"""
+import time
+
+from Dataset.aggregates import VIOLENCE_TYPES
+from Dataset.bar_race import build_bar_race
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Tabs.figure_payload import optimize, payload_bytes, REPORTS
+from Tabs.tab_five import tab_five
+from Tabs.tab_three import tab_three
+
+YEAR_RANGES = [(2000, 2020), (1989, 2024)]
+
+
+def row(label, before, after, seconds):
+    print(f"{label:<40} {before:>10,} {after:>10,} {1 - after / before:>7.1%} {seconds * 1e3:>9.1f}")
+
+
+def main():
+    cube = UCDP_Data(columns=VIEW_COLUMNS, compact=True).aggregates()
+    t3, t5 = tab_three.__new__(tab_three), tab_five.__new__(tab_five)
+
+    print(f"{'chart':<40} {'before B':>10} {'after B':>10} {'saved':>7} {'opt ms':>9}")
+    for yr in YEAR_RANGES:
+        for n in (10, 25, 50):
+            legacy = build_bar_race(cube, yr, None, n)
+            before = payload_bytes(t3.build_figure(legacy.frames, legacy.countries, legacy.x_max, 800))
+            race = build_bar_race(cube, yr, None, n, dense=True)
+            fig = t3.build_figure(race.frames, race.countries, race.x_max, 800)
+            start = time.perf_counter()
+            optimize(fig, "bar race")
+            row(f"bar race {yr[0]}-{yr[1]} top {n}", before, REPORTS["bar race"].after, time.perf_counter() - start)
+
+        for column in ("sb_total_deaths_best_cy", "cumulative_total_deaths_in_orgvio_best_cy"):
+            fig = t5.build_map(cube.per_year_by_country(column, yr, None, with_iso3=True), column, VIOLENCE_TYPES)
+            start = time.perf_counter()
+            optimize(fig, "map")
+            report = REPORTS["map"]
+            row(f"map {yr[0]}-{yr[1]} {VIOLENCE_TYPES[column]}", report.before, report.after,
+                time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
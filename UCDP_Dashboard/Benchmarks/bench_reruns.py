@@ -0,0 +1,172 @@
+"""Script reruns per user interaction, measured against a live Streamlit server.
+
+Starts `streamlit run` on the app and talks to it over its websocket the way the browser
+does: a widget change is sent as a full rerun, as a fragment rerun when the widget sits in
+an `st.fragment`, or not at all while it sits in an unsubmitted `st.form`. For each tab it
+plays the same interaction (open the tab, drag the year slider a few steps, press Apply if
+there is one, change the animation speed) and counts full-script and fragment-only reruns
+and the server time they took. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_reruns                  # live filters
+    python -m Benchmarks.bench_reruns --apply          # commit-on-apply filters
+    python -m Benchmarks.bench_reruns --app /path/to/other/checkout/UCDP_Dashboard/main.py
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+TABS = ["Trends (Time Series)", "Comparisons (Animated)", "Regional Analysis", "Geospatial Heatmap"]
+FINISHED = ForwardMsg.ScriptFinishedStatus
+
+
+class Widget:
+    def __init__(self, kind: str, proto, fragment_id: str):
+        self.kind = kind
+        self.id = proto.id
+        self.label = proto.label
+        self.form_id = getattr(proto, "form_id", "")
+        self.is_submit = getattr(proto, "is_form_submitter", False)
+        self.fragment_id = fragment_id
+
+
+class Session:
+    """One browser tab: keeps widget values, sends reruns, counts what the server ran."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.page_hash = ""
+        self.states: dict[str, WidgetState] = {}
+        self.widgets: dict[str, Widget] = {}
+        self.full = self.fragment = 0
+        self.seconds = 0.0
+
+    async def rerun(self, fragment_id: str = "") -> None:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_hash
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # Triggers (button clicks) fire once
+        self.states = {k: v for k, v in self.states.items() if not v.HasField("trigger_value")}
+
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        if not fragment_id:
+            self.widgets = {}
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.read_message())
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.page_hash = fwd.new_session.page_script_hash
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                name = element.WhichOneof("type")
+                proto = getattr(element, name)
+                if getattr(proto, "id", "") and hasattr(proto, "label"):
+                    self.widgets[proto.label] = Widget(name, proto, fwd.delta.fragment_id)
+            elif kind == "script_finished":
+                if fwd.script_finished == FINISHED.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    self.fragment += 1
+                elif fwd.script_finished == FINISHED.FINISHED_SUCCESSFULLY:
+                    self.full += 1
+                else:
+                    raise RuntimeError(f"script finished with {FINISHED.Name(fwd.script_finished)}")
+                break
+        self.seconds += time.perf_counter() - start
+
+    async def changed(self, widget: Widget) -> None:
+        """What the browser does after a widget changes: nothing inside a form, else (fragment) rerun."""
+        if widget.form_id and not widget.is_submit:
+            return
+        await self.rerun(widget.fragment_id)
+
+    async def click(self, label: str) -> None:
+        widget = self.widgets[label]
+        self.states[widget.id] = WidgetState(id=widget.id, trigger_value=True)
+        await self.changed(widget)
+
+    async def slide(self, label: str, values) -> None:
+        widget = self.widgets[label]
+        state = WidgetState(id=widget.id)
+        state.double_array_value.data.extend(values)
+        self.states[widget.id] = state
+        await self.changed(widget)
+
+
+async def play(port: int, tab: str, drag_steps: int, speed_changes: int) -> Session:
+    ws = await websocket_connect(f"ws://localhost:{port}/_stcore/stream", subprotocols=["streamlit"])
+    session = Session(ws)
+    await session.rerun()
+    await session.click(tab)
+    # Interaction under test starts after the tab is open
+    session.full = session.fragment = 0
+    session.seconds = 0.0
+    for step in range(1, drag_steps + 1):
+        await session.slide("Year range", [2000 - step, 2020])
+    if "Apply" in session.widgets:
+        await session.click("Apply")
+    if "Animation Duration (ms)" in session.widgets:
+        for speed in range(1, speed_changes + 1):
+            await session.slide("Animation Duration (ms)", [800 + 100 * speed])
+    ws.close()
+    return session
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("streamlit did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", type=Path, default=Path(__file__).resolve().parent.parent / "main.py")
+    parser.add_argument("--apply", action="store_true", help="start with commit-on-apply filters")
+    parser.add_argument("--drag-steps", type=int, default=6, help="slider values sent during one drag")
+    parser.add_argument("--speed-changes", type=int, default=3)
+    args = parser.parse_args()
+
+    port = free_port()
+    env = dict(os.environ, UCDP_APPLY_FILTERS="1" if args.apply else "0", UCDP_WARMUP="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(args.app), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=args.app.parent, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(port)
+        print(f"{args.app} ({'apply' if args.apply else 'live'} filters): drag of {args.drag_steps} steps, "
+              f"{args.speed_changes} speed changes\n")
+        print(f"{'tab':<26} {'full reruns':>11} {'fragment':>9} {'server s':>9}")
+        for tab in TABS:
+            session = asyncio.run(play(port, tab, args.drag_steps, args.speed_changes))
+            print(f"{tab:<26} {session.full:>11} {session.fragment:>9} {session.seconds:>9.2f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
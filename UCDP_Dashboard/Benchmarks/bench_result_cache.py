@@ -0,0 +1,116 @@
+"""Result cache (Tabs.result_cache) under many sessions: hit rate, memory held and fairness.
+
+Part 1 replays a year-range slider in one AppTest session on Trends and Regional Analysis:
+three ranges, then the same three again, timing each rerun (the second pass should be
+lookups). Part 2 simulates S sessions calling the tabs' cached view functions directly,
+each revisiting a few favourite filter sets from a shared pool (so sessions overlap) and
+one "heavy" session sweeping through unique ranges. It prints the hit rate, the bytes
+held against the budget after every round, and how much the heavy session got versus the
+median one. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_result_cache [--sessions 100] [--budget-mb 2] [--session-mb 0.5]
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from Tabs.result_cache import RESULTS
+
+APP = Path(__file__).resolve().parent.parent / "main.py"
+RANGES = [(1995, 2010), (2000, 2015), (1990, 2020)]
+
+
+def replay_slider() -> None:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    print(f"{'tab':<22} {'first pass ms':>24} {'revisit ms':>24}")
+    for tab in ["Trends (Time Series)", "Regional Analysis"]:
+        next(b for b in at.button if b.label == tab).click().run()
+        slider = next(s for s in at.sidebar.slider if s.label == "Year range")
+        passes = []
+        for _ in range(2):
+            times = []
+            for years in RANGES:
+                start = time.perf_counter()
+                slider.set_value(years).run()
+                times.append((time.perf_counter() - start) * 1000)
+                if at.exception:
+                    raise RuntimeError(at.exception)
+            passes.append(" ".join(f"{t:>7.0f}" for t in times))
+        print(f"{tab:<22} {passes[0]:>24} {passes[1]:>24}")
+
+
+def simulate(sessions: int, rounds: int, seed: int = 0) -> None:
+    from Dataset.aggregates import VIOLENCE_TYPES
+    from Tabs.tab_four import tab_four
+    from Tabs.tab_two import tab_two
+
+    t2, t4 = tab_two(), tab_four()
+    cube = t4.data_handler.aggregates()
+    regions = list(t4.data_handler.get_regions())
+    types = list(VIOLENCE_TYPES)
+    rng = random.Random(seed)
+
+    def random_view():
+        lo = rng.randrange(1989, 2020)
+        return rng.choice(["trend", "countries", "regions"]), (lo, lo + rng.choice([5, 10, 20])), rng.choice(types)
+
+    pool = [random_view() for _ in range(40)]
+    favourites = {f"s{i}": rng.sample(pool, 4) for i in range(sessions)}
+
+    def show(session, view):
+        kind, years, type_selected = view
+        if kind == "trend":
+            t2.time_series_figure(cube, t2.data_handler.version, years, type_selected, VIOLENCE_TYPES, [], session)
+        elif kind == "countries":
+            t4.country_figures(cube, years, type_selected, VIOLENCE_TYPES, regions[0],
+                               t4.top_countries(cube, years, regions[0]), session)
+        else:
+            t4.region_figures(cube, years, type_selected, VIOLENCE_TYPES, regions[:3], session)
+
+    print(f"\n{sessions} sessions + 1 heavy, {rounds} rounds; budget {RESULTS.budget_bytes / 2**20:.1f} MiB, "
+          f"per session {RESULTS.session_bytes / 2**20:.1f} MiB")
+    print(f"{'round':>5} {'hit rate':>9} {'held MiB':>9} {'entries':>8} {'evictions':>10} {'heavy KiB':>10} "
+          f"{'median KiB':>11}")
+    heavy_year = 1989
+    for round_no in range(1, rounds + 1):
+        before = RESULTS.stats()
+        for session, views in favourites.items():
+            show(session, rng.choice(views))
+        for _ in range(5):
+            # The heavy session never repeats itself
+            show("heavy", ("trend", (heavy_year, 2024), types[heavy_year % len(types)]))
+            heavy_year = heavy_year + 1 if heavy_year < 2023 else 1989
+        stats = RESULTS.stats()
+        lookups = stats["hits"] + stats["misses"] - before["hits"] - before["misses"]
+        per_session = RESULTS._session_bytes
+        median = statistics.median([b for s, b in per_session.items() if s != "heavy"] or [0])
+        print(f"{round_no:>5} {(stats['hits'] - before['hits']) / lookups:>9.0%} {stats['bytes'] / 2**20:>9.2f} "
+              f"{stats['entries']:>8} {stats['evictions']:>10} {per_session.get('heavy', 0) / 1024:>10.0f} "
+              f"{median / 1024:>11.0f}")
+        assert stats["bytes"] <= RESULTS.budget_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=8)
+    # Small enough that the pool of views does not fit, so eviction and fairness show
+    parser.add_argument("--budget-mb", type=float, default=2)
+    parser.add_argument("--session-mb", type=float, default=0.5)
+    parser.add_argument("--skip-apptest", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_apptest:
+        replay_slider()
+    RESULTS.clear()
+    RESULTS.budget_bytes = int(args.budget_mb * 2**20)
+    RESULTS.session_bytes = int(args.session_mb * 2**20)
+    simulate(args.sessions, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Throughput of the query service (Service.api) by batch size, with and without its result cache.
+
+Starts `python -m Service.api` as a separate process, then keeps C client threads sending
+POST /query over keep-alive connections for a fixed time. Each request carries B queries
+drawn from a fixed pool of random dashboard queries (years, countries or region, violence
+types, grouping), so with the cache on a warmed-up pool is answered from memory and
+with `--cache-size 0` every query is recomputed from the cube. Reports requests/s,
+queries/s and request latency. Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_service [--batch 1 10 50] [--clients 4] [--seconds 5]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+GROUPINGS = ["year", "year", "country", "region", "year_country", "year_region", "total"]
+VIOLENCE = ["sb", "ns", "os", "all"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(port: int, path: str) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+        return json.load(response)
+
+
+def wait_ready(port: int, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            get(port, "/health")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("query service did not start")
+
+
+def query_pool(meta: dict, size: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    first, last = meta["years"]
+    pool = []
+    for _ in range(size):
+        group_by = rng.choice(GROUPINGS)
+        lo = rng.randint(first, last)
+        query = {"years": [lo, rng.randint(lo, last)], "group_by": group_by,
+                 "violence": rng.sample(VIOLENCE, rng.randint(1, 2))}
+        if group_by in ("region", "year_region"):
+            if rng.random() < 0.5:
+                query["region"] = rng.sample(meta["regions"], 2)
+        elif rng.random() < 0.5:
+            query["countries"] = rng.sample(meta["countries"], rng.randint(1, 8))
+        elif rng.random() < 0.5:
+            query["region"] = rng.choice(meta["regions"])
+        if group_by in ("country", "region") and rng.random() < 0.5:
+            query["top"] = rng.choice([5, 10])
+        pool.append(query)
+    return pool
+
+
+def client(port: int, pool: list[dict], batch: int, stop: float, latencies: list, seed: int) -> None:
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.perf_counter() < stop:
+        body = json.dumps({"queries": rng.choices(pool, k=batch)}).encode()
+        start = time.perf_counter()
+        conn.request("POST", "/query", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        results = json.loads(response.read())["results"]
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200 or any("error" in r for r in results):
+            raise RuntimeError(f"query failed: {results}")
+    conn.close()
+
+
+def run(port: int, pool: list[dict], batch: int, clients: int, seconds: float) -> tuple[int, float, list]:
+    latencies: list[float] = []
+    stop = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(port, pool, batch, stop, latencies, i)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(latencies), time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--pool", type=int, default=200, help="distinct queries the clients draw from")
+    parser.add_argument("--cache-sizes", type=int, nargs="+", default=[0, 1024])
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    print(f"{args.clients} clients, {args.seconds:g} s per run, pool of {args.pool} queries\n")
+    print(f"{'cache':>6} {'batch':>6} {'req/s':>8} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'hit rate':>9}")
+    for cache_size in args.cache_sizes:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "Service.api", "--port", str(port), "--cache-size", str(cache_size)],
+            cwd=root, env=dict(os.environ, UCDP_WARMUP="0"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(port)
+            pool = query_pool(get(port, "/meta"), args.pool)
+            # One pass over the pool so the cached runs measure the warm path
+            run(port, pool, len(pool), 1, 0)
+            for batch in args.batch:
+                before = get(port, "/stats")
+                requests, elapsed, latencies = run(port, pool, batch, args.clients, args.seconds)
+                after = get(port, "/stats")
+                hits, answered = after["hits"] - before["hits"], after["queries"] - before["queries"]
+                ms = sorted(x * 1000 for x in latencies)
+                print(f"{cache_size:>6} {batch:>6} {requests / elapsed:>8.0f} {requests * batch / elapsed:>10.0f} "
+                      f"{statistics.median(ms):>8.2f} {ms[int(0.95 * (len(ms) - 1))]:>8.2f} "
+                      f"{hits / answered if answered else 0:>9.0%}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Per-worker memory and load time with and without the shared frames (UCDP_SHARED_DIR).
+
+Writes a replicated copy of the dataset, then starts N fresh worker processes that each
+load the views' frame the way a server process does and touch every column. Run once with
+every worker parsing its own copy and once with UCDP_SHARED_DIR set (the first worker
+publishes, the rest attach). While all workers hold their frames, each reads its
+/proc/self/smaps_rollup: the private growth is memory nobody else can use, PSS charges
+shared pages fractionally, so the PSS sum is what the host actually pays. Linux only.
+Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_shared [--workers 4] [--scale 50] [--shared-dir /dev/shm/ucdp-bench]
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# The renamed replica countries have no ISO-3 codes; that warning is not what is measured
+logging.getLogger("Dataset").setLevel(logging.ERROR)
+
+ROLLUP_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty", "Shared_Clean", "Shared_Dirty")
+
+
+def rollup() -> dict[str, int]:
+    """Memory totals for this process in KiB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ROLLUP_FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def worker(csv_path: str, shared_dir: str | None, barrier, results) -> None:
+    # Fresh interpreter (spawn): the env var is read when Dataset.dataset is imported
+    if shared_dir:
+        os.environ["UCDP_SHARED_DIR"] = shared_dir
+    else:
+        os.environ.pop("UCDP_SHARED_DIR", None)
+    from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+
+    before = rollup()
+    start = time.perf_counter()
+    handler = UCDP_Data(csv_path, columns=VIEW_COLUMNS, compact=True)
+    df = handler.data
+    elapsed = time.perf_counter() - start
+    # Touch every column so mapped pages are actually resident
+    for name in df.columns:
+        col = df[name]
+        col.cat.codes.sum() if isinstance(col.dtype, pd.CategoricalDtype) else col.count()
+    barrier.wait()
+    after = rollup()
+    results.put({"pid": os.getpid(), "load_s": elapsed, "before": before, "after": after})
+    # Hold the frame until every worker has measured
+    barrier.wait()
+
+
+def run(csv_path: Path, workers: int, shared_dir: str | None) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(str(csv_path), shared_dir, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return rows
+
+
+def report(label: str, rows: list[dict]) -> None:
+    print(f"\n{label}")
+    print(f"{'worker':>7} {'load s':>7} {'private +MiB':>13} {'shared MiB':>11} {'rss MiB':>8} {'pss MiB':>8}")
+    for i, row in enumerate(sorted(rows, key=lambda r: r["load_s"], reverse=True)):
+        before, after = row["before"], row["after"]
+        private = (after["Private_Clean"] + after["Private_Dirty"]
+                   - before["Private_Clean"] - before["Private_Dirty"]) / 1024
+        shared = (after["Shared_Clean"] + after["Shared_Dirty"]) / 1024
+        print(f"{i:>7} {row['load_s']:>7.2f} {private:>13.1f} {shared:>11.1f} "
+              f"{after['Rss'] / 1024:>8.1f} {after['Pss'] / 1024:>8.1f}")
+    print(f"{'total':>7} {'':>7} {'':>13} {'':>11} {sum(r['after']['Rss'] for r in rows) / 1024:>8.1f} "
+          f"{sum(r['after']['Pss'] for r in rows) / 1024:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=50, help="copies of the dataset's rows")
+    parser.add_argument("--shared-dir", default=None, help="publish directory (default: a fresh temp dir)")
+    args = parser.parse_args()
+
+    from Dataset.dataset import UCDP_Data
+
+    work = Path(tempfile.mkdtemp(prefix="ucdp-bench-shared-"))
+    shared_dir = Path(args.shared_dir) if args.shared_dir else work / "shared"
+    try:
+        base = UCDP_Data(None, shared=False)
+        raw = pd.read_csv(base.filepath)
+        csv_path = work / "replicated_cy.csv"
+        copies = [raw.assign(country_cy=raw["country_cy"] + f" #{i}") for i in range(args.scale)]
+        pd.concat(copies, ignore_index=True).to_csv(csv_path, index=False)
+        print(f"{csv_path.name}: {len(raw) * args.scale:,} rows, {csv_path.stat().st_size / 2**20:.1f} MiB; "
+              f"{args.workers} workers")
+        # Build the columnar cache up front so the parsing run times the load path a restarted server takes
+        UCDP_Data(csv_path, shared=False)
+
+        report("every worker parses", run(csv_path, args.workers, None))
+        shutil.rmtree(shared_dir, ignore_errors=True)
+        report(f"shared frames in {shared_dir} (first worker publishes)", run(csv_path, args.workers, str(shared_dir)))
+        report("shared frames, already published (restart)", run(csv_path, args.workers, str(shared_dir)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if args.shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""First-visit rerun time per tab with and without pre-rendered snapshots (Tabs.snapshots).
+
+Builds the snapshot set if the dataset has none, then for each mode starts a fresh Python
+process (cold caches, no warm-up thread) that opens main.py in an AppTest and clicks through
+the analysis tabs once, timing each rerun: the default view either comes from the snapshot
+set or is built live (UCDP_SNAPSHOT_DIR pointed at an empty directory). Run from UCDP_Dashboard/:
+    python -m Benchmarks.bench_snapshots [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TABS = ["Trends (Time Series)", "Comparisons (Animated)", "Regional Analysis", "Geospatial Heatmap"]
+
+VISIT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=300)
+at.run()
+# Load the dataset and cubes first, so the timings below are the views alone
+from Tabs import registry
+for name in json.loads(sys.argv[1]):
+    registry.get_tab(name).data_handler.aggregates()
+times = {}
+for name in json.loads(sys.argv[1]):
+    start = time.perf_counter()
+    next(b for b in at.button if b.label == name).click().run()
+    times[name] = (time.perf_counter() - start) * 1000
+    assert not at.exception, at.exception
+from Tabs.snapshots import SNAPSHOTS
+print(json.dumps({"times": times, "snapshots": SNAPSHOTS.stats()}))
+"""
+
+
+def visit(snapshot_dir: str | None) -> dict:
+    env = dict(os.environ, UCDP_WARMUP="0")
+    if snapshot_dir is not None:
+        env["UCDP_SNAPSHOT_DIR"] = snapshot_dir
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", VISIT, json.dumps(TABS)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per mode")
+    args = parser.parse_args()
+
+    status = subprocess.run([sys.executable, "-m", "Tabs.snapshots", "status"], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    if "(current dataset)" not in status:
+        subprocess.run([sys.executable, "-W", "ignore", "-m", "Tabs.snapshots", "build"], cwd=ROOT, check=True,
+                       env=dict(os.environ, UCDP_WARMUP="0"))
+
+    with tempfile.TemporaryDirectory() as empty:
+        runs = {"live": [visit(empty) for _ in range(args.repeat)],
+                "snapshot": [visit(None) for _ in range(args.repeat)]}
+
+    print(f"first visit, median of {args.repeat} processes (ms)")
+    print(f"{'tab':<24} {'live':>8} {'snapshot':>9}")
+    for name in TABS:
+        live = statistics.median(r["times"][name] for r in runs["live"])
+        snap = statistics.median(r["times"][name] for r in runs["snapshot"])
+        print(f"{name:<24} {live:>8.0f} {snap:>9.0f}")
+    stats = runs["snapshot"][-1]["snapshots"]
+    print(f"\nsnapshot lookups in the last process: {stats['hits']} hits, {stats['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Concurrent-session load test: N simulated users driving main.py through Streamlit's AppTest.
+
+Every session is its own AppTest (its own session state) in this one process, so sessions
+share the dataset store, aggregate cubes and result/figure caches exactly as real sessions on
+one server do, with no browser or network in between. A session opens the app and then takes
+--steps random steps, each one rerun: switch to one of the analysis tabs (Trends to
+Geospatial Heatmap), or move one of the open tab's filters (year range, violence type,
+countries, and the tab's other selectors). The N sessions run on their own threads at once.
+
+Levels of N run one after another in the same process, after one untimed warm-up, and for each
+level the script reports rerun latency percentiles (per step kind and overall), reruns/s, CPU
+seconds per rerun, RSS before/peak/after, and the slowest traced stages (every rerun is
+traced), so a regression in a data or figure path shows up as N grows. Run from UCDP_Dashboard/:
+    python -m Benchmarks.load_sessions [--sessions 1 2 4 8 16] [--steps 20] [--json load.json]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Trace every rerun so stage timings are collected; the server's own warm-up thread stays off
+os.environ.setdefault("UCDP_TRACE_SAMPLE", "1")
+os.environ.setdefault("UCDP_WARMUP", "0")
+
+from Dataset.aggregates import VIOLENCE_TYPES  # noqa: E402
+from Instrumentation.tracing import METRICS  # noqa: E402
+from Tabs import warmup  # noqa: E402
+
+APP = Path(__file__).resolve().parent.parent / "main.py"
+TABS = ["Trends (Time Series)", "Comparisons (Animated)", "Regional Analysis", "Geospatial Heatmap"]
+SWITCH_PROBABILITY = 0.25
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux); the peak so far elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is KiB on Linux, bytes on macOS; either way only a peak
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssSampler(threading.Thread):
+    """Peak RSS while a level runs, sampled every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return max(self.peak, rss_bytes())
+
+
+@contextmanager
+def shared_runtime():
+    """Let AppTest runs overlap on threads.
+
+    Each AppTest run installs a mock Runtime singleton and removes it when it finishes, which
+    breaks every other session's run still in flight ("Runtime hasn't been created!"). While
+    this is open, Runtime.instance() keeps answering with the most recently installed mock
+    (they are interchangeable) instead of failing between runs.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    original_instance, original_exists = Runtime.__dict__["instance"], Runtime.__dict__["exists"]
+    installed = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            installed[:] = [cls._instance]
+        if not installed:
+            return original_instance.__func__(cls)
+        return installed[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(installed))
+    try:
+        yield
+    finally:
+        Runtime.instance, Runtime.exists = original_instance, original_exists
+
+
+def move_filter(at, rng: random.Random) -> str | None:
+    """Change one of the open tab's sidebar filters to a random value; returns its label."""
+    candidates = []
+    for slider in at.sidebar.slider:
+        if isinstance(slider.value, tuple):
+            candidates.append(("Year range", lambda s=slider: s.set_value(random_range(rng, s.min, s.max))))
+        else:
+            candidates.append((slider.label, lambda s=slider: s.set_value(
+                rng.randrange(s.min, s.max + 1, s.step or 1))))
+    for box in at.sidebar.selectbox:
+        if box.label == "Type":
+            # Selectboxes with a format_func take the raw option, not its label
+            candidates.append(("Type", lambda b=box: b.set_value(rng.choice(list(VIOLENCE_TYPES)))))
+        elif len(box.options) > 1:
+            candidates.append((box.label, lambda b=box: b.set_value(rng.choice(b.options))))
+    for choice in at.sidebar.multiselect:
+        if choice.options:
+            candidates.append((choice.label, lambda m=choice: m.set_value(
+                rng.sample(m.options, rng.randint(0, min(3, len(m.options)))))))
+    for radio in at.sidebar.radio:
+        candidates.append((radio.label, lambda r=radio: r.set_value(rng.choice(r.options))))
+    if not candidates:
+        return None
+    label, change = rng.choice(candidates)
+    change().run()
+    return label
+
+
+def random_range(rng: random.Random, low: int, high: int) -> tuple[int, int]:
+    start = rng.randint(low, high - 1)
+    return start, rng.randint(start + 1, high)
+
+
+def session(seed: int, steps: int, start_barrier: threading.Barrier, records: list, errors: list) -> None:
+    """One simulated user; appends (kind, seconds) per rerun to `records`."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(APP), default_timeout=300)
+    start_barrier.wait()
+
+    def timed(kind, action):
+        start = time.perf_counter()
+        result = action()
+        records.append((kind, time.perf_counter() - start))
+        if at.exception:
+            errors.append((kind, [e.value for e in at.exception]))
+        return result
+
+    try:
+        timed("open", at.run)
+        tab = None
+        for _ in range(steps):
+            if tab is None or rng.random() < SWITCH_PROBABILITY:
+                tab = rng.choice([t for t in TABS if t != tab])
+                timed("switch tab", lambda: next(b for b in at.button if b.label == tab).click().run())
+            elif timed("filter", lambda: move_filter(at, rng)) is None:
+                tab = None
+    except Exception as exc:
+        # A timed-out or failed rerun ends this session; the others carry on
+        errors.append(("session", [repr(exc)]))
+
+
+def run_level(sessions: int, steps: int, seed: int) -> dict:
+    records: list[tuple[str, float]] = []
+    errors: list = []
+    barrier = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=session, args=(seed + i, steps, barrier, records, errors))
+               for i in range(sessions)]
+    for t in threads:
+        t.start()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    METRICS.reset()
+    sampler = RssSampler()
+    sampler.start()
+    barrier.wait()
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    for t in threads:
+        t.join()
+    wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+    rss_peak = sampler.stop()
+    gc.collect()
+
+    result = {
+        "sessions": sessions, "reruns": len(records), "errors": errors, "wall_s": wall,
+        "reruns_per_s": len(records) / wall, "cpu_ms_per_rerun": cpu * 1e3 / max(len(records), 1),
+        "cpu_utilization": cpu / wall, "rss_before_mib": rss_before / 2**20, "rss_peak_mib": rss_peak / 2**20,
+        "rss_after_mib": rss_bytes() / 2**20, "latency_ms": {}, "stages": METRICS.summary(),
+    }
+    for kind in ["all", "open", "switch tab", "filter"]:
+        times = [s * 1e3 for k, s in records if kind in ("all", k)]
+        if times:
+            result["latency_ms"][kind] = percentiles(times)
+    return result
+
+
+def percentiles(times: list[float]) -> dict:
+    if len(times) > 1:
+        cuts = statistics.quantiles(times, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = times[0]
+    return {"count": len(times), "p50": p50, "p95": p95, "p99": p99, "max": max(times)}
+
+
+def print_level(result: dict) -> None:
+    overall = result["latency_ms"]["all"]
+    print(f"{result['sessions']:>8} {result['reruns']:>7} {result['reruns_per_s']:>8.1f} {overall['p50']:>8.0f} "
+          f"{overall['p95']:>8.0f} {overall['p99']:>8.0f} {overall['max']:>8.0f} {result['cpu_ms_per_rerun']:>8.0f} "
+          f"{result['cpu_utilization']:>5.0%} {result['rss_before_mib']:>7.0f} {result['rss_peak_mib']:>7.0f} "
+          f"{result['rss_after_mib']:>7.0f} {len(result['errors']):>6}")
+
+
+def print_details(result: dict, top: int) -> None:
+    print(f"\n{result['sessions']} sessions, latency by step (ms):")
+    for kind, stats in result["latency_ms"].items():
+        print(f"  {kind:<11} n={stats['count']:<5} p50 {stats['p50']:>7.0f}  p95 {stats['p95']:>7.0f}  "
+              f"p99 {stats['p99']:>7.0f}  max {stats['max']:>7.0f}")
+    print("  slowest traced stages (by total time, ms):")
+    stages = sorted(result["stages"], key=lambda s: s["count"] * s["mean_ms"], reverse=True)[:top]
+    for s in stages:
+        print(f"  {s['tab']:<24} {s['span']:<28} n={s['count']:<5} mean {s['mean_ms']:>7.1f}  max {s['max_ms']:>7.1f}")
+    for kind, exceptions in result["errors"][:5]:
+        print(f"  error after {kind}: {exceptions}")
+
+
+def run_levels(levels: list[int], steps: int, seed: int) -> list[dict]:
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'cpu ms':>8} {'cpu':>5} {'rss0':>7} {'peak':>7} {'after':>7} {'errors':>6}")
+    results = []
+    for sessions in levels:
+        results.append(run_level(sessions, steps, seed + 100 * sessions))
+        print_level(results[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--steps", type=int, default=20, help="reruns per session after opening the app")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=8, help="stages listed per level")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    # What the server warm-up does at startup, then one session so every module is imported
+    start = time.perf_counter()
+    warmup.warm_all()
+    with shared_runtime():
+        run_level(1, len(TABS), args.seed + 10_000)
+        print(f"warm-up {time.perf_counter() - start:.1f} s; {os.cpu_count()} CPUs\n")
+        results = run_levels(args.sessions, args.steps, args.seed)
+    for result in results:
+        print_details(result, args.top)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, default=str))
+    if any(r["errors"] for r in results):
+        raise SystemExit("some reruns raised exceptions")
+
+
+if __name__ == "__main__":
+    main()
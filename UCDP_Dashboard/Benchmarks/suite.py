@@ -0,0 +1,189 @@
+"""Headless benchmark suite for the dashboard's data and figure paths.
+
+Drives the same calls each tab makes on a rerun with representative filter combinations and
+reports p50/p95 latency plus peak traced memory per path. `--scale` replicates the
+country-year CSV (each copy gets its own country names) to see where a path stops scaling.
+
+Run from UCDP_Dashboard/:
+    python -m Benchmarks.suite                       # real dataset
+    python -m Benchmarks.suite --scale 1 10 100      # plus 10x and 100x synthetic copies
+    python -m Benchmarks.suite --scale 1000 --skip-figures --json results.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from Dataset import columnar_cache
+from Dataset.aggregates import AggregateCube, VIOLENCE_TYPES
+from Dataset.bar_race import build_bar_race
+from Dataset.dataset import SHARED_STORE, UCDP_Data, VIEW_COLUMNS
+from Dataset.filter_index import FilterIndex
+
+YEAR_RANGES = [(2000, 2020), (1989, 2024), (2010, 2015)]
+
+
+def default_path() -> Path:
+    return UCDP_Data(columns=VIEW_COLUMNS, compact=True).filepath
+
+
+def synthetic_csv(factor: int, workdir: Path, full_width: bool) -> Path:
+    """Write the dataset replicated `factor` times; copy i renames every country to '<name> #i'."""
+    df = pd.read_csv(default_path(), low_memory=False, usecols=None if full_width else lambda c: c in VIEW_COLUMNS)
+    path = workdir / f"ucdp_x{factor}.csv"
+    with open(path, "w", newline="") as out:
+        for i in range(factor):
+            copy = df if i == 0 else df.assign(
+                country_cy=df["country_cy"] + f" #{i}",
+                country_id_cy=df["country_id_cy"] + 10000 * i,
+            )
+            copy.to_csv(out, index=False, header=i == 0)
+    return path
+
+
+def measure(fn, cases, repeat):
+    """Latencies (seconds) over repeat x cases calls, and peak traced bytes for one pass."""
+    latencies = []
+    for _ in range(repeat):
+        for case in cases:
+            start = time.perf_counter()
+            fn(*case)
+            latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for case in cases:
+        fn(*case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, peak
+
+
+def summarize(name, latencies, peak):
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95 = cuts[49], cuts[94]
+    else:
+        p50 = p95 = latencies[0]
+    return {"path": name, "calls": len(latencies), "p50_ms": p50 * 1e3, "p95_ms": p95 * 1e3,
+            "peak_mib": peak / 2**20}
+
+
+def run_scale(path: Path, repeat: int, load_repeat: int, figures: bool):
+    results = []
+
+    def bench(name, fn, cases, times=repeat):
+        results.append(summarize(name, *measure(fn, cases, times)))
+
+    def cold_load():
+        columnar_cache.cache_path_for(path).unlink(missing_ok=True)
+        SHARED_STORE.invalidate(path)
+        UCDP_Data(filepath=path, columns=VIEW_COLUMNS, compact=True)
+
+    def warm_load():
+        SHARED_STORE.invalidate(path)
+        UCDP_Data(filepath=path, columns=VIEW_COLUMNS, compact=True)
+
+    bench("load: UCDP_Data cold (CSV parse + cache write)", cold_load, [()], load_repeat)
+    bench("load: UCDP_Data warm (columnar cache)", warm_load, [()], load_repeat)
+    bench("load: UCDP_Data shared-store hit", lambda: UCDP_Data(filepath=path, columns=VIEW_COLUMNS, compact=True),
+          [()])
+
+    handler = UCDP_Data(filepath=path, columns=VIEW_COLUMNS, compact=True)
+    bench("build: FilterIndex", lambda: FilterIndex(handler.data), [()], load_repeat)
+    bench("build: AggregateCube", lambda: AggregateCube(handler.data), [()], load_repeat)
+    cube = handler.aggregates()
+
+    countries = list(cube.countries[:3])
+    regions = list(cube.regions)
+    filter_cases = [(yr, None, None) for yr in YEAR_RANGES] + [
+        ((2000, 2020), countries, None),
+        ((2000, 2020), None, regions[0]),
+    ]
+    bench("filter_data", handler.filter_data, filter_cases)
+    filtered = [handler.filter_data(*case) for case in filter_cases]
+    bench("clean_death_counts", handler.clean_death_counts, [(f,) for f in filtered])
+
+    types = list(VIOLENCE_TYPES)
+    tab_two_cases = [(t, yr, None) for t in types for yr in YEAR_RANGES] + [(types[0], (2000, 2020), countries)]
+    bench("tab_two: deaths per year", cube.deaths_per_year, tab_two_cases)
+
+    tab_three_cases = [(cube, yr, None, n) for yr in YEAR_RANGES for n in (10, 25)]
+    bench("tab_three: bar race", build_bar_race, tab_three_cases)
+
+    from Tabs.tab_four import tab_four
+    from Tabs.tab_five import tab_five
+    from Tabs.tab_three import tab_three
+    from Tabs.tab_two import tab_two
+    t2, t3, t4, t5 = (cls.__new__(cls) for cls in (tab_two, tab_three, tab_four, tab_five))
+
+    def top_countries(yr, region):
+        return (cube.totals_by_country(types, yr, region=region).sum(axis=1)
+                .sort_values(ascending=False).head(5).index.tolist())
+
+    tab_four_country_cases = [(cube, yr, t, region, top_countries(yr, region))
+                              for yr in YEAR_RANGES[:2] for t in types[:2] for region in regions[:2]]
+    bench("tab_four: countries in region", t4.country_comparison, tab_four_country_cases)
+    tab_four_region_cases = [(cube, yr, t, regions[:3]) for yr in YEAR_RANGES for t in types[:2]]
+    bench("tab_four: regions vs regions", t4.region_comparison, tab_four_region_cases)
+
+    tab_five_cases = [(t, yr, None) for t in types[:2] for yr in YEAR_RANGES]
+    bench("tab_five: per country-year", lambda t, yr, c: cube.per_year_by_country(t, yr, c, with_iso3=True),
+          tab_five_cases)
+
+    if figures:
+        fig_repeat = max(1, repeat // 10)
+        bench("figure: tab_two line", lambda args: t2.build_time_series(*args, VIOLENCE_TYPES),
+              [((cube.deaths_per_year(t, yr), t),) for t, yr, _ in tab_two_cases[:3]], fig_repeat)
+        races = [build_bar_race(*case) for case in tab_three_cases[:2]]
+        bench("figure: tab_three bar race", lambda r: t3.build_figure(r.frames, r.countries, r.x_max, 800),
+              [(r,) for r in races], fig_repeat)
+        country_aggs = [(*t4.country_comparison(*case), case[2], VIOLENCE_TYPES, case[3])
+                        for case in tab_four_country_cases[:2]]
+        bench("figure: tab_four countries", t4.build_country_figures, country_aggs, fig_repeat)
+        region_aggs = [(*t4.region_comparison(*case), case[2], VIOLENCE_TYPES) for case in tab_four_region_cases[:2]]
+        bench("figure: tab_four regions", t4.build_region_figures, region_aggs, fig_repeat)
+        maps = [(cube.per_year_by_country(t, yr, c, with_iso3=True), t, VIOLENCE_TYPES)
+                for t, yr, c in tab_five_cases[:2]]
+        bench("figure: tab_five choropleth", t5.build_map, maps, fig_repeat)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1],
+                        help="replication factors, e.g. 1 10 100 1000 (default: 1)")
+    parser.add_argument("--repeat", type=int, default=30, help="passes over each path's cases")
+    parser.add_argument("--load-repeat", type=int, default=3, help="passes for load/build paths")
+    parser.add_argument("--skip-figures", action="store_true", help="skip plotly figure construction")
+    parser.add_argument("--full-width", action="store_true",
+                        help="replicate all 74 columns instead of just the view columns")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="ucdp_bench_") as tmp:
+        for factor in args.scale:
+            path = default_path() if factor == 1 else synthetic_csv(factor, Path(tmp), args.full_width)
+            results = run_scale(path, args.repeat, args.load_repeat, not args.skip_figures)
+            report[f"x{factor}"] = results
+            rows = len(UCDP_Data(filepath=path, columns=VIEW_COLUMNS, compact=True).data)
+            print(f"\n== scale x{factor} ({rows:,} rows) ==")
+            print(f"{'path':<50} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'peak MiB':>9}")
+            for r in results:
+                print(f"{r['path']:<50} {r['calls']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['peak_mib']:>9.2f}")
+            SHARED_STORE.invalidate(path)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
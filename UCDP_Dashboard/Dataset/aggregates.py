@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from Dataset.countries import iso3_codes
+from Dataset.parallel import EXECUTOR
+from Dataset.ranking import RankingService
+
+# Violence-type columns and the labels the tabs show for them
+VIOLENCE_TYPES = {
+    "sb_total_deaths_best_cy": "State-based",
+    "ns_total_deaths_best_cy": "Non-state",
+    "os_total_deaths_best_cy": "One-sided",
+    "cumulative_total_deaths_in_orgvio_best_cy": "All types (cumulative)",
+}
+VIOLENCE_COLUMNS = list(VIOLENCE_TYPES)
+
+
+class AggregateCube:
+    """Dense year x country totals for each violence column, plus region rollups.
+
+    Built once from a country-year frame. Every query is array slicing over the cube
+    (and prefix sums along the year axis for range totals) instead of a pandas groupby,
+    and returns the same rows the equivalent `filter_data(...).groupby(...)` would.
+    Only rows with a year and a country are indexed.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list[str] | None = None, executor=EXECUTOR):
+        columns = [c for c in (columns or VIOLENCE_COLUMNS) if c in df.columns]
+        df = df.dropna(subset=["year_cy", "country_cy"])
+
+        years = df["year_cy"].to_numpy(dtype="int64")
+        self.year_min = int(years.min()) if len(years) else 0
+        self.years = np.arange(self.year_min, int(years.max()) + 1 if len(years) else 0)
+        self.columns = columns
+        self._column_index = {c: i for i, c in enumerate(columns)}
+
+        country_codes, countries = pd.factorize(df["country_cy"], sort=True)
+        self.countries = np.asarray(countries, dtype=object)
+        self._country_index = {c: i for i, c in enumerate(self.countries)}
+        # Codes resolved at load time (iso3_cy) so maps can use code-based locations
+        if "iso3_cy" in df.columns:
+            self.iso3 = np.full(len(self.countries), None, dtype=object)
+            iso3 = df["iso3_cy"].astype(object).to_numpy()
+            self.iso3[country_codes[::-1]] = iso3[::-1]
+            self.iso3[pd.isna(self.iso3)] = None
+        else:
+            self.iso3 = iso3_codes(self.countries)
+
+        # Each country belongs to a single region in UCDP; keep the first one seen
+        if "region_cy" in df.columns:
+            regions = df["region_cy"].astype(object).fillna("")
+        else:
+            regions = pd.Series("", index=df.index)
+        region_codes, region_names = pd.factorize(regions, sort=True)
+        self.regions = np.asarray(region_names, dtype=object)
+        self._region_index = {r: i for i, r in enumerate(self.regions)}
+        self.country_region = np.zeros(len(self.countries), dtype=np.int64)
+        self.country_region[country_codes[::-1]] = region_codes[::-1]
+
+        year_codes = years - self.year_min
+        shape = (len(columns), len(self.years), len(self.countries))
+        # Row sums into flat (year, country) cells; split across workers for large (e.g. event-level) frames
+        cells = year_codes * shape[2] + country_codes
+        vals = np.stack([pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype="int64")
+                         for col in columns]) if columns else np.zeros((0, len(df)), dtype=np.int64)
+        self.values = executor.grid_sums(cells, vals, shape[1] * shape[2]).reshape(shape)
+        self.present = np.zeros(shape[1:], dtype=bool)
+        self.present[year_codes, country_codes] = True
+
+        region_onehot = np.zeros((len(self.countries), len(self.regions)), dtype=np.int64)
+        region_onehot[np.arange(len(self.countries)), self.country_region] = 1
+        self.region_values = self.values @ region_onehot
+        self.region_present = (self.present.astype(np.int64) @ region_onehot) > 0
+
+        # Prefix sums along the year axis, with a leading zero row: total(lo..hi) = p[hi] - p[lo]
+        self.prefix = _prefix(self.values)
+        self.region_prefix = _prefix(self.region_values)
+        # Cached top-N queries over the prefix sums; lives and dies with this cube
+        self.rankings = RankingService(self)
+
+    # ---- index helpers ----
+    def year_slice(self, year_range) -> slice:
+        lo = int(np.clip(int(year_range[0]) - self.year_min, 0, len(self.years)))
+        hi = int(np.clip(int(year_range[1]) - self.year_min + 1, lo, len(self.years)))
+        return slice(lo, hi)
+
+    def country_codes(self, countries=None, region=None) -> np.ndarray:
+        """Country positions matching the same country/region rules as UCDP_Data.filter_data."""
+        if countries:
+            if isinstance(countries, str):
+                countries = [countries]
+            codes = np.array(sorted({self._country_index[c] for c in countries if c in self._country_index}),
+                             dtype=np.int64)
+        else:
+            codes = np.arange(len(self.countries))
+        if region:
+            rcode = self._region_index.get(region)
+            if rcode is None:
+                return codes[:0]
+            codes = codes[self.country_region[codes] == rcode]
+        return codes
+
+    def region_codes(self, regions) -> np.ndarray:
+        if isinstance(regions, str):
+            regions = [regions]
+        return np.array(sorted({self._region_index[r] for r in regions if r in self._region_index}), dtype=np.int64)
+
+    def _column(self, column: str) -> int:
+        return self._column_index[column]
+
+    # ---- queries ----
+    def deaths_per_year(self, column: str, year_range, countries=None, region=None) -> pd.DataFrame:
+        """Equivalent of filter_data(year_range, countries, region).groupby("year_cy")[column].sum()."""
+        ys = self.year_slice(year_range)
+        codes = self.country_codes(countries, region)
+        values = self.values[self._column(column), ys][:, codes].sum(axis=1)
+        keep = self.present[ys][:, codes].any(axis=1)
+        return pd.DataFrame({"year_cy": self.years[ys][keep], column: values[keep]})
+
+    def per_year_by_country(self, columns, year_range, countries=None, region=None,
+                            with_iso3: bool = False) -> pd.DataFrame:
+        """Long [year_cy, country_cy, *columns] rows for every country-year present in the data.
+
+        `with_iso3` adds the country's precomputed ISO-3 code as `iso3_cy`.
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        ys = self.year_slice(year_range)
+        codes = self.country_codes(countries, region)
+        year_idx, country_idx = np.nonzero(self.present[ys][:, codes])
+        out = {
+            "year_cy": self.years[ys][year_idx],
+            "country_cy": self.countries[codes][country_idx],
+        }
+        if with_iso3:
+            out["iso3_cy"] = self.iso3[codes][country_idx]
+        for col in columns:
+            out[col] = self.values[self._column(col), ys][:, codes][year_idx, country_idx]
+        return pd.DataFrame(out)
+
+    def per_year_by_region(self, column: str, year_range, regions) -> pd.DataFrame:
+        """Long [year_cy, region_cy, column] rows for each selected region with data in that year."""
+        ys = self.year_slice(year_range)
+        codes = self.region_codes(regions)
+        year_idx, region_idx = np.nonzero(self.region_present[ys][:, codes])
+        return pd.DataFrame({
+            "year_cy": self.years[ys][year_idx],
+            "region_cy": self.regions[codes][region_idx],
+            column: self.region_values[self._column(column), ys][:, codes][year_idx, region_idx],
+        })
+
+    def totals_by_country(self, columns, year_range, countries=None, region=None) -> pd.DataFrame:
+        """Range totals per country (index country_cy), answered from the prefix sums.
+
+        Countries with no rows in the range are left out, matching a groupby over filtered rows.
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        ys = self.year_slice(year_range)
+        codes = self.country_codes(countries, region)
+        codes = codes[self.present[ys][:, codes].any(axis=0)]
+        data = {c: self.prefix[self._column(c), ys.stop, codes] - self.prefix[self._column(c), ys.start, codes]
+                for c in columns}
+        return pd.DataFrame(data, index=pd.Index(self.countries[codes], name="country_cy"))
+
+    def totals_by_region(self, column: str, year_range, regions) -> pd.Series:
+        """Range totals per selected region (index region_cy), answered from the prefix sums."""
+        ys = self.year_slice(year_range)
+        codes = self.region_codes(regions)
+        codes = codes[self.region_present[ys][:, codes].any(axis=0)]
+        col = self._column(column)
+        totals = self.region_prefix[col, ys.stop, codes] - self.region_prefix[col, ys.start, codes]
+        return pd.Series(totals, index=pd.Index(self.regions[codes], name="region_cy"), name=column)
+
+
+def deaths_per_year_by_version(cubes: dict[str, "AggregateCube"], column: str, year_range, countries=None,
+                               region=None) -> pd.DataFrame:
+    """Long [year_cy, version, column] rows: deaths_per_year from each release's cube, stacked for comparison."""
+    frames = [cube.deaths_per_year(column, year_range, countries, region).assign(version=version)
+              for version, cube in cubes.items()]
+    return pd.concat(frames, ignore_index=True)[["year_cy", "version", column]]
+
+
+def version_changes(by_version: pd.DataFrame, column: str, base: str, other: str) -> pd.DataFrame:
+    """Per-year [year_cy, base, other, change] from deaths_per_year_by_version; years missing in a release count 0."""
+    wide = by_version.pivot(index="year_cy", columns="version", values=column).fillna(0).astype("int64")
+    wide = wide.reindex(columns=[base, other], fill_value=0)
+    wide["change"] = wide[other] - wide[base]
+    wide.columns.name = None
+    return wide.reset_index()
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    out = np.zeros((values.shape[0], values.shape[1] + 1, values.shape[2]), dtype=values.dtype)
+    np.cumsum(values, axis=1, out=out[:, 1:])
+    return out
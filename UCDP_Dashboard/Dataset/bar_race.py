@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from Dataset.aggregates import AggregateCube, VIOLENCE_TYPES
+
+# The three types the bars are stacked from (the cumulative column is their sum)
+CONFLICT_TYPE_LABELS = {column: VIOLENCE_TYPES[column] for column in list(VIOLENCE_TYPES)[:3]}
+
+# Per cube, the last MEMO_SIZE bar races; keyed weakly, so they go when a reloaded cube does
+MEMO_SIZE = 64
+_memo: "weakref.WeakKeyDictionary[AggregateCube, OrderedDict]" = weakref.WeakKeyDictionary()
+_memo_lock = threading.Lock()
+
+
+class BarRace:
+    """Everything the animated bar chart needs for one filter combination.
+
+    `countries` is the top-N list, largest first; `frames` is the long table handed to
+    px.bar (one row per year x country x conflict type, in year order); `x_max` is the
+    largest single country-year total across *all* filtered countries, for a fixed axis.
+    """
+
+    def __init__(self, countries: list[str], frames: pd.DataFrame, x_max):
+        self.countries = countries
+        self.frames = frames
+        self.x_max = x_max
+
+
+def bar_race(cube: AggregateCube, year_range, countries=None, n: int = 10, dense: bool = False) -> BarRace:
+    """Memoized on (cube, year range, countries, n, dense); repeat reruns are a dict lookup."""
+    if isinstance(countries, str):
+        countries = [countries]
+    key = ((int(year_range[0]), int(year_range[1])), tuple(sorted(countries)) if countries else (), int(n), bool(dense))
+    with _memo_lock:
+        races = _memo.setdefault(cube, OrderedDict())
+        race = races.get(key)
+        if race is not None:
+            races.move_to_end(key)
+            return race
+    race = build_bar_race(cube, key[0], list(key[1]), key[2], key[3])
+    with _memo_lock:
+        races[key] = race
+        while len(races) > MEMO_SIZE:
+            races.popitem(last=False)
+    return race
+
+
+def build_bar_race(cube: AggregateCube, year_range, countries=None, n: int = 10, dense: bool = False) -> BarRace:
+    """Top-N countries, per-frame values and axis bound in one pass over the wide cube.
+
+    No melted copy of the filtered rows is built: the top N come from the cube's ranking
+    service (prefix-sum totals, partial selection, cached), and only the top-N cells are
+    expanded into long format.
+
+    `dense` gives every frame all N countries in the same order (0 deaths where a country
+    has no row that year), so the per-frame country arrays are identical and can be sent once.
+    """
+    columns = list(CONFLICT_TYPE_LABELS)
+    col_idx = [cube.columns.index(c) for c in columns]
+    ys = cube.year_slice(year_range)
+    codes = cube.country_codes(countries or None)
+
+    present = cube.present[ys][:, codes]
+    cells = cube.values[col_idx, ys][:, :, codes].sum(axis=0)
+    x_max = cells[present].max() if present.any() else np.nan
+
+    top_codes = cube.rankings.top_country_codes(columns, year_range, n, countries)
+    names = cube.countries[top_codes].tolist()
+    values = cube.values[col_idx, ys][:, :, top_codes]  # (type, year, top country)
+
+    # Expand only the top-N cells: year-major so animation frames appear in year order
+    cells_shown = cube.present[ys][:, top_codes]
+    if dense:
+        cells_shown = np.repeat(cells_shown.any(axis=1, keepdims=True), len(top_codes), axis=1)
+    year_idx, country_idx = np.nonzero(cells_shown)
+    n_types = len(columns)
+    frames = pd.DataFrame({
+        "year_cy": np.repeat(cube.years[ys][year_idx], n_types),
+        "country_cy": pd.Categorical(
+            np.repeat(cube.countries[top_codes][country_idx], n_types), categories=names[::-1], ordered=True
+        ),
+        "Conflict Type": np.tile(list(CONFLICT_TYPE_LABELS.values()), len(year_idx)),
+        "Deaths": values[:, year_idx, country_idx].T.reshape(-1),
+    })
+    return BarRace(names, frames, x_max)
+
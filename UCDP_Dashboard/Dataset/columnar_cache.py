@@ -0,0 +1,79 @@
+from pathlib import Path
+import json
+import os
+import pandas as pd
+
+from Dataset import countries
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is in requirements, but keep the CSV path working without it
+    pa = None
+    feather = None
+
+# Bumped whenever the typing applied in UCDP_Data.load_data changes, so old caches are rebuilt
+CACHE_FORMAT = 3
+METADATA_KEY = b"ucdp_source"
+
+
+def enabled() -> bool:
+    return feather is not None and os.environ.get("UCDP_COLUMNAR_CACHE", "1") != "0"
+
+
+def cache_path_for(csv_path: Path) -> Path:
+    """Typed columnar copy lives next to the CSV, e.g. organizedviolencecy_v25_1.feather."""
+    return Path(csv_path).with_suffix(".feather")
+
+
+def source_signature(csv_path: Path) -> dict:
+    """The CSV's state, plus the country-code table's (the cached frame holds the resolved `iso3_cy`)."""
+    st = Path(csv_path).stat()
+    return {"format": CACHE_FORMAT, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+            "country_codes": list(countries.table_signature())}
+
+
+def read_cached(csv_path: Path, columns: list[str] | None = None) -> pd.DataFrame | None:
+    """Memory-map the cached file and materialise only `columns`.
+
+    Returns None when there is no cache or it was built from a different version of the CSV.
+    """
+    if not enabled():
+        return None
+    path = cache_path_for(csv_path)
+    if not path.exists():
+        return None
+    try:
+        with pa.memory_map(str(path)) as source:
+            schema = pa.ipc.open_file(source).schema
+        stored = json.loads((schema.metadata or {}).get(METADATA_KEY, b"{}"))
+        if stored != source_signature(csv_path):
+            return None
+        if columns is not None:
+            columns = [c for c in columns if c in schema.names]
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    return table.to_pandas()
+
+
+def write_cache(csv_path: Path, df: pd.DataFrame) -> Path | None:
+    """Write `df` as an uncompressed Feather v2 file (required for zero-copy memory mapping).
+
+    Returns the cache path, or None if the directory is read-only or pyarrow is unavailable.
+    """
+    if not enabled():
+        return None
+    path = cache_path_for(csv_path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[METADATA_KEY] = json.dumps(source_signature(csv_path)).encode()
+        feather.write_feather(table.replace_schema_metadata(metadata), tmp, compression="uncompressed")
+        # Atomic swap so concurrent readers never see a half-written file
+        os.replace(tmp, path)
+    except (OSError, pa.ArrowException):
+        tmp.unlink(missing_ok=True)
+        return None
+    return path
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Label columns stored as categorical codes; other text columns are categorised when they repeat a lot
+CATEGORICAL_COLUMNS = ["country_cy", "region_cy", "main_govt_name_cy", "iso3_cy"]
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# 0/1 presence flags packed into one uint8 column, bit i = EXIST_FLAGS[i]
+EXIST_FLAGS = [
+    "sb_exist_cy",
+    "sb_intrastate_exist_cy",
+    "sb_interstate_exist_cy",
+    "ns_exist_cy",
+    "os_exist_cy",
+]
+PACKED_FLAGS_COLUMN = "exist_flags_cy"
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a memory-compact copy of a typed country-year frame.
+
+    - country/region/government names (and other highly repetitive text) become categoricals
+    - non-negative integer columns (counts, deaths, ids, year) use the smallest fitting unsigned int
+    - the `*_exist_cy` flags are bit-packed into a single uint8 `exist_flags_cy` column
+    """
+    out = {}
+    for col in df.columns:
+        if col in EXIST_FLAGS:
+            continue
+        out[col] = _compact_column(df[col], force_category=col in CATEGORICAL_COLUMNS)
+
+    flags = [c for c in EXIST_FLAGS if c in df.columns]
+    if flags:
+        packed = np.zeros(len(df), dtype=np.uint8)
+        for bit, col in enumerate(EXIST_FLAGS):
+            if col in df.columns:
+                set_bits = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy() != 0
+                packed |= set_bits.astype(np.uint8) << bit
+        out[PACKED_FLAGS_COLUMN] = packed
+    return pd.DataFrame(out, index=df.index)
+
+
+def unpack_exist_flags(df: pd.DataFrame, flags: list[str] | None = None) -> pd.DataFrame:
+    """Expand the packed `exist_flags_cy` column back into boolean `*_exist_cy` columns."""
+    packed = df[PACKED_FLAGS_COLUMN].to_numpy()
+    flags = flags or EXIST_FLAGS
+    return pd.DataFrame(
+        {col: (packed >> EXIST_FLAGS.index(col)) & 1 == 1 for col in flags},
+        index=df.index,
+    )
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column (deep) before and after compaction, with a TOTAL row."""
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    columns = list(dict.fromkeys([*before.columns, *after.columns]))
+    report = pd.DataFrame({
+        "dtype_before": [str(before[c].dtype) if c in before.columns else "" for c in columns],
+        "dtype_after": [str(after[c].dtype) if c in after.columns else "(packed)" for c in columns],
+        "bytes_before": [int(before_bytes.get(c, 0)) for c in columns],
+        "bytes_after": [int(after_bytes.get(c, 0)) for c in columns],
+    }, index=pd.Index(columns, name="column"))
+    report.loc["TOTAL"] = ["", "", int(before_bytes.sum()), int(after_bytes.sum())]
+    report["saved_pct"] = (
+        100 * (1 - report["bytes_after"] / report["bytes_before"].where(report["bytes_before"] > 0))
+    ).round(1)
+    return report
+
+
+def _compact_column(s: pd.Series, force_category: bool = False) -> pd.Series:
+    if _is_text(s):
+        if force_category or s.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE_RATIO * len(s):
+            return s.astype("category")
+        return s
+    if force_category:
+        return s.astype("category")
+    if pd.api.types.is_integer_dtype(s.dtype) or _is_integral_float(s):
+        return _smallest_unsigned(s)
+    return s
+
+
+def _is_text(s: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)
+
+
+def _is_integral_float(s: pd.Series) -> bool:
+    if not pd.api.types.is_float_dtype(s.dtype):
+        return False
+    values = s.dropna().to_numpy()
+    return len(values) > 0 and bool(np.all(values == np.round(values)))
+
+
+def _smallest_unsigned(s: pd.Series) -> pd.Series:
+    values = s.dropna()
+    if len(values) == 0 or (values < 0).any():
+        return s
+    top = int(values.max())
+    for bits in (8, 16, 32, 64):
+        if top <= np.iinfo(f"uint{bits}").max:
+            break
+    if s.isna().any():
+        return s.astype(f"UInt{bits}")
+    return s.astype("int64").astype(f"uint{bits}")
+
+
+if __name__ == "__main__":
+    from Dataset.dataset import UCDP_Data
+
+    full = UCDP_Data().data
+    print(memory_report(full, compact_frame(full)).to_string())
@@ -0,0 +1,97 @@
+"""Offline country-code resolution: UCDP country id / name -> ISO 3166-1 alpha-3.
+
+The lookup table (country_codes.csv, bundled next to this file) lists every UCDP country
+by its Gleditsch-Ward id (`country_id_cy`, also used by the GED event data), its UCDP name
+and its ISO-3 code. Successor states map to today's code; states with no present-day
+geometry (Czechoslovakia, the GDR, South Yemen) are deliberately left without one.
+
+Codes are resolved once per dataset load (by id, then by name for ids the table does not
+know) and stored as the `iso3_cy` column, so maps use plotly's code-based
+locationmode="ISO-3" and never match names at render time.
+
+    python -m Dataset.countries [dataset.csv]     # report countries without a code
+"""
+import csv
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+LOOKUP_PATH = Path(__file__).with_name("country_codes.csv")
+
+
+def table_signature() -> tuple[int, int]:
+    """(mtime_ns, size) of the lookup table; caches holding `iso3_cy` include it in their keys."""
+    st = LOOKUP_PATH.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def lookup() -> tuple[dict[int, str | None], dict[str, str | None]]:
+    """(ISO-3 by country id, ISO-3 by country name) from the bundled table; None = known, no code."""
+    return _read_lookup(table_signature())
+
+
+@lru_cache(maxsize=1)
+def _read_lookup(signature: tuple[int, int]) -> tuple[dict[int, str | None], dict[str, str | None]]:
+    # Re-read whenever the table's signature changes
+    by_id, by_name = {}, {}
+    with open(LOOKUP_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            code = row["iso3"] or None
+            by_id[int(row["country_id_cy"])] = code
+            by_name[row["country_cy"]] = code
+    return by_id, by_name
+
+
+def iso3_codes(countries) -> np.ndarray:
+    """ISO-3 code per country name (None where there is no mapping)."""
+    by_name = lookup()[1]
+    return np.array([by_name.get(c) for c in countries], dtype=object)
+
+
+def iso3_column(df: pd.DataFrame) -> pd.Series:
+    """ISO-3 code for every row (<NA> where unresolved): by `country_id_cy`, falling back to `country_cy`."""
+    by_id, by_name = lookup()
+    codes = pd.Series(pd.NA, index=df.index, dtype="string")
+    if "country_id_cy" in df.columns:
+        ids = pd.to_numeric(df["country_id_cy"], errors="coerce").astype("Int64")
+        known = ids.isin(list(by_id))
+        codes[known] = ids[known].map(by_id).astype("string")
+        unresolved = ~known
+    else:
+        unresolved = pd.Series(True, index=df.index)
+    if "country_cy" in df.columns:
+        names = df.loc[unresolved, "country_cy"].astype(object)
+        codes[unresolved] = names.map(by_name).astype("string")
+    return codes
+
+
+def unmatched(df: pd.DataFrame) -> pd.DataFrame:
+    """Countries whose rows have no ISO-3 code (so maps cannot draw them), with rows and deaths affected."""
+    codes = df["iso3_cy"] if "iso3_cy" in df.columns else iso3_column(df)
+    missing = df[codes.isna() & df["country_cy"].notna()]
+    keys = [c for c in ("country_id_cy", "country_cy") if c in df.columns]
+    deaths = "cumulative_total_deaths_in_orgvio_best_cy"
+    report = missing.groupby(keys, observed=True).agg(
+        rows=("country_cy", "size"),
+        **({"deaths": (deaths, "sum")} if deaths in df.columns else {}),
+    )
+    return report.reset_index()
+
+
+def main():
+    from Dataset.dataset import UCDP_Data
+
+    handler = UCDP_Data(sys.argv[1] if len(sys.argv) > 1 else None, shared=False)
+    report = unmatched(handler.data)
+    if report.empty:
+        print(f"{handler.filepath}: every country has an ISO-3 code")
+    else:
+        print(f"{handler.filepath}: {len(report)} countries without an ISO-3 code (not drawn on maps)")
+        print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,413 @@
+from collections import OrderedDict
 from pathlib import Path
+import logging
 import os
+import re
+import threading
+import time
+import numpy as np
 import pandas as pd
+from Dataset import columnar_cache, countries, ged
+from Dataset.shared_frames import SharedFrames, root_from_env
+from Dataset.compact import compact_frame
+from Dataset.aggregates import AggregateCube
+from Dataset.dyads import DYAD_COLUMNS, DyadIndex
+from Dataset.filter_index import FilterIndex
+from Dataset.schema import CONTRACT
+from Instrumentation import tracing
+
+logger = logging.getLogger(__name__)
+
+# Columns the dashboard views actually read; the dyad id/name strings are deliberately absent
+VIEW_COLUMNS = [
+    "country_id_cy",
+    "country_cy",
+    "year_cy",
+    "region_cy",
+    "sb_total_deaths_best_cy",
+    "ns_total_deaths_best_cy",
+    "os_total_deaths_best_cy",
+    "cumulative_total_deaths_in_orgvio_best_cy",
+    "iso3_cy",
+]
+
+# The Actors/Dyads view is the one reader of the dyad strings; it parses them once into a DyadIndex
+DYAD_VIEW_COLUMNS = [
+    "country_id_cy",
+    "country_cy",
+    "year_cy",
+    "region_cy",
+    "sb_total_deaths_best_cy",
+    "ns_total_deaths_best_cy",
+    "os_total_deaths_best_cy",
+] + DYAD_COLUMNS
+
+
+class DatasetStore:
+    """Process-wide cache of loaded frames (and objects derived from them), shared by every session and thread.
+
+    Entries are keyed on the resolved file path (plus a variant, e.g. the column
+    selection) and validated against the file's mtime/size on every lookup, so a
+    frame is only re-parsed when the file changes.
+    Frames handed out by the store are shared and must be treated as read-only.
+
+    With `background_refresh` on, a lookup that finds its file changed keeps returning
+    the current entry and starts a refresh thread instead of reloading in the session.
+    The refresh rebuilds every entry for that file (frames first, then the objects
+    derived from them) off to the side and swaps them in together, so readers only
+    ever see a complete old generation or a complete new one.
+    """
+
+    def __init__(self, settle_seconds: float = 1.0):
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+        # key -> (signature, value, loader); the loader is kept so a refresh can rebuild the entry
+        self._entries: dict[tuple, tuple[tuple[int, ...], object, object]] = {}
+        self._local = threading.local()
+        self._refreshing: set[str] = set()
+        self._failed: dict[str, tuple[int, ...]] = {}
+        self.background_refresh = False
+        self.settle_seconds = settle_seconds
+        self.load_count = 0
+        self.hit_count = 0
+        self.stale_hits = 0
+        self.refresh_count = 0
+        self.total_load_seconds = 0.0
+        self.last_load_seconds = 0.0
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, ...]:
+        # Frames carry iso3_cy from the country-code table, so editing the table also makes them stale
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size, *countries.table_signature()
+
+    def get(self, path: Path, loader, variant: tuple = ()):
+        """Return the cached frame for `path`, calling `loader()` if it is missing or stale."""
+        resolved = Path(path).resolve()
+        key = (str(resolved), variant)
+
+        # Inside a refresh, nested lookups (e.g. a cube's loader asking for its frame) see the new generation
+        staging = getattr(self._local, "staging", None)
+        if staging is not None and key[0] in staging:
+            generation, signature = staging[key[0]]
+            if key not in generation:
+                generation[key] = (signature, loader(), loader)
+            return generation[key][1]
+
+        try:
+            signature = self._signature(resolved)
+        except OSError:
+            # Mid-replacement (or deleted): keep serving what is loaded rather than failing the rerun
+            entry = self._entries.get(key)
+            if entry is None or not self.background_refresh:
+                raise
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hit_count += 1
+                return entry[1]
+            if entry is not None and self.background_refresh:
+                # Stale while revalidating: keep serving the complete old entry
+                self.stale_hits += 1
+                schedule = key[0] not in self._refreshing and self._failed.get(key[0]) != signature
+                if schedule:
+                    self._refreshing.add(key[0])
+            else:
+                schedule = None
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        if schedule is not None:
+            if schedule:
+                threading.Thread(target=self._refresh_in_background, args=(resolved,),
+                                 name="ucdp-dataset-refresh", daemon=True).start()
+            return entry[1]
+
+        # One loader per path; concurrent sessions wait for it instead of parsing again
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == signature:
+                    self.hit_count += 1
+                    return entry[1]
+
+            with self._lock:
+                # While older entries for this file are still being served, anything derived now is built
+                # from them: file it under their signature so the pending refresh rebuilds it too
+                if self.background_refresh:
+                    older = [e[0] for k, e in self._entries.items() if k[0] == key[0] and e[0] != signature]
+                    if older:
+                        signature = older[0]
+
+            start = time.perf_counter()
+            with tracing.span("dataset.load", variant=variant[:1]):
+                df = loader()
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._entries[key] = (signature, df, loader)
+                self.load_count += 1
+                self.total_load_seconds += elapsed
+                self.last_load_seconds = elapsed
+        return df
+
+    def is_stale(self, path: str | os.PathLike) -> bool:
+        """True if any entry for `path` was loaded from a different version of the file."""
+        resolved = Path(path).resolve()
+        try:
+            signature = self._signature(resolved)
+        except OSError:
+            return False
+        with self._lock:
+            return any(k[0] == str(resolved) and e[0] != signature for k, e in self._entries.items())
+
+    def paths(self) -> list[str]:
+        with self._lock:
+            return sorted({k[0] for k in self._entries})
+
+    def refresh(self, path: str | os.PathLike, force: bool = False) -> bool:
+        """Rebuild every entry for `path` from the file as it is now and swap them in at once.
+
+        Waits for the file to stop changing first (so a copy in progress is not parsed).
+        On failure the current entries stay in place and False is returned. `force` rebuilds
+        the entries even if the file is unchanged (e.g. a newer shared generation was published).
+        """
+        resolved = Path(path).resolve()
+        name = str(resolved)
+        with self._lock:
+            refresh_lock = self._load_locks.setdefault((name, "refresh"), threading.Lock())
+        # One refresh per file at a time; a second caller finds nothing left to do
+        with refresh_lock:
+            return self._refresh(name, self._settled_signature(resolved), force)
+
+    def _refresh(self, name: str, signature: tuple[int, ...], force: bool = False) -> bool:
+        with self._lock:
+            # A version that failed to load is not retried until the file changes again
+            if self._failed.get(name) == signature and not force:
+                return False
+            # Insertion order: a frame is always stored before anything derived from it
+            old = [(k, e[2]) for k, e in self._entries.items() if k[0] == name and (force or e[0] != signature)]
+        if not old:
+            return False
+
+        generation: dict[tuple, tuple] = {}
+        self._local.staging = {name: (generation, signature)}
+        start = time.perf_counter()
+        try:
+            with tracing.span("dataset.refresh"):
+                for key, loader in old:
+                    if key not in generation:
+                        generation[key] = (signature, loader(), loader)
+        except Exception as exc:
+            with self._lock:
+                self._failed[name] = signature
+            logger.warning("Refreshing %s failed; keeping the loaded version: %s", name, exc)
+            return False
+        finally:
+            self._local.staging = None
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._entries.update(generation)
+            self._failed.pop(name, None)
+            self.refresh_count += 1
+            self.total_load_seconds += elapsed
+            self.last_load_seconds = elapsed
+        return True
+
+    def _refresh_in_background(self, resolved: Path) -> None:
+        try:
+            self.refresh(resolved)
+        finally:
+            with self._lock:
+                self._refreshing.discard(str(resolved))
+
+    def _settled_signature(self, resolved: Path) -> tuple[int, ...]:
+        signature = self._signature(resolved)
+        while True:
+            time.sleep(self.settle_seconds)
+            current = self._signature(resolved)
+            if current == signature:
+                return signature
+            signature = current
+
+    def invalidate(self, path: str | os.PathLike | None = None) -> None:
+        """Drop the cached frames for `path`, or every cached frame when no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                resolved = str(Path(path).resolve())
+                for key in [k for k in self._entries if k[0] == resolved]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "loads": self.load_count,
+                "hits": self.hit_count,
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refresh_count,
+                "refreshing": sorted(self._refreshing),
+                "total_load_seconds": self.total_load_seconds,
+                "last_load_seconds": self.last_load_seconds,
+            }
+
+
+SHARED_STORE = DatasetStore()
+
+# UCDP release files, e.g. organizedviolencecy_v25_1.csv -> version "25.1"
+VERSION_PATTERN = re.compile(r"^organizedviolencecy_v(\d+)_(\d+)\.csv$")
+DEFAULT_FILENAME = "organizedviolencecy_v25_1.csv"
+
+
+class DatasetVersions:
+    """UCDP releases found on disk, loaded lazily by version.
+
+    Files named like `organizedviolencecy_v24_1.csv` are discovered in Dataset/, next to
+    UCDP_DATA_PATH, and in any UCDP_DATA_DIR directories (os.pathsep-separated). Nothing is
+    read until a version is used. The default version always stays resident; at most
+    `max_resident` other versions are kept in the shared store, and using one more evicts
+    the least recently used.
+    """
+
+    def __init__(self, store: DatasetStore, max_resident: int = 2):
+        self._store = store
+        self._lock = threading.Lock()
+        self._paths: dict[str, Path] | None = None
+        self._resident: OrderedDict[str, None] = OrderedDict()
+        self.max_resident = max_resident
+        self.evictions = 0
+
+    @staticmethod
+    def version_of(path) -> str | None:
+        match = VERSION_PATTERN.match(Path(path).name) if isinstance(path, (str, os.PathLike)) else None
+        return f"{int(match[1])}.{int(match[2])}" if match else None
+
+    @staticmethod
+    def _sort_key(version: str) -> tuple[int, ...]:
+        return tuple(int(part) for part in version.split("."))
+
+    def search_dirs(self) -> list[Path]:
+        dirs = [Path(__file__).resolve().parent]
+        env_path = os.environ.get("UCDP_DATA_PATH")
+        if env_path:
+            dirs.append(Path(env_path).resolve().parent)
+        dirs += [Path(d) for d in os.environ.get("UCDP_DATA_DIR", "").split(os.pathsep) if d]
+        return dirs
+
+    def scan(self) -> dict[str, Path]:
+        """Re-list the search directories; earlier directories win when a version appears twice."""
+        found: dict[str, Path] = {}
+        for directory in self.search_dirs():
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.glob("organizedviolencecy_v*.csv")):
+                version = self.version_of(path)
+                if version and version not in found:
+                    found[version] = path.resolve()
+        with self._lock:
+            self._paths = found
+        return dict(found)
+
+    def paths(self) -> dict[str, Path]:
+        with self._lock:
+            paths = self._paths
+        return dict(paths) if paths is not None else self.scan()
+
+    def versions(self) -> list[str]:
+        """Discovered versions, oldest first."""
+        return sorted(self.paths(), key=self._sort_key)
+
+    def default(self) -> str | None:
+        """UCDP_DEFAULT_VERSION if it exists, else the release UCDP_DATA_PATH points at, else the newest."""
+        versions = self.versions()
+        wanted = os.environ.get("UCDP_DEFAULT_VERSION") or self.version_of(os.environ.get("UCDP_DATA_PATH", ""))
+        if wanted in versions:
+            return wanted
+        return versions[-1] if versions else None
+
+    def path(self, version: str) -> Path:
+        paths = self.paths()
+        if version not in paths:
+            available = ", ".join(self.versions()) or "none"
+            raise FileNotFoundError(f"No UCDP file for version {version!r} (found: {available})")
+        return paths[version]
+
+    def touch(self, version: str | None) -> None:
+        """Mark `version` as in use, evicting the least recently used non-default version if over the cap."""
+        if version is None or version == self.default():
+            return
+        evicted = []
+        with self._lock:
+            self._resident[version] = None
+            self._resident.move_to_end(version)
+            while len(self._resident) > self.max_resident:
+                evicted.append(self._resident.popitem(last=False)[0])
+                self.evictions += 1
+            paths = self._paths or {}
+        for old in evicted:
+            if old in paths:
+                self._store.invalidate(paths[old])
+
+    def resident(self) -> list[str]:
+        """Non-default versions currently allowed in the store, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+
+# Host-wide published frames, when UCDP_SHARED_DIR is set
+SHARED_FRAMES = SharedFrames(root_from_env()) if root_from_env() else None
+
+DATASET_VERSIONS = DatasetVersions(SHARED_STORE, max_resident=int(os.environ.get("UCDP_MAX_VERSIONS", "2")))
+
 
 class UCDP_Data:
-    def __init__(self, filepath: str | os.PathLike | None = None, filename: str = "organizedviolencecy_v25_1.csv"):
-        self.filepath = self._resolve_path(filepath, filename)
-        self.data = self.load_data()
+    def __init__(self, filepath: str | os.PathLike | None = None, filename: str | None = None,
+                 shared: bool = True, columns: list[str] | None = None, compact: bool = False,
+                 version: str | None = None):
+        # An explicit release (e.g. "24.1") comes from the discovered files; otherwise the usual
+        # resolution, defaulting to the default release's file wherever it was found
+        if version is not None:
+            self.filepath = DATASET_VERSIONS.path(version)
+        else:
+            if filepath is None and filename is None:
+                default = DATASET_VERSIONS.default()
+                filepath = DATASET_VERSIONS.path(default) if default else None
+            self.filepath = self._resolve_path(filepath, filename or DEFAULT_FILENAME)
+        self.version = version or DATASET_VERSIONS.version_of(self.filepath)
+        # None loads every column; views pass VIEW_COLUMNS so unused columns never leave disk
+        self.columns = list(columns) if columns is not None else None
+        # Compact mode: categorical labels, smallest unsigned ints, bit-packed *_exist_cy flags
+        self.compact = compact
+        # File-like inputs can't be keyed on disk state, so they are always parsed privately
+        self.shared = shared and isinstance(self.filepath, Path)
+        self._variant = (tuple(self.columns) if self.columns is not None else ()) + (("compact",) if compact else ())
+        self._data = None
+        self._aggregates = None
+        self._filter_index = None
+        self._dyad_index = None
+        # Load now so a missing or broken file fails at construction rather than mid-render
+        self.data
+
+    @classmethod
+    def from_ged(cls, ged_path: str | os.PathLike, chunksize: int = ged.DEFAULT_CHUNKSIZE, **kwargs) -> "UCDP_Data":
+        """Handler over a GED event file, streamed into (and then read from) its country-year CSV."""
+        return cls(filepath=ged.ingest_ged(ged_path, chunksize=chunksize).resolve(), **kwargs)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        # Shared handlers are long-lived (one per tab per process), so they look the frame up in the
+        # store on each access instead of pinning it; a refreshed file is picked up on the next rerun
+        if self.shared:
+            return self._shared(self.load_data, self._variant)
+        if self._data is None:
+            self._data = self.load_data()
+        return self._data
+
+    def _shared(self, loader, variant: tuple):
+        DATASET_VERSIONS.touch(self.version)
+        return SHARED_STORE.get(self.filepath, loader, variant)
 
     def _resolve_path(self, filepath, filename) -> Path | None:
         if filepath is not None and hasattr(filepath, "read"):
@@ -16,6 +418,11 @@ class UCDP_Data:
         if env_path and Path(env_path).exists():
             return Path(env_path)
 
+        # Event-level GED file (UCDP_GED_PATH): aggregated once into a country-year CSV beside it
+        ged_path = ged.configured_path()
+        if ged_path is not None:
+            return ged.ingest_ged(ged_path).resolve()
+
         # If explicit path string/pathlike provided
         if filepath:
             p = Path(filepath)
@@ -56,46 +463,106 @@ class UCDP_Data:
         )
 
     def load_data(self) -> pd.DataFrame:
-        df = pd.read_csv(self.filepath, low_memory=False)
+        # Multi-process hosts (UCDP_SHARED_DIR): map the frame one process published instead of parsing here
+        if SHARED_FRAMES is not None and self.shared:
+            with tracing.span("dataset.attach_shared"):
+                return SHARED_FRAMES.load(self.filepath, self._variant, self._load_local)
+        return self._load_local()
 
-        # Ensure year column exists
-        if "year_cy" not in df.columns:
-            raise KeyError("Missing required column: 'year_cy'")
+    def _load_local(self) -> pd.DataFrame:
+        df = self._load_typed()
+        if self.compact:
+            with tracing.span("dataset.compact"):
+                df = compact_frame(df)
+        # Typed and validated exactly once here; the marker lets per-request code skip re-coercion
+        return CONTRACT.mark(df)
 
-        # Coerce year and optional string columns if present
-        df["year_cy"] = pd.to_numeric(df["year_cy"], errors="coerce").astype("Int64")
-        if "country_cy" in df.columns:
-            df["country_cy"] = df["country_cy"].astype("string")
-        if "region_cy" in df.columns:
-            df["region_cy"] = df["region_cy"].astype("string")
+    def _load_typed(self) -> pd.DataFrame:
+        if not isinstance(self.filepath, Path):
+            return self._select_columns(self.parse_csv())
+
+        # Fast path: memory-map just the requested columns from the typed columnar cache
+        with tracing.span("dataset.read_cache"):
+            df = columnar_cache.read_cached(self.filepath, self.columns)
+        if df is not None:
+            return df
 
-        # Coerce deaths to integers; if missing, create the column filled with 0
-        death_cols = ["sb_total_deaths_best_cy", "ns_total_deaths_best_cy", "os_total_deaths_best_cy"]
-        for col in death_cols:
-            if col not in df.columns:
-                df[col] = 0
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("Int64")
+        # Cold path: parse and type the whole CSV once, then persist it for later loads
+        df = self.parse_csv()
+        columnar_cache.write_cache(self.filepath, df)
+        return self._select_columns(df)
 
+    def _select_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.columns is None:
+            return df
+        return df[[c for c in self.columns if c in df.columns]]
+
+    def parse_csv(self) -> pd.DataFrame:
+        with tracing.span("dataset.parse_csv"):
+            df = CONTRACT.enforce(pd.read_csv(self.filepath, low_memory=False))
+        # ISO-3 per row, resolved once here (and persisted in the columnar cache) for code-based maps
+        if "country_cy" in df.columns:
+            df["iso3_cy"] = countries.iso3_column(df)
+            report = countries.unmatched(df)
+            if not report.empty:
+                names = report["country_cy"].astype(str).tolist()
+                logger.warning("%d countries in %s have no ISO-3 code and are left off maps: %s%s",
+                               len(names), getattr(self.filepath, "name", "upload"), ", ".join(names[:10]),
+                               f" (+{len(names) - 10} more)" if len(names) > 10 else "")
         return df
 
+    def aggregates(self) -> AggregateCube:
+        """Precomputed year x country x violence-type cube; built once per dataset file and shared."""
+        if self.shared:
+            # Build from the store's current frame so the cube and its signature always match
+            return self._shared(
+                lambda: AggregateCube(SHARED_STORE.get(self.filepath, self.load_data, self._variant)),
+                ("aggregates", *self._variant),
+            )
+        if self._aggregates is None:
+            self._aggregates = AggregateCube(self.data)
+        return self._aggregates
+
+    def filter_index(self) -> FilterIndex:
+        """Sorted (year, country) index used by filter_data; built once per dataset file and shared."""
+        if self.shared:
+            return self._shared(
+                lambda: FilterIndex(SHARED_STORE.get(self.filepath, self.load_data, self._variant)),
+                ("filter_index", *self._variant),
+            )
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self.data)
+        return self._filter_index
+
+    def dyad_index(self) -> DyadIndex:
+        """Parsed dyad ids/names -> country-year rows (load with DYAD_VIEW_COLUMNS); built once and shared."""
+        if self.shared:
+            return self._shared(
+                lambda: DyadIndex(SHARED_STORE.get(self.filepath, self.load_data, self._variant)),
+                ("dyad_index", *self._variant),
+            )
+        if self._dyad_index is None:
+            self._dyad_index = DyadIndex(self.data)
+        return self._dyad_index
+
     def get_year_range(self):
-        return int(self.data["year_cy"].min()), int(self.data["year_cy"].max())
+        years = self.data["year_cy"]
+        return int(years.min()), int(years.max())
 
     def get_countries(self):
         return self.data["country_cy"].dropna().unique()
 
     def filter_data(self, year_range, countries=None, region=None):
-        filtered = self.data[
-            (self.data["year_cy"] >= year_range[0]) & (self.data["year_cy"] <= year_range[1])
-        ]
-        if region:
-            filtered = filtered[filtered["region_cy"] == region]
-        if countries:
-            # allow passing a single country as string
-            if isinstance(countries, str):
-                countries = [countries]
-            filtered = filtered[filtered["country_cy"].isin(countries)]
-        return filtered
+        # Binary search + code lookups on the shared index instead of full-column boolean masks.
+        # Positions are re-sorted so rows come back in the dataset's original order.
+        index = self.filter_index()
+        with tracing.span("dataset.filter"):
+            rows = index.query(year_range, countries, region)
+            return index.frame.iloc[np.sort(rows)]
+
+    def filter_positions(self, year_range, countries=None, region=None) -> np.ndarray:
+        """Row positions (into filter_index().frame) matching the filters, in (year, country) order."""
+        return self.filter_index().query(year_range, countries, region)
 
     def get_regions(self):
         """Return sorted unique regions present in the dataset."""
@@ -105,11 +572,12 @@ class UCDP_Data:
         """Return unique countries for a given region."""
         if region is None:
             return self.get_countries()
-        return self.data.loc[self.data["region_cy"] == region, "country_cy"].dropna().unique()
+        df = self.data
+        return df.loc[df["region_cy"] == region, "country_cy"].dropna().unique()
 
     def clean_death_counts(self, df):
-        for col in ["sb_total_deaths_best_cy", "ns_total_deaths_best_cy", "os_total_deaths_best_cy"]:
-            if col not in df.columns:
-                df[col] = 0
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("Int64")
-        return df
+        # Frames derived from load_data carry the contract marker: already typed, nothing to redo
+        if CONTRACT.is_satisfied_by(df):
+            return df
+        # Foreign frames get coerced into a new frame rather than written into a slice of the shared one
+        return df.assign(**{col: CONTRACT.coerce_deaths(df, col) for col in CONTRACT.death_columns})
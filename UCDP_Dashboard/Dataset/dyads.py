@@ -0,0 +1,243 @@
+"""Dyad index over the `*_dyad_ids_cy` / `*_dyad_names_cy` columns, parsed once per dataset.
+
+Each country-year row lists its dyads of each violence type as "; "-separated strings,
+e.g. "726; 732" and "Government of Afghanistan - Hizb-i Wahdat; ...". The two lists are
+not aligned: ids are in numeric order, names in alphabetical order, and a name shared by
+several ids appears once. So ids and names are indexed as separate entities, each with
+CSR offsets back to the rows that list it (`rows = id_rows[id_offsets[k]:id_offsets[k + 1]]`,
+ordered by year). Names are interned in one sorted table. An id's name is pinned down by
+intersecting the name lists of every row that lists the id, then removing names already
+claimed by resolved ids in rows that list one name per id. Ids that always appear
+together with another id keep every name they could have (`id_candidates`).
+
+A token index (lower-cased words -> name codes, also CSR, words sorted) answers name
+searches: every word typed must be the start of some word of the name ("gov afgh").
+"""
+import html
+import re
+
+import numpy as np
+import pandas as pd
+
+DYAD_TYPES = {"sb": "State-based", "ns": "Non-state", "os": "One-sided"}
+DYAD_COLUMNS = [f"{t}_dyad_{part}_cy" for t in DYAD_TYPES for part in ("ids", "names")]
+NO_DYAD = "NO_DYAD"
+SEPARATOR = "; "
+TOKEN = re.compile(r"\w+")
+
+
+class DyadIndex:
+    """Dyad ids and names -> country-year rows, plus a word index over the names."""
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        years = pd.to_numeric(df["year_cy"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        country_codes, countries = pd.factorize(df["country_cy"].astype(object), sort=True)
+        self.years = years.astype(np.int32)
+        self.countries = np.asarray(countries, dtype=object)
+        self.row_country = country_codes.astype(np.int32)
+        # Per-row deaths of each type, so a dyad's country-years can show what happened there
+        self.deaths = {t: pd.to_numeric(df[f"{t}_total_deaths_best_cy"], errors="coerce").fillna(0)
+                       .to_numpy(dtype=np.int64) for t in DYAD_TYPES if f"{t}_total_deaths_best_cy" in df.columns}
+        # Position of every row in (year, country) order; CSR row lists are kept in this order
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((country_codes, years))] = np.arange(n)
+
+        id_parts, name_parts, id_types, name_types = [], [], [], []
+        for type_code, t in enumerate(DYAD_TYPES):
+            if f"{t}_dyad_ids_cy" not in df.columns:
+                continue
+            ids = pd.to_numeric(_split(df[f"{t}_dyad_ids_cy"]), errors="coerce").dropna().astype(np.int64)
+            names = _split(df[f"{t}_dyad_names_cy"].map(_unescape, na_action="ignore")) \
+                if f"{t}_dyad_names_cy" in df.columns else pd.Series([], dtype=object)
+            id_parts.append(ids)
+            name_parts.append(names)
+            id_types.append(np.full(len(ids), type_code, dtype=np.int8))
+            name_types.append(np.full(len(names), type_code, dtype=np.int8))
+
+        id_values = pd.concat(id_parts) if id_parts else pd.Series([], dtype=np.int64)
+        name_values = pd.concat(name_parts) if name_parts else pd.Series([], dtype=object)
+        id_row = id_values.index.to_numpy(dtype=np.int64)
+        name_row = name_values.index.to_numpy(dtype=np.int64)
+        id_entry_type = np.concatenate(id_types) if id_types else np.array([], dtype=np.int8)
+        name_entry_type = np.concatenate(name_types) if name_types else np.array([], dtype=np.int8)
+
+        # ---- ids ----
+        self.ids, id_codes = np.unique(id_values.to_numpy(dtype=np.int64), return_inverse=True)
+        self.id_type = np.zeros(len(self.ids), dtype=np.int8)
+        self.id_type[id_codes] = id_entry_type
+        self.id_offsets, self.id_rows = _csr(id_codes, id_row, rank, len(self.ids))
+
+        # ---- names (interned, sorted) ----
+        name_codes, names = pd.factorize(name_values.to_numpy(dtype=object), sort=True)
+        self.names = np.asarray(names, dtype=object)
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+        self.name_type = np.zeros(len(self.names), dtype=np.int8)
+        self.name_type[name_codes] = name_entry_type
+        self.name_offsets, self.name_rows = _csr(name_codes, name_row, rank, len(self.names))
+
+        # ---- id -> name ----
+        # A row's dyads of one type form one group: (type, row) -> its id codes and name codes
+        self.id_name, self.id_candidate_offsets, self.id_candidates = self._resolve_names(
+            _groups(id_entry_type.astype(np.int64) * n + id_row, id_codes),
+            _groups(name_entry_type.astype(np.int64) * n + name_row, name_codes))
+
+        # ---- words -> names ----
+        token_lists = [sorted(set(TOKEN.findall(name.lower()))) for name in self.names]
+        token_values = np.array([tok for toks in token_lists for tok in toks], dtype=object)
+        token_name = np.repeat(np.arange(len(self.names)), [len(toks) for toks in token_lists])
+        token_codes, tokens = pd.factorize(token_values, sort=True)
+        self.tokens = np.asarray(tokens, dtype=object)
+        self.token_offsets, self.token_names = _csr(token_codes, token_name, None, len(self.tokens))
+
+        for array in (self.ids, self.id_offsets, self.id_rows, self.name_offsets, self.name_rows,
+                      self.token_offsets, self.token_names, self.id_name, self.id_candidates):
+            array.setflags(write=False)
+
+    # ---- lookups ----
+    def id_code(self, dyad_id) -> int | None:
+        """Position of a UCDP dyad id in `ids`, or None if no row lists it."""
+        try:
+            dyad_id = int(dyad_id)
+        except (TypeError, ValueError):
+            return None
+        pos = int(np.searchsorted(self.ids, dyad_id))
+        return pos if pos < len(self.ids) and self.ids[pos] == dyad_id else None
+
+    def name_code(self, name: str) -> int | None:
+        return self._name_index.get(name)
+
+    def rows_for_id(self, code: int) -> np.ndarray:
+        """Row positions (into the indexed frame) that list dyad id `code`, in (year, country) order."""
+        return self.id_rows[self.id_offsets[code]:self.id_offsets[code + 1]]
+
+    def rows_for_name(self, code: int) -> np.ndarray:
+        """Row positions that list dyad name `code`, in (year, country) order."""
+        return self.name_rows[self.name_offsets[code]:self.name_offsets[code + 1]]
+
+    def names_for_id(self, code: int) -> list[str]:
+        """The id's name, or every name it could have when the data cannot tell them apart."""
+        if self.id_name[code] >= 0:
+            return [self.names[self.id_name[code]]]
+        lo, hi = self.id_candidate_offsets[code], self.id_candidate_offsets[code + 1]
+        return self.names[self.id_candidates[lo:hi]].tolist()
+
+    def ids_for_name(self, code: int) -> np.ndarray:
+        """UCDP dyad ids that are (or may be) called `names[code]`."""
+        resolved = np.flatnonzero(self.id_name == code)
+        positions = np.flatnonzero(self.id_candidates == code)
+        ambiguous = np.searchsorted(self.id_candidate_offsets, positions, side="right") - 1
+        return self.ids[np.union1d(resolved, ambiguous)]
+
+    def type_of_name(self, code: int) -> str:
+        return list(DYAD_TYPES)[self.name_type[code]]
+
+    def id_matches(self, dyad_id, dyad_type: str | None = None) -> np.ndarray:
+        """Name codes of a UCDP dyad id (see `names_for_id`), optionally of one dyad type; empty if unknown."""
+        code = self.id_code(dyad_id)
+        names = [] if code is None else self.names_for_id(code)
+        return self._of_type(np.array([self._name_index[n] for n in names], dtype=np.int64), dyad_type)
+
+    def search(self, text: str, dyad_type: str | None = None, limit: int | None = 50) -> np.ndarray:
+        """Name codes with a word starting with each word of `text` (all names for empty text),
+        optionally of one dyad type, most country-years first."""
+        words = TOKEN.findall(text.lower())
+        matches = np.arange(len(self.names)) if not words else None
+        for word in words:
+            # Tokens are sorted, so every token starting with `word` is one contiguous range
+            lo = int(np.searchsorted(self.tokens, word))
+            hi = int(np.searchsorted(self.tokens, word + "\U0010ffff"))
+            found = np.unique(self.token_names[self.token_offsets[lo]:self.token_offsets[hi]])
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+            if not len(matches):
+                break
+        matches = self._of_type(matches, dyad_type)
+        counts = self.name_offsets[matches + 1] - self.name_offsets[matches]
+        order = np.lexsort((matches, -counts))
+        return matches[order][:limit]
+
+    def country_years(self, rows: np.ndarray, dyad_type: str | None = None) -> pd.DataFrame:
+        """[year_cy, country_cy(, deaths)] for row positions; deaths are the row's totals of `dyad_type`."""
+        out = {"year_cy": self.years[rows], "country_cy": self.countries[self.row_country[rows]]}
+        if dyad_type in self.deaths:
+            out[f"{dyad_type}_total_deaths_best_cy"] = self.deaths[dyad_type][rows]
+        return pd.DataFrame(out)
+
+    def stats(self) -> dict:
+        resolved = int((self.id_name >= 0).sum())
+        return {"rows": len(self.years), "ids": len(self.ids), "names": len(self.names), "tokens": len(self.tokens),
+                "ids_named": resolved, "ids_ambiguous": len(self.ids) - resolved,
+                "bytes": sum(a.nbytes for a in (self.ids, self.id_offsets, self.id_rows, self.name_offsets,
+                                                self.name_rows, self.token_offsets, self.token_names))}
+
+    # ---- internals ----
+    def _of_type(self, matches: np.ndarray, dyad_type: str | None) -> np.ndarray:
+        if dyad_type is None:
+            return matches
+        return matches[self.name_type[matches] == list(DYAD_TYPES).index(dyad_type)]
+
+    def _resolve_names(self, id_groups: dict, name_groups: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        candidates: dict[int, set] = {}
+        rows = []
+        for group, codes in id_groups.items():
+            row_names = set(name_groups.get(group, ()))
+            rows.append((codes, row_names))
+            for code in codes:
+                candidates[code] = candidates[code] & row_names if code in candidates else set(row_names)
+
+        # Where a row has one name per id, a name settled for one id is not another's
+        changed = True
+        while changed:
+            changed = False
+            for codes, row_names in rows:
+                if len(codes) != len(row_names):
+                    continue
+                settled = {next(iter(candidates[c])) for c in codes if len(candidates[c]) == 1}
+                for c in codes:
+                    if len(candidates[c]) > 1 and candidates[c] - settled and candidates[c] & settled:
+                        candidates[c] -= settled
+                        changed = True
+
+        id_name = np.full(len(self.ids), -1, dtype=np.int64)
+        lists = [[] for _ in range(len(self.ids))]
+        for code, names in candidates.items():
+            if len(names) == 1:
+                id_name[code] = next(iter(names))
+            else:
+                lists[code] = sorted(names)
+        offsets = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in lists], out=offsets[1:])
+        flat = np.array([c for x in lists for c in x], dtype=np.int64)
+        return id_name, offsets, flat
+
+
+def _split(column: pd.Series) -> pd.Series:
+    """One entry per listed dyad, indexed by row position; NO_DYAD and blanks dropped."""
+    column = column.reset_index(drop=True)
+    listed = column[column.notna() & (column.astype(str) != NO_DYAD)].astype(str)
+    parts = listed.str.split(SEPARATOR).explode().str.strip()
+    return parts[parts != ""]
+
+
+def _groups(keys: np.ndarray, values: np.ndarray) -> dict[int, list[int]]:
+    """key -> list of its values, for integer arrays of equal length."""
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    return dict(zip(keys[starts].tolist(), (part.tolist() for part in np.split(values, starts[1:]))))
+
+
+def _unescape(names: str) -> str:
+    # Names carry HTML entities ("&amp;"), whose ";" would otherwise split a name in two
+    return html.unescape(names) if "&" in names else names
+
+
+def _csr(codes: np.ndarray, values: np.ndarray, order_key: np.ndarray | None, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """(offsets, values grouped by code): values of code k are out[offsets[k]:offsets[k + 1]],
+    ordered by order_key[value] (or by value)."""
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    order = np.lexsort((order_key[values] if order_key is not None else values, codes))
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n), out=offsets[1:])
+    return offsets, values[order].astype(np.int32)
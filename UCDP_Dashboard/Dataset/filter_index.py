@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Sorted positional index over a country-year (or event) frame.
+
+    Rows are ordered once by (year, country) and the index keeps integer codes for
+    country and region plus CSR-style offsets into that ordering per country and per
+    region. A query is then a binary search on year and a few integer-code lookups, so
+    its cost follows the size of the result rather than the number of rows.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.frame = df
+        n = len(df)
+        year = df["year_cy"]
+        valid = year.notna().to_numpy()
+        years = year.to_numpy(dtype="float64", na_value=np.nan)
+        years = np.where(valid, years, 0).astype(np.int64)
+
+        country_codes, countries = pd.factorize(df["country_cy"], sort=True)
+        self._country_index = {c: i for i, c in enumerate(countries)}
+        if "region_cy" in df.columns:
+            region_codes, regions = pd.factorize(df["region_cy"], sort=True)
+        else:
+            region_codes, regions = np.full(n, -1, dtype=np.intp), []
+        self._region_index = {r: i for i, r in enumerate(regions)}
+        self.region_codes = region_codes
+
+        # Rows without a year never match a year-range filter, so they are left out entirely
+        positions = np.flatnonzero(valid)
+        self.order = positions[np.lexsort((country_codes[positions], years[positions]))]
+        self.sorted_years = years[self.order]
+        # rank[p] = place of row p in the (year, country) ordering, used to restore that order
+        self.rank = np.full(n, -1, dtype=np.int64)
+        self.rank[self.order] = np.arange(len(self.order))
+
+        self.country_rows, self.country_offsets = _group(self.order, country_codes, len(countries))
+        self.country_years = years[self.country_rows]
+        self.region_rows, self.region_offsets = _group(self.order, region_codes, len(regions))
+        self.region_years = years[self.region_rows]
+
+    def year_rows(self, year_range) -> np.ndarray:
+        """Positions of every row in the year range, as a view into the sorted ordering."""
+        lo = np.searchsorted(self.sorted_years, year_range[0], side="left")
+        hi = np.searchsorted(self.sorted_years, year_range[1], side="right")
+        return self.order[lo:hi]
+
+    def query(self, year_range, countries=None, region=None) -> np.ndarray:
+        """Row positions matching UCDP_Data.filter_data's rules, in (year, country) order."""
+        if countries:
+            if isinstance(countries, str):
+                countries = [countries]
+            codes = sorted({self._country_index[c] for c in countries if c in self._country_index})
+            rows = _range_lookup(self.country_rows, self.country_offsets, self.country_years, codes, year_range)
+            if region:
+                rcode = self._region_index.get(region, -2)
+                rows = rows[self.region_codes[rows] == rcode]
+            return rows[np.argsort(self.rank[rows], kind="stable")]
+        if region:
+            rcode = self._region_index.get(region)
+            if rcode is None:
+                return self.order[:0]
+            # Region groups are already in (year, country) order, so no re-sort is needed
+            return _range_lookup(self.region_rows, self.region_offsets, self.region_years, [rcode], year_range)
+        return self.year_rows(year_range)
+
+
+def _group(order: np.ndarray, codes: np.ndarray, n_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    """Regroup `order` by code (stable, so each group keeps the year ordering) and return CSR offsets."""
+    grouped = order[np.argsort(codes[order], kind="stable")]
+    grouped_codes = codes[grouped]
+    grouped = grouped[grouped_codes >= 0]
+    offsets = np.searchsorted(grouped_codes[grouped_codes >= 0], np.arange(n_groups + 1), side="left")
+    return grouped, offsets
+
+
+def _range_lookup(rows, offsets, years, codes, year_range) -> np.ndarray:
+    chunks = []
+    for code in codes:
+        start, stop = offsets[code], offsets[code + 1]
+        group_years = years[start:stop]
+        lo = start + np.searchsorted(group_years, year_range[0], side="left")
+        hi = start + np.searchsorted(group_years, year_range[1], side="right")
+        if hi > lo:
+            chunks.append(rows[lo:hi])
+    if not chunks:
+        return rows[:0]
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
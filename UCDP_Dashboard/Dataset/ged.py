@@ -0,0 +1,155 @@
+"""Streaming ingestion of the event-level UCDP GED file into the country-year shape.
+
+The GED event CSV (GEDEvent_v25_1.csv: one row per event, hundreds of thousands of rows,
+~50 mostly-text columns) is read in chunks of `chunksize` rows with only the six columns
+needed. Each chunk is reduced to per (country, year, type of violence) death sums and
+folded into a running total, so peak memory is set by the chunk size and the number of
+country-years, not by the file. The result is written once as a country-year CSV with the
+columns the tabs read, and re-used until the event file changes.
+
+Point the dashboard at it with UCDP_GED_PATH=/path/to/GEDEvent_v25_1.csv, or run
+    python -m Dataset.ged /path/to/GEDEvent_v25_1.csv [--out ged_cy.csv] [--chunksize 100000]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from Instrumentation import tracing
+
+GED_COLUMNS = ["country_id", "country", "region", "year", "type_of_violence", "best"]
+DEFAULT_CHUNKSIZE = 100_000
+
+# GED type_of_violence code -> country-year death column
+VIOLENCE_TYPE_COLUMNS = {
+    1: "sb_total_deaths_best_cy",
+    2: "ns_total_deaths_best_cy",
+    3: "os_total_deaths_best_cy",
+}
+EXIST_COLUMNS = {1: "sb_exist_cy", 2: "ns_exist_cy", 3: "os_exist_cy"}
+
+_lock = threading.Lock()
+
+
+def configured_path() -> Path | None:
+    """The event file named by UCDP_GED_PATH, if it is set and exists."""
+    env_path = os.environ.get("UCDP_GED_PATH")
+    return Path(env_path) if env_path and Path(env_path).exists() else None
+
+
+def output_path_for(ged_path: Path) -> Path:
+    """Country-year file written next to the events, e.g. GEDEvent_v25_1_cy.csv."""
+    return Path(ged_path).with_name(Path(ged_path).stem + "_cy.csv")
+
+
+def _source_signature(ged_path: Path) -> dict:
+    st = Path(ged_path).stat()
+    return {"source": str(Path(ged_path).resolve()), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _sidecar(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".source.json")
+
+
+def is_current(ged_path: Path, out_path: Path) -> bool:
+    """True if `out_path` was built from the event file as it is now."""
+    try:
+        recorded = json.loads(_sidecar(out_path).read_text())
+    except (OSError, ValueError):
+        return False
+    return out_path.exists() and recorded == _source_signature(ged_path)
+
+
+def ingest_ged(ged_path: str | os.PathLike, out_path: str | os.PathLike | None = None,
+               chunksize: int = DEFAULT_CHUNKSIZE, force: bool = False) -> Path:
+    """Aggregate the GED event file into a country-year CSV (persisted), returning its path.
+
+    Skips the work when the output is already current for this version of the event file.
+    """
+    ged_path = Path(ged_path)
+    out_path = Path(out_path) if out_path is not None else output_path_for(ged_path)
+    with _lock:
+        if not force and is_current(ged_path, out_path):
+            return out_path
+        signature = _source_signature(ged_path)
+        with tracing.span("dataset.ingest_ged", chunksize=chunksize):
+            country_year = aggregate_events(ged_path, chunksize)
+
+        # Write beside the target and rename, so readers never see a partial file
+        tmp = out_path.with_name(out_path.name + f".{os.getpid()}.tmp")
+        country_year.to_csv(tmp, index=False)
+        os.replace(tmp, out_path)
+        _sidecar(out_path).write_text(json.dumps(signature))
+    return out_path
+
+
+def aggregate_events(ged_path: str | os.PathLike, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Country-year frame (one row per country-year with at least one event) built chunk by chunk."""
+    totals = None
+    labels = {}
+    reader = pd.read_csv(
+        ged_path,
+        usecols=GED_COLUMNS,
+        # Numeric ids as float64: the C parser handles them natively (nullable ints go through to_numeric)
+        dtype={"country_id": "float64", "year": "float64", "type_of_violence": "float64", "best": "float64"},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk = chunk.dropna(subset=["country_id", "year", "type_of_violence"])
+        part = chunk.groupby(["country_id", "year", "type_of_violence"])["best"].agg(["sum", "size"])
+        totals = part if totals is None else totals.add(part, fill_value=0)
+
+        # First name/region seen per country id (GED repeats them on every event)
+        new = chunk.drop_duplicates("country_id")
+        for cid, country, region in zip(new["country_id"], new["country"], new["region"]):
+            labels.setdefault(int(cid), (country, region))
+
+    return _country_year_frame(totals, labels)
+
+
+def _country_year_frame(totals: pd.DataFrame | None, labels: dict) -> pd.DataFrame:
+    columns = ["country_id_cy", "country_cy", "year_cy", "region_cy",
+               *VIOLENCE_TYPE_COLUMNS.values(), "cumulative_total_deaths_in_orgvio_best_cy", *EXIST_COLUMNS.values()]
+    if totals is None or totals.empty:
+        return pd.DataFrame(columns=columns)
+
+    deaths = totals["sum"].unstack("type_of_violence", fill_value=0)
+    events = totals["size"].unstack("type_of_violence", fill_value=0)
+    out = pd.DataFrame(index=deaths.index)
+    for code, col in VIOLENCE_TYPE_COLUMNS.items():
+        out[col] = deaths[code].round().astype("int64") if code in deaths.columns else 0
+    out["cumulative_total_deaths_in_orgvio_best_cy"] = out[list(VIOLENCE_TYPE_COLUMNS.values())].sum(axis=1)
+    for code, col in EXIST_COLUMNS.items():
+        out[col] = (events[code] > 0).astype("int64") if code in events.columns else 0
+
+    out = out.reset_index().rename(columns={"country_id": "country_id_cy", "year": "year_cy"})
+    out = out.astype({"country_id_cy": "int64", "year_cy": "int64"})
+    out["country_cy"] = out["country_id_cy"].map(lambda cid: labels[int(cid)][0])
+    out["region_cy"] = out["country_id_cy"].map(lambda cid: labels[int(cid)][1])
+    return out[columns].sort_values(["country_cy", "year_cy"], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate the UCDP GED event file into country-year rows.")
+    parser.add_argument("ged_path", type=Path)
+    parser.add_argument("--out", type=Path, help="output CSV (default: <events>_cy.csv next to the input)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the output is current")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = ingest_ged(args.ged_path, args.out, args.chunksize, args.force)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = sum(1 for _ in open(out)) - 1
+    print(f"{out}: {rows:,} country-years in {time.perf_counter() - start:.1f}s, "
+          f"peak traced memory {peak / 2**20:.1f} MiB (chunksize {args.chunksize:,})")
+
+
+if __name__ == "__main__":
+    main()
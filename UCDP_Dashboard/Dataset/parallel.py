@@ -0,0 +1,106 @@
+"""Row-parallel grid sums for building aggregates over large frames.
+
+`grid_sums` adds each row's values into a dense (column x cell) grid, where a cell is a
+flat (year, country) position. Small inputs are summed in one pass on the calling thread.
+Inputs of at least `min_rows` rows are cut into contiguous row blocks, and each worker
+sums its block into its own partial grid. The partial grids are then added together.
+numpy releases the GIL inside `np.add.at`, so a thread pool uses every core without
+copying the rows. A process pool is available for hosts where it does better.
+
+Configuration (environment):
+    UCDP_AGG_WORKERS    workers for large inputs (default: CPU count; 1 always runs serially)
+    UCDP_AGG_POOL       "thread" (default) or "process"; anything else falls back to "thread"
+    UCDP_AGG_MIN_ROWS   smallest input that is split across workers (default 200000)
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+POOLS = ("thread", "process")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(int(os.environ.get(name, default)), 1)
+    except ValueError:
+        return default
+
+
+def _env_pool(name: str, default: str = "thread") -> str:
+    pool = (os.environ.get(name) or default).strip().lower()
+    if pool not in POOLS:
+        logger.warning("Ignoring %s=%r (expected %s); using %r", name, os.environ[name], " or ".join(POOLS), default)
+        return default
+    return pool
+
+
+class AggregationExecutor:
+    """Sums rows into a dense grid, serially or in parallel row blocks depending on input size."""
+
+    def __init__(self, workers: int | None = None, min_rows: int = 200_000, pool: str = "thread"):
+        if pool not in POOLS:
+            raise ValueError(f"pool must be 'thread' or 'process', not {pool!r}")
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self.pool = pool
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self.serial_runs = 0
+        self.parallel_runs = 0
+
+    def grid_sums(self, cells: np.ndarray, values: np.ndarray, n_cells: int) -> np.ndarray:
+        """(k, n_cells) int64 sums of `values` (k x n rows) grouped by each row's flat cell index."""
+        values = np.atleast_2d(values)
+        blocks = self._blocks(len(cells))
+        if len(blocks) == 1:
+            self.serial_runs += 1
+            return _block_sums(cells, values, n_cells)
+
+        self.parallel_runs += 1
+        executor = self._get_executor()
+        partials = executor.map(_block_sums, [cells[lo:hi] for lo, hi in blocks],
+                                [values[:, lo:hi] for lo, hi in blocks], [n_cells] * len(blocks))
+        total = None
+        for partial in partials:
+            total = partial if total is None else np.add(total, partial, out=total)
+        return total
+
+    def _blocks(self, n_rows: int) -> list[tuple[int, int]]:
+        workers = min(self.workers, n_rows // self.min_rows) if self.min_rows else self.workers
+        if workers <= 1:
+            return [(0, n_rows)]
+        bounds = np.linspace(0, n_rows, workers + 1).astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                cls = ThreadPoolExecutor if self.pool == "thread" else ProcessPoolExecutor
+                self._executor = cls(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _block_sums(cells: np.ndarray, values: np.ndarray, n_cells: int) -> np.ndarray:
+    # Module-level so process pools can pickle it
+    out = np.zeros((values.shape[0], n_cells), dtype=np.int64)
+    for i in range(values.shape[0]):
+        np.add.at(out[i], cells, values[i])
+    return out
+
+
+EXECUTOR = AggregationExecutor(
+    workers=_env_int("UCDP_AGG_WORKERS", os.cpu_count() or 1),
+    min_rows=_env_int("UCDP_AGG_MIN_ROWS", 200_000),
+    pool=_env_pool("UCDP_AGG_POOL"),
+)
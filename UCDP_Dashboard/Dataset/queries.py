@@ -0,0 +1,261 @@
+"""Dashboard aggregates as plain queries, answered from the aggregate cube without Streamlit.
+
+A query is a JSON-style dict; every key is optional:
+
+    {"version": "24.1",               # release (default: the dashboard's dataset)
+     "years": [1989, 2024],           # inclusive range (default: every year)
+     "countries": ["Syria", "Iraq"],  # default: all
+     "region": "Middle East",         # a name; for region groupings also a list of names
+     "violence": ["sb", "os"],        # sb / ns / os / all, or full column names (default: all)
+     "group_by": "year",              # see GROUPINGS
+     "top": 10}                       # country/region groupings: only the N largest totals
+
+`group_by` picks the cube query the tabs use for the same view: "year" is Trends'
+deaths-per-year line, "year_country" the animated and map frames, "country"/"region"
+the Regional Analysis totals ("top" ranks them through the cube's RankingService).
+Answers are {"columns": [...], "rows": [[...], ...]} with plain Python values.
+
+`QueryService` answers batches of queries against the shared dataset handlers and keeps
+recent answers in an LRU per cube, shared by every caller. The LRUs are keyed weakly on
+their cube, so a reloaded dataset (a new cube) is never answered from the old one, and the
+old answers are freed together with the old cube.
+"""
+from collections import OrderedDict
+import logging
+import threading
+import weakref
+
+import pandas as pd
+
+from Dataset.aggregates import VIOLENCE_COLUMNS
+from Dataset.dataset import DATASET_VERSIONS, UCDP_Data, VIEW_COLUMNS
+
+VIOLENCE_ALIASES = {
+    "sb": "sb_total_deaths_best_cy",
+    "ns": "ns_total_deaths_best_cy",
+    "os": "os_total_deaths_best_cy",
+    "all": "cumulative_total_deaths_in_orgvio_best_cy",
+}
+GROUPINGS = ("year", "country", "region", "year_country", "year_region", "total")
+QUERY_KEYS = {"version", "years", "countries", "region", "violence", "group_by", "top"}
+MAX_BATCH = 500
+
+logger = logging.getLogger(__name__)
+
+
+class QueryError(ValueError):
+    """A query that cannot be answered as written (unknown key, grouping, column, ...)."""
+
+
+def normalize(query: dict) -> tuple:
+    """Validated, hashable form of `query`: (version, years, countries, region, columns, group_by, top)."""
+    if not isinstance(query, dict):
+        raise QueryError("a query must be a JSON object")
+    unknown = set(query) - QUERY_KEYS
+    if unknown:
+        raise QueryError(f"unknown query keys: {', '.join(sorted(unknown))}")
+
+    version = query.get("version")
+    if version is not None and not isinstance(version, str):
+        raise QueryError("version must be a string such as \"24.1\"")
+
+    years = query.get("years")
+    if years is not None:
+        if not isinstance(years, (list, tuple)) or len(years) != 2:
+            raise QueryError("years must be [first, last]")
+        try:
+            years = (int(years[0]), int(years[1]))
+        except (TypeError, ValueError):
+            raise QueryError("years must be integers") from None
+        if years[0] > years[1]:
+            raise QueryError("years must be [first, last] with first <= last")
+
+    group_by = query.get("group_by", "year")
+    if group_by not in GROUPINGS:
+        raise QueryError(f"group_by must be one of {', '.join(GROUPINGS)}")
+
+    countries = _names(query.get("countries"), "countries")
+    region = query.get("region")
+    if group_by in ("region", "year_region"):
+        if countries:
+            raise QueryError(f"countries cannot be combined with group_by={group_by}; filter by region instead")
+        region = _names(region, "region")
+    elif region is not None and not isinstance(region, str):
+        raise QueryError(f"region must be a single name with group_by={group_by}")
+
+    violence = query.get("violence", "all")
+    violence = [violence] if isinstance(violence, str) else violence
+    if not violence or not isinstance(violence, (list, tuple)):
+        raise QueryError("violence must be a name or a non-empty list of names")
+    columns = []
+    for name in violence:
+        if not isinstance(name, str):
+            raise QueryError("violence must be a name or a non-empty list of names")
+        column = VIOLENCE_ALIASES.get(name, name)
+        if column not in VIOLENCE_COLUMNS:
+            raise QueryError(f"unknown violence type {name!r} (use {', '.join(VIOLENCE_ALIASES)} or a column name)")
+        if column not in columns:
+            columns.append(column)
+
+    top = query.get("top")
+    if top is not None:
+        if group_by not in ("country", "region"):
+            raise QueryError("top needs group_by=country or group_by=region")
+        if isinstance(top, bool) or not isinstance(top, int) or top < 0:
+            raise QueryError("top must be a non-negative integer")
+
+    return version, years, countries, region or None, tuple(columns), group_by, top
+
+
+def run_query(cube, key: tuple) -> dict:
+    """Answer a normalized query from `cube`."""
+    _, years, countries, region, columns, group_by, top = key
+    if years is None:
+        years = (int(cube.years[0]), int(cube.years[-1])) if len(cube.years) else (0, -1)
+    countries = list(countries) or None
+    missing = [c for c in columns if c not in cube.columns]
+    if missing:
+        raise QueryError(f"this dataset has no {', '.join(missing)} column")
+
+    if group_by == "year":
+        frames = [cube.deaths_per_year(c, years, countries, region).set_index("year_cy") for c in columns]
+        df = pd.concat(frames, axis=1).reset_index()
+    elif group_by == "year_country":
+        df = cube.per_year_by_country(list(columns), years, countries, region)
+    elif group_by == "country":
+        if top is not None:
+            codes = cube.rankings.top_country_codes(columns, years, top, countries, region)
+            df = cube.totals_by_country(list(columns), years, list(cube.countries[codes])).loc[cube.countries[codes]]
+        else:
+            df = cube.totals_by_country(list(columns), years, countries, region)
+        df = df.reset_index()
+    elif group_by == "total":
+        totals = cube.totals_by_country(list(columns), years, countries, region).sum()
+        df = pd.DataFrame([totals.to_numpy()], columns=list(columns))
+    else:
+        regions = list(region) if region else [r for r in cube.regions if r]
+        if top is not None:
+            regions = list(cube.regions[cube.rankings.top_region_codes(columns, years, top, regions)])
+        if group_by == "region":
+            df = pd.concat([cube.totals_by_region(c, years, regions) for c in columns], axis=1)
+            df = df.reindex([r for r in regions if r in df.index]) if top is not None else df
+            df = df.reset_index()
+        else:
+            frames = [cube.per_year_by_region(c, years, regions).set_index(["year_cy", "region_cy"]) for c in columns]
+            df = pd.concat(frames, axis=1).reset_index()
+    return {"columns": list(df.columns), "rows": [list(row) for row in zip(*(df[c].tolist() for c in df.columns))]}
+
+
+class QueryService:
+    """Batched queries over the shared dataset handlers, with LRUs of answers shared by all callers.
+
+    `maxsize` answers are kept per cube, i.e. per loaded release.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._handlers: dict[str | None, UCDP_Data] = {}
+        # cube -> {key: answer}, least recently used first
+        self._cache: weakref.WeakKeyDictionary[object, OrderedDict[tuple, dict]] = weakref.WeakKeyDictionary()
+        self.queries = 0
+        self.batches = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def handler(self, version: str | None) -> UCDP_Data:
+        """Shared handler for a release (None = the dashboard's dataset), created on first use."""
+        with self._lock:
+            handler = self._handlers.get(version)
+        if handler is None:
+            try:
+                handler = UCDP_Data(version=version, columns=VIEW_COLUMNS, compact=True)
+            except FileNotFoundError as exc:
+                raise QueryError(str(exc)) from None
+            with self._lock:
+                handler = self._handlers.setdefault(version, handler)
+        return handler
+
+    def run(self, query: dict) -> dict:
+        """Answer one query; raises QueryError if it is invalid."""
+        answer, _ = self._answer(normalize(query))
+        return answer
+
+    def run_batch(self, queries: list) -> list[dict]:
+        """Answer every query in order; each result is an answer plus "cached", or {"error": ...}.
+
+        Identical queries in one batch are computed once, and a bad query fails only itself.
+        """
+        if len(queries) > MAX_BATCH:
+            raise QueryError(f"at most {MAX_BATCH} queries per batch")
+        with self._lock:
+            self.batches += 1
+        done: dict[tuple, dict] = {}
+        results = []
+        for query in queries:
+            try:
+                key = normalize(query)
+                if key not in done:
+                    answer, cached = self._answer(key)
+                    done[key] = {**answer, "cached": cached}
+                results.append(done[key])
+            except QueryError as exc:
+                with self._lock:
+                    self.errors += 1
+                results.append({"error": str(exc)})
+            except Exception:
+                logger.exception("Query failed: %s", query)
+                with self._lock:
+                    self.errors += 1
+                results.append({"error": "internal error"})
+        return results
+
+    def meta(self, version: str | None = None) -> dict:
+        """What can be queried: releases, the year span, regions, countries and violence types."""
+        cube = self.handler(version).aggregates()
+        return {
+            "versions": DATASET_VERSIONS.versions(),
+            "default_version": DATASET_VERSIONS.default(),
+            "years": [int(cube.years[0]), int(cube.years[-1])] if len(cube.years) else None,
+            "regions": [r for r in cube.regions.tolist() if r],
+            "countries": cube.countries.tolist(),
+            "violence": {alias: column for alias, column in VIOLENCE_ALIASES.items() if column in cube.columns},
+            "groupings": list(GROUPINGS),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queries": self.queries, "batches": self.batches, "hits": self.hits, "misses": self.misses,
+                    "errors": self.errors, "cached": sum(len(a) for a in list(self._cache.values())),
+                    "maxsize": self.maxsize}
+
+    # ---- internals ----
+    def _answer(self, key: tuple) -> tuple[dict, bool]:
+        cube = self.handler(key[0]).aggregates()
+        with self._lock:
+            self.queries += 1
+            answers = self._cache.setdefault(cube, OrderedDict())
+            answer = answers.get(key)
+            if answer is not None:
+                answers.move_to_end(key)
+                self.hits += 1
+                return answer, True
+            self.misses += 1
+        answer = run_query(cube, key)
+        with self._lock:
+            answers[key] = answer
+            answers.move_to_end(key)
+            while len(answers) > self.maxsize:
+                answers.popitem(last=False)
+        return answer, False
+
+
+def _names(names, field: str) -> tuple:
+    if not names:
+        return ()
+    if isinstance(names, str):
+        return (names,)
+    if not isinstance(names, (list, tuple)) or not all(isinstance(n, str) for n in names):
+        raise QueryError(f"{field} must be a name or a list of names")
+    return tuple(sorted(set(names)))
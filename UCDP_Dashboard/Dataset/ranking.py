@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class RankingService:
+    """Top-N countries or regions by total deaths over a year range, for one AggregateCube.
+
+    Range totals come from the cube's per-year prefix sums (two rows per column, whatever
+    the range), the N largest are picked by partial selection rather than a full sort, and
+    the last `maxsize` answers are kept, so a repeated query is a dict lookup. Ties keep
+    the alphabetically earlier name, like Series.nlargest(keep="first").
+    Every cube owns one service (`cube.rankings`), so a reloaded dataset starts a fresh cache.
+    """
+
+    def __init__(self, cube, maxsize: int = 256):
+        self.cube = cube
+        self.maxsize = maxsize
+        self._cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---- queries ----
+    def top_country_codes(self, columns, year_range, n: int, countries=None, region=None) -> np.ndarray:
+        """Cube positions of the top-n countries, largest total first (read-only array)."""
+        columns = _columns(columns)
+        key = ("country", columns, *_years(year_range), int(n), _names(countries), region or None)
+        return self._cached(key, lambda: self._rank_countries(columns, year_range, n, countries, region))
+
+    def top_region_codes(self, columns, year_range, n: int, regions=None) -> np.ndarray:
+        """Cube positions of the top-n regions (all regions when `regions` is empty), largest first."""
+        columns = _columns(columns)
+        key = ("region", columns, *_years(year_range), int(n), _names(regions))
+        return self._cached(key, lambda: self._rank_regions(columns, year_range, n, regions))
+
+    def top_countries(self, columns, year_range, n: int, countries=None, region=None) -> pd.Series:
+        """Range totals of the top-n countries (index country_cy), largest first."""
+        codes = self.top_country_codes(columns, year_range, n, countries, region)
+        totals = _range_totals(self.cube.prefix, self.cube, _columns(columns), year_range, codes)
+        return pd.Series(totals, index=pd.Index(self.cube.countries[codes], name="country_cy"),
+                         name=_series_name(columns))
+
+    def top_regions(self, columns, year_range, n: int, regions=None) -> pd.Series:
+        """Range totals of the top-n regions (index region_cy), largest first."""
+        codes = self.top_region_codes(columns, year_range, n, regions)
+        totals = _range_totals(self.cube.region_prefix, self.cube, _columns(columns), year_range, codes)
+        return pd.Series(totals, index=pd.Index(self.cube.regions[codes], name="region_cy"),
+                         name=_series_name(columns))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+    # ---- internals ----
+    def _cached(self, key: tuple, compute) -> np.ndarray:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        codes = compute()
+        codes.setflags(write=False)
+        with self._lock:
+            self._cache[key] = codes
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return codes
+
+    def _rank_countries(self, columns, year_range, n, countries, region) -> np.ndarray:
+        cube = self.cube
+        ys = cube.year_slice(year_range)
+        codes = cube.country_codes(countries or None, region)
+        # Only countries with rows in the range are ranked, as in a groupby over the filtered rows
+        codes = codes[cube.present[ys][:, codes].any(axis=0)]
+        return codes[top_n(_range_totals(cube.prefix, cube, columns, year_range, codes), n)]
+
+    def _rank_regions(self, columns, year_range, n, regions) -> np.ndarray:
+        cube = self.cube
+        ys = cube.year_slice(year_range)
+        codes = cube.region_codes(regions) if regions else np.arange(len(cube.regions))
+        codes = codes[cube.region_present[ys][:, codes].any(axis=0)]
+        return codes[top_n(_range_totals(cube.region_prefix, cube, columns, year_range, codes), n)]
+
+
+def top_n(totals: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n largest totals, largest first; ties keep the earlier position.
+
+    Matches Series.nlargest(n, keep="first") without sorting every entry: O(len + n log n).
+    """
+    n = min(n, len(totals))
+    if n <= 0:
+        return np.array([], dtype=np.int64)
+    if n < len(totals):
+        kth = np.partition(totals, len(totals) - n)[len(totals) - n]
+        above = np.flatnonzero(totals > kth)
+        ties = np.flatnonzero(totals == kth)[: n - len(above)]
+        picked = np.concatenate([above, ties])
+    else:
+        picked = np.arange(len(totals))
+    return picked[np.lexsort((picked, -totals[picked]))]
+
+
+def _range_totals(prefix: np.ndarray, cube, columns: tuple, year_range, codes: np.ndarray) -> np.ndarray:
+    ys = cube.year_slice(year_range)
+    cols = [cube.columns.index(c) for c in columns]
+    return (prefix[cols, ys.stop][:, codes] - prefix[cols, ys.start][:, codes]).sum(axis=0)
+
+
+def _columns(columns) -> tuple:
+    return (columns,) if isinstance(columns, str) else tuple(columns)
+
+
+def _series_name(columns) -> str:
+    return columns if isinstance(columns, str) else "total"
+
+
+def _years(year_range) -> tuple[int, int]:
+    return int(year_range[0]), int(year_range[1])
+
+
+def _names(names) -> tuple:
+    if not names:
+        return ()
+    return (names,) if isinstance(names, str) else tuple(sorted(names))
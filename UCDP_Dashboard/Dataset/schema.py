@@ -0,0 +1,71 @@
+import pandas as pd
+
+DEATH_COLUMNS = [
+    "sb_total_deaths_best_cy",
+    "ns_total_deaths_best_cy",
+    "os_total_deaths_best_cy",
+    "cumulative_total_deaths_in_orgvio_best_cy",
+]
+STRING_COLUMNS = ["country_cy", "region_cy"]
+MARKER_ATTR = "ucdp_contract"
+
+
+class DataContract:
+    """Typing rules every dataset frame satisfies once it has been loaded.
+
+    `enforce` applies the rules (once, at load time) and `mark` records that in
+    `DataFrame.attrs`, which pandas carries over to slices and row selections. Per-request
+    code checks `is_satisfied_by` and skips re-coercion when the marker is present.
+
+    Death columns are integers without missing values: nullable Int64 as `enforce` leaves
+    them, or the narrower numpy ints compact mode downcasts them to. The marker records the
+    dtype each column had when it was marked, and only vouches for a frame whose columns
+    still have exactly those dtypes.
+    """
+
+    def __init__(self, version: int, death_columns: list[str], string_columns: list[str]):
+        self.version = version
+        self.death_columns = list(death_columns)
+        self.string_columns = list(string_columns)
+
+    def enforce(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Ensure year column exists
+        if "year_cy" not in df.columns:
+            raise KeyError("Missing required column: 'year_cy'")
+
+        # Coerce year and optional string columns if present
+        df["year_cy"] = pd.to_numeric(df["year_cy"], errors="coerce").astype("Int64")
+        for col in self.string_columns:
+            if col in df.columns:
+                df[col] = df[col].astype("string")
+
+        # Coerce deaths to integers; if missing, create the column filled with 0
+        return df.assign(**{col: self.coerce_deaths(df, col) for col in self.death_columns})
+
+    def coerce_deaths(self, df: pd.DataFrame, col: str) -> pd.Series:
+        if col not in df.columns:
+            return pd.Series(0, index=df.index, dtype="Int64")
+        return pd.to_numeric(df[col], errors="coerce").fillna(0).astype("Int64")
+
+    def mark(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Plain JSON, so the marker survives shared-frame manifests
+        df.attrs[MARKER_ATTR] = {
+            "version": self.version,
+            "death_dtypes": {c: str(df[c].dtype) for c in self.death_columns
+                             if c in df.columns and _is_count_dtype(df[c].dtype)},
+        }
+        return df
+
+    def is_satisfied_by(self, df: pd.DataFrame) -> bool:
+        marker = df.attrs.get(MARKER_ATTR)
+        if not isinstance(marker, dict) or marker.get("version") != self.version:
+            return False
+        recorded = marker.get("death_dtypes") or {}
+        return all(c in df.columns and recorded.get(c) == str(df[c].dtype) for c in self.death_columns)
+
+
+def _is_count_dtype(dtype) -> bool:
+    return dtype == "Int64" or (not isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iu")
+
+
+CONTRACT = DataContract(version=2, death_columns=DEATH_COLUMNS, string_columns=STRING_COLUMNS)
@@ -0,0 +1,275 @@
+"""Dataset frames published once per host and attached zero-copy by every server process.
+
+With UCDP_SHARED_DIR set (ideally on tmpfs, e.g. /dev/shm/ucdp), `UCDP_Data.load_data`
+stops parsing the dataset in every worker. The first process to need a frame loads it as
+usual and publishes its columns as .npy files: numeric columns as they are, categoricals
+as their code array plus a category list, nullable integers as values plus a mask. Every
+process then memory-maps those files read-only and wraps them in a DataFrame without
+copying, so the column data is held once in the page cache however many workers attach.
+
+Each (dataset file, column selection) gets a slot directory; each publish of it is a new
+numbered generation, and the slot's CURRENT file names the live one together with the
+signature of the CSV it was built from. Publishing happens under a per-slot file lock, so
+concurrent workers wait for one loader instead of all parsing. A worker attaches to the
+current generation only if it matches the CSV on disk; when the CSV changes, the first
+worker to notice publishes the next generation. `republished()` reports slots whose
+generation moved on (e.g. after `python -m Dataset.shared_frames publish`), so
+long-running workers can re-attach.
+
+Old generations are deleted two publishes later; on POSIX, workers that still map them
+keep reading the unlinked files until they re-attach.
+
+    python -m Dataset.shared_frames publish [csv ...]   # pre-publish the views' frames
+    python -m Dataset.shared_frames status
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Dataset import columnar_cache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: publishes are not serialised across processes
+    fcntl = None
+
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+KEEP_GENERATIONS = 2
+
+
+def root_from_env() -> Path | None:
+    value = os.environ.get("UCDP_SHARED_DIR")
+    return Path(value) if value else None
+
+
+class SharedFrames:
+    """Publish/attach typed frames under `root`, one slot per (file, variant)."""
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # (resolved path, variant) -> generation this process attached to
+        self.attached: dict[tuple[str, tuple], int] = {}
+        self.publishes = 0
+        self.attaches = 0
+
+    # ---- slots ----
+    def slot(self, csv_path: Path, variant: tuple) -> Path:
+        resolved = Path(csv_path).resolve()
+        digest = hashlib.sha1(f"{resolved}|{variant!r}".encode()).hexdigest()[:12]
+        return self.root / f"{resolved.stem}-{digest}"
+
+    def current(self, csv_path: Path, variant: tuple) -> dict | None:
+        """The slot's CURRENT record ({"generation", "source"}), or None if nothing is published."""
+        try:
+            return json.loads((self.slot(csv_path, variant) / CURRENT).read_text())
+        except (OSError, ValueError):
+            return None
+
+    # ---- loading ----
+    def load(self, csv_path: Path, variant: tuple, loader) -> pd.DataFrame:
+        """Attach to the published frame for the CSV as it is now, publishing it first if needed."""
+        frame = self.attach(csv_path, variant)
+        if frame is not None:
+            return frame
+        with self._publish_lock(csv_path, variant):
+            # Another process may have published while this one waited for the lock
+            frame = self.attach(csv_path, variant)
+            if frame is not None:
+                return frame
+            signature = columnar_cache.source_signature(csv_path)
+            self.publish(csv_path, variant, loader(), signature)
+        return self.attach(csv_path, variant)
+
+    def attach(self, csv_path: Path, variant: tuple) -> pd.DataFrame | None:
+        """Zero-copy frame over the current generation, or None if it is missing or was built from another CSV."""
+        record = self.current(csv_path, variant)
+        if record is None or record.get("source") != columnar_cache.source_signature(csv_path):
+            return None
+        gen_dir = self.slot(csv_path, variant) / _gen_name(record["generation"])
+        try:
+            frame = _read_frame(gen_dir)
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            self.attached[(str(Path(csv_path).resolve()), variant)] = record["generation"]
+            self.attaches += 1
+        return frame
+
+    def publish(self, csv_path: Path, variant: tuple, df: pd.DataFrame, signature: dict | None = None) -> int:
+        """Write `df` as the slot's next generation and make it current; returns the generation number."""
+        slot = self.slot(csv_path, variant)
+        slot.mkdir(parents=True, exist_ok=True)
+        record = self.current(csv_path, variant)
+        generation = (record["generation"] if record else 0) + 1
+        while (slot / _gen_name(generation)).exists():
+            generation += 1
+
+        tmp = slot / f".{_gen_name(generation)}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        _write_frame(df, tmp, {"source_path": str(Path(csv_path).resolve()), "variant": list(variant)})
+        os.replace(tmp, slot / _gen_name(generation))
+
+        pointer = slot / f".{CURRENT}.{os.getpid()}.tmp"
+        pointer.write_text(json.dumps({
+            "generation": generation,
+            "source": signature or columnar_cache.source_signature(csv_path),
+        }))
+        os.replace(pointer, slot / CURRENT)
+        with self._lock:
+            self.publishes += 1
+        self._prune(slot, generation)
+        return generation
+
+    def republished(self) -> list[str]:
+        """Paths with an attached frame whose slot has since moved to a newer generation."""
+        with self._lock:
+            attached = list(self.attached.items())
+        changed = set()
+        for (path, variant), generation in attached:
+            record = self.current(Path(path), variant)
+            if record is not None and record["generation"] != generation:
+                changed.add(path)
+        return sorted(changed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"root": str(self.root), "publishes": self.publishes, "attaches": self.attaches,
+                    "attached": {f"{Path(p).name} {list(v)}": g for (p, v), g in self.attached.items()}}
+
+    # ---- internals ----
+    @contextmanager
+    def _publish_lock(self, csv_path: Path, variant: tuple):
+        slot = self.slot(csv_path, variant)
+        slot.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(slot / "publish.lock", "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _prune(self, slot: Path, generation: int) -> None:
+        for path in slot.glob("gen-*"):
+            try:
+                number = int(path.name.split("-", 1)[1])
+            except ValueError:
+                continue
+            if number <= generation - KEEP_GENERATIONS:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def _gen_name(generation: int) -> str:
+    return f"gen-{generation:06d}"
+
+
+# ---- frame <-> column files ----
+def _write_frame(df: pd.DataFrame, directory: Path, meta: dict) -> None:
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        stem = f"c{i}"
+        dtype = col.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            np.save(directory / f"{stem}.codes.npy", col.cat.codes.to_numpy())
+            entry = {"kind": "categorical", "categories": dtype.categories.tolist(),
+                     "categories_dtype": str(dtype.categories.dtype), "ordered": bool(dtype.ordered)}
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(col.array, "_mask"):
+            # Nullable numbers (Int64, Float64, boolean): values and NA mask, both mappable
+            np.save(directory / f"{stem}.values.npy", col.array._data)
+            np.save(directory / f"{stem}.mask.npy", col.array._mask)
+            entry = {"kind": "masked"}
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+            np.save(directory / f"{stem}.npy", col.to_numpy())
+            entry = {"kind": "numpy"}
+        else:
+            # Text and anything else: stored as codes, but each worker materialises its own copy
+            codes, uniques = pd.factorize(col, use_na_sentinel=True)
+            np.save(directory / f"{stem}.codes.npy", codes.astype(_code_dtype(len(uniques))))
+            entry = {"kind": "object", "categories": [None if pd.isna(u) else u for u in uniques]}
+        columns.append({"name": name, "file": stem, "dtype": str(dtype), **entry})
+
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        np.save(directory / "index.npy", df.index.to_numpy())
+    with open(directory / MANIFEST, "w") as f:
+        json.dump({"rows": len(df), "columns": columns, "attrs": df.attrs, **meta}, f, default=str)
+
+
+def _read_frame(directory: Path) -> pd.DataFrame:
+    manifest = json.loads((directory / MANIFEST).read_text())
+
+    def mapped(name):
+        # Plain ndarray view of the read-only map: no copy, and pandas treats it like any array
+        return np.load(directory / name, mmap_mode="r").view(np.ndarray)
+
+    data = {}
+    for col in manifest["columns"]:
+        stem, kind = col["file"], col["kind"]
+        if kind == "numpy":
+            data[col["name"]] = mapped(f"{stem}.npy")
+        elif kind == "categorical":
+            dtype = pd.CategoricalDtype(pd.Index(col["categories"], dtype=col["categories_dtype"]), col["ordered"])
+            data[col["name"]] = pd.Categorical.from_codes(mapped(f"{stem}.codes.npy"), dtype=dtype)
+        elif kind == "masked":
+            array_type = pd.api.types.pandas_dtype(col["dtype"]).construct_array_type()
+            data[col["name"]] = array_type(mapped(f"{stem}.values.npy"), mapped(f"{stem}.mask.npy"))
+        else:
+            codes = mapped(f"{stem}.codes.npy")
+            values = np.array(col["categories"] + [None], dtype=object)[codes]
+            data[col["name"]] = pd.array(values, dtype=col["dtype"]) if col["dtype"] != "object" else values
+
+    index_path = directory / "index.npy"
+    index = pd.Index(mapped("index.npy")) if index_path.exists() else pd.RangeIndex(manifest["rows"])
+    # copy=False keeps one block per column, each backed by its mapped file
+    frame = pd.DataFrame(data, index=index, copy=False)
+    frame.attrs.update(manifest.get("attrs") or {})
+    return frame
+
+
+def _code_dtype(n: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def main():
+    from Dataset.dataset import SHARED_FRAMES, UCDP_Data, VIEW_COLUMNS
+
+    parser = argparse.ArgumentParser(description="Publish or inspect the shared dataset frames (UCDP_SHARED_DIR).")
+    parser.add_argument("command", choices=["publish", "status"])
+    parser.add_argument("csv", nargs="*", help="dataset files (default: the dashboard's default dataset)")
+    args = parser.parse_args()
+    if SHARED_FRAMES is None:
+        parser.error("set UCDP_SHARED_DIR to the directory to publish into")
+
+    paths = args.csv or [None]
+    for csv_path in paths:
+        # The variant every view loads (VIEW_COLUMNS, compact); shared=False parses here instead of attaching
+        handler = UCDP_Data(csv_path, columns=VIEW_COLUMNS, compact=True, shared=False)
+        slot = SHARED_FRAMES.slot(handler.filepath, handler._variant)
+        if args.command == "publish":
+            generation = SHARED_FRAMES.publish(handler.filepath, handler._variant, handler.data)
+            print(f"{handler.filepath}: published generation {generation} in {slot}")
+        else:
+            record = SHARED_FRAMES.current(handler.filepath, handler._variant)
+            fresh = record is not None and record["source"] == columnar_cache.source_signature(handler.filepath)
+            print(f"{handler.filepath}: {slot} generation {record and record['generation']}"
+                  f" ({'current' if fresh else 'stale or missing'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Timed spans for Streamlit reruns.
+
+A rerun is traced when `main.py` opens one with `rerun(...)`; every `span(...)` entered on the
+same thread while it is open is recorded with its duration, nesting depth and tags. Outside a
+traced rerun (unsampled reruns, benchmarks, other threads) `span` does nothing but a
+context-variable lookup.
+
+Chart regions wrapped in `st.fragment` open `fragment(...)`: inside a full rerun it is just a
+span, but when Streamlit reruns the fragment on its own it is counted (and sampled) as a
+fragment rerun, so full-script and fragment-only reruns can be told apart.
+
+Configuration (environment):
+    UCDP_TRACE_SAMPLE   fraction of reruns to trace, 0..1 (default 0: only dev-panel reruns)
+    UCDP_TRACE_LOG      1 to log each finished trace as one JSON line on the "ucdp.trace" logger
+    UCDP_METRICS_FILE   path to rewrite with Prometheus text metrics (textfile-collector style)
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("ucdp.trace")
+
+_current = contextvars.ContextVar("ucdp_trace", default=None)
+# True while main.py is running as a whole, traced or not
+_in_script = contextvars.ContextVar("ucdp_in_script", default=False)
+
+
+def _sample_rate() -> float:
+    try:
+        return min(max(float(os.environ.get("UCDP_TRACE_SAMPLE", "0")), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+class Trace:
+    """Spans recorded during one rerun, in the order they finished."""
+
+    def __init__(self, tab: str, tags: dict | None = None):
+        self.tab = tab
+        self.tags = dict(tags or {})
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.depth = 0
+        self.duration_ms = None
+
+    def offset_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e3
+
+    def to_dict(self) -> dict:
+        return {
+            "tab": self.tab,
+            "tags": self.tags,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": self.spans,
+        }
+
+
+class MetricsRegistry:
+    """Per-(tab, span) counters aggregated over every finished trace, plus the most recent traces."""
+
+    def __init__(self, keep: int = 200):
+        self._lock = threading.Lock()
+        self.recent: deque[Trace] = deque(maxlen=keep)
+        self.reruns = 0
+        self.sampled = 0
+        # fragment name -> reruns of just that fragment
+        self.fragment_reruns: dict[str, int] = {}
+        # (tab, span) -> [count, total_ms, max_ms]
+        self.stages: dict[tuple[str, str], list] = {}
+        self._last_export = 0.0
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            self.recent.append(trace)
+            self.sampled += 1
+            for span in trace.spans:
+                stat = self.stages.setdefault((trace.tab, span["name"]), [0, 0.0, 0.0])
+                stat[0] += 1
+                stat[1] += span["duration_ms"]
+                stat[2] = max(stat[2], span["duration_ms"])
+
+    def count_rerun(self) -> None:
+        with self._lock:
+            self.reruns += 1
+
+    def count_fragment_rerun(self, name: str) -> None:
+        with self._lock:
+            self.fragment_reruns[name] = self.fragment_reruns.get(name, 0) + 1
+
+    def summary(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"tab": tab, "span": name, "count": c, "mean_ms": total / c, "max_ms": mx}
+                for (tab, name), (c, total, mx) in sorted(self.stages.items())
+            ]
+
+    def traces(self) -> list[Trace]:
+        with self._lock:
+            return list(self.recent)
+
+    def last(self, tab: str | None = None) -> Trace | None:
+        with self._lock:
+            for trace in reversed(self.recent):
+                if tab is None or trace.tab == tab:
+                    return trace
+        return None
+
+    def prometheus(self) -> str:
+        """Text exposition format: a summary (count/sum, milliseconds) per tab and span."""
+        lines = [
+            "# HELP ucdp_reruns_total Streamlit reruns seen by the dashboard.",
+            "# TYPE ucdp_reruns_total counter",
+            f"ucdp_reruns_total {self.reruns}",
+            "# HELP ucdp_traced_reruns_total Reruns that were sampled and traced.",
+            "# TYPE ucdp_traced_reruns_total counter",
+            f"ucdp_traced_reruns_total {self.sampled}",
+            "# HELP ucdp_fragment_reruns_total Reruns of a single chart fragment without the rest of the page.",
+            "# TYPE ucdp_fragment_reruns_total counter",
+            *(f'ucdp_fragment_reruns_total{{fragment="{_escape(name)}"}} {count}'
+              for name, count in sorted(self.fragment_reruns.items())),
+            "# HELP ucdp_span_milliseconds Time spent in each rerun stage.",
+            "# TYPE ucdp_span_milliseconds summary",
+        ]
+        for row in self.summary():
+            labels = f'tab="{_escape(row["tab"])}",span="{_escape(row["span"])}"'
+            lines.append(f"ucdp_span_milliseconds_count{{{labels}}} {row['count']}")
+            lines.append(f"ucdp_span_milliseconds_sum{{{labels}}} {row['mean_ms'] * row['count']:.3f}")
+        lines.append("# HELP ucdp_span_max_milliseconds Slowest observation of each rerun stage.")
+        lines.append("# TYPE ucdp_span_max_milliseconds gauge")
+        for row in self.summary():
+            labels = f'tab="{_escape(row["tab"])}",span="{_escape(row["span"])}"'
+            lines.append(f"ucdp_span_max_milliseconds{{{labels}}} {row['max_ms']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str | os.PathLike, min_interval: float = 5.0) -> None:
+        """Rewrite `path` atomically with the current metrics, at most once per `min_interval` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < min_interval:
+                return
+            self._last_export = now
+        path = Path(path)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(self.prometheus())
+        os.replace(tmp, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.recent.clear()
+            self.stages.clear()
+            self.fragment_reruns.clear()
+            self.reruns = self.sampled = 0
+
+
+METRICS = MetricsRegistry()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@contextmanager
+def rerun(tab: str, force: bool = False, **tags):
+    """Trace the enclosed rerun if it is sampled (or `force` is set, e.g. by the dev panel)."""
+    METRICS.count_rerun()
+    token = _in_script.set(True)
+    try:
+        with _traced(tab, force, tags) as trace:
+            yield trace
+    finally:
+        _in_script.reset(token)
+
+
+@contextmanager
+def fragment(tab: str, name: str, force: bool = False, **tags):
+    """A chart region Streamlit can rerun alone: a span within a full rerun, else its own (fragment) rerun."""
+    if _in_script.get():
+        with span(f"fragment.{name}", **tags):
+            yield _current.get()
+        return
+    METRICS.count_fragment_rerun(f"{tab}/{name}")
+    with _traced(tab, force, {"fragment": name, **tags}) as trace:
+        yield trace
+
+
+@contextmanager
+def _traced(tab: str, force: bool, tags: dict):
+    if not force and random.random() >= _sample_rate():
+        yield None
+        return
+
+    trace = Trace(tab, tags)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.duration_ms = trace.offset_ms()
+        METRICS.record(trace)
+        if os.environ.get("UCDP_TRACE_LOG") == "1":
+            logger.info(json.dumps(trace.to_dict(), default=str))
+        metrics_file = os.environ.get("UCDP_METRICS_FILE")
+        if metrics_file:
+            try:
+                METRICS.export(metrics_file)
+            except OSError as exc:
+                logger.warning("Could not write metrics to %s: %s", metrics_file, exc)
+
+
+@contextmanager
+def span(name: str, **tags):
+    """Time the enclosed block as stage `name` of the current trace; a no-op when nothing is traced."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    start = trace.offset_ms()
+    trace.depth += 1
+    try:
+        yield
+    finally:
+        trace.depth -= 1
+        trace.spans.append({
+            "name": name,
+            "start_ms": start,
+            "duration_ms": trace.offset_ms() - start,
+            "depth": trace.depth,
+            "tags": tags,
+        })
+
+
+def tag(**tags) -> None:
+    """Attach rerun-level tags (e.g. the active filters) to the current trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.tags.update(tags)
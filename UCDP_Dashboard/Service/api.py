@@ -0,0 +1,128 @@
+"""JSON-over-HTTP front end for Dataset.queries, runnable without Streamlit.
+
+    python -m Service.api [--host 127.0.0.1] [--port 8765] [--cache-size 1024]
+
+Endpoints (all JSON):
+    POST /query    one query object, or {"queries": [...]} for a batch of up to MAX_BATCH;
+                   a batch answers {"results": [...]} in order, each an answer or {"error": ...}
+    GET  /meta     releases, years, regions, countries, violence types (?version=24.1)
+    GET  /stats    query/cache counters
+    GET  /health   {"ok": true}
+
+Requests are served on threads sharing one QueryService, so every client reads and fills
+the same result cache and the same loaded datasets. Bind to localhost unless the port is
+protected by something else: there is no authentication.
+"""
+import argparse
+import json
+import logging
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from Dataset.queries import QueryError, QueryService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = "UCDPQuery/1"
+    protocol_version = "HTTP/1.1"  # keep-alive, so batch clients reuse one connection
+    # Headers and body go out in separate writes; without this, small answers wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self) -> QueryService:
+        return self.server.service
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/health":
+            self._send(HTTPStatus.OK, {"ok": True})
+        elif url.path == "/stats":
+            self._send(HTTPStatus.OK, self.service.stats())
+        elif url.path == "/meta":
+            try:
+                self._send(HTTPStatus.OK, self.service.meta(params.get("version")))
+            except QueryError as exc:
+                self._send(HTTPStatus.NOT_FOUND, {"error": str(exc)})
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint: {url.path}"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/query":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"body over {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": "body is not valid JSON"})
+            return
+
+        try:
+            if isinstance(body, dict) and "queries" in body:
+                if not isinstance(body["queries"], list):
+                    raise QueryError("queries must be a list")
+                self._send(HTTPStatus.OK, {"results": self.service.run_batch(body["queries"])})
+            else:
+                self._send(HTTPStatus.OK, self.service.run(body))
+        except QueryError as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        except Exception:
+            logger.exception("Query failed: %s", body)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+
+    def _send(self, status: HTTPStatus, payload) -> None:
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: QueryService | None = None):
+        super().__init__(address, QueryHandler)
+        self.service = service or QueryService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard's aggregates as a JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=1024, help="answers kept in the shared cache, per release")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    server = QueryServer((args.host, args.port), QueryService(maxsize=args.cache_size))
+    # Load the default dataset and its cube before accepting queries
+    start = time.perf_counter()
+    server.service.meta()
+    logger.info("Dataset ready in %.2f s; serving on http://%s:%d", time.perf_counter() - start,
+                *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import streamlit as st
+
+APPLY_KEY = "apply_filters"
+
+
+def apply_mode() -> bool:
+    """Whether sidebar filters wait for "Apply" (per session toggle, default from UCDP_APPLY_FILTERS)."""
+    return st.session_state.get(APPLY_KEY, os.environ.get("UCDP_APPLY_FILTERS") == "1")
+
+
+def apply_toggle(sidebar) -> None:
+    """Sidebar switch between live filters and commit-on-apply."""
+    st.session_state.setdefault(APPLY_KEY, os.environ.get("UCDP_APPLY_FILTERS") == "1")
+    sidebar.toggle(
+        "Apply filters with a button",
+        key=APPLY_KEY,
+        help="Change several filters (or drag a slider) without redrawing the charts after each step.",
+    )
+
+
+class filter_panel:
+    """The tab's "Filters" sidebar expander.
+
+    In apply mode the widgets sit in an `st.form`, so dragging a slider or picking countries
+    changes nothing until "Apply" is pressed: one rerun per batch of edits instead of one per
+    step. Otherwise each change reruns as before (Streamlit already debounces slider drags).
+    Widgets are added to it exactly as to the expander; call `close()` after the last one.
+    """
+
+    def __init__(self, sidebar, key: str):
+        self.deferred = apply_mode()
+        expander = sidebar.expander("Filters", expanded=True)
+        self._container = expander.form(key, border=False) if self.deferred else expander
+
+    def __getattr__(self, name):
+        return getattr(self._container, name)
+
+    def close(self) -> None:
+        if self.deferred:
+            self._container.form_submit_button("Apply", type="primary", use_container_width=True)
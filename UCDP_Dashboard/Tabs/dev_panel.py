@@ -0,0 +1,67 @@
+import os
+import json
+import streamlit as st
+from Instrumentation import tracing
+
+
+def enabled() -> bool:
+    """Shown when UCDP_DEV_PANEL=1 is set for the server, or `?dev=1` is in the page URL."""
+    return os.environ.get("UCDP_DEV_PANEL") == "1" or st.query_params.get("dev") == "1"
+
+
+def render(sidebar, tab: str):
+    """Timings for this rerun and the process-wide stage metrics, in a collapsed sidebar expander."""
+    panel = sidebar.expander("Developer: rerun timings", expanded=False)
+    trace = tracing.METRICS.last(tab)
+    if trace is None:
+        panel.caption("No traced reruns yet.")
+        return
+
+    panel.caption(f"Last rerun of {tab}: {trace.duration_ms:.1f} ms")
+    # Spans are appended when they finish; sort by start so parents precede their children
+    panel.dataframe(
+        [
+            {
+                "stage": "  " * s["depth"] + s["name"],
+                "ms": round(s["duration_ms"], 2),
+                "tags": json.dumps(s["tags"], default=str) if s["tags"] else "",
+            }
+            for s in sorted(trace.spans, key=lambda s: (s["start_ms"], s["depth"]))
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+    if trace.tags:
+        panel.json(trace.tags, expanded=False)
+
+    fragments = ", ".join(f"{name}: {count}" for name, count in sorted(tracing.METRICS.fragment_reruns.items()))
+    panel.caption(f"All traced reruns ({tracing.METRICS.sampled} of {tracing.METRICS.reruns} full reruns; "
+                  f"fragment-only reruns: {fragments or 'none'})")
+    panel.dataframe(
+        [{**row, "mean_ms": round(row["mean_ms"], 2), "max_ms": round(row["max_ms"], 2)}
+         for row in tracing.METRICS.summary()],
+        hide_index=True,
+        use_container_width=True,
+    )
+    from Tabs.result_cache import RESULTS
+    cache = RESULTS.stats()
+    panel.caption(f"Result cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%}), "
+                  f"{cache['evictions']} evictions, {cache['rejected']} too large; {cache['entries']} results, "
+                  f"{cache['bytes'] / 2**20:.1f} of {cache['budget_bytes'] / 2**20:.0f} MiB, "
+                  f"{cache['sessions']} sessions")
+
+    # Imported here so the landing page still renders without plotly
+    from Tabs.figure_payload import REPORTS
+    from Tabs.snapshots import SNAPSHOTS
+    snapshots = SNAPSHOTS.stats()
+    panel.caption(f"Snapshots: {snapshots['hits']} views served pre-rendered, {snapshots['misses']} built live"
+                  + ("" if snapshots["sets"] else f" (no snapshot set for this dataset in {SNAPSHOTS.root})"))
+    if REPORTS:
+        panel.caption("Figure payloads (bytes sent by st.plotly_chart)")
+        panel.dataframe([r.to_dict() for r in list(REPORTS.values())], hide_index=True, use_container_width=True)
+
+    panel.download_button("Export metrics (Prometheus)", tracing.METRICS.prometheus(),
+                          file_name="ucdp_metrics.prom", mime="text/plain")
+    panel.download_button("Export recent traces (JSON lines)",
+                          "\n".join(json.dumps(t.to_dict(), default=str) for t in tracing.METRICS.traces()),
+                          file_name="ucdp_traces.jsonl", mime="application/json")
@@ -0,0 +1,73 @@
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class CachedFigure:
+    """A built plotly figure shared between sessions.
+
+    Animation speed is the only per-session setting, so it is patched onto the shared
+    figure under a lock just for the time it takes to serialize it.
+    """
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def animation_speed(self, speed):
+        with self.lock:
+            set_animation_speed(self.figure, speed)
+            yield self.figure
+
+
+class FigureCache:
+    """Process-wide LRUs of built figures, keyed on whatever determines the figure's contents.
+
+    Figures built from a `source` (the aggregate cube) are kept in that source's own LRU of
+    `maxsize` entries, held weakly, so a cube replaced by a refresh is freed with its figures.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._by_source: weakref.WeakKeyDictionary[object, OrderedDict] = weakref.WeakKeyDictionary()
+        self._unowned: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build, source=None) -> CachedFigure:
+        with self._lock:
+            entries = self._unowned if source is None else self._by_source.setdefault(source, OrderedDict())
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Build outside the lock; two sessions racing on the same key just build it twice
+        entry = CachedFigure(build())
+        with self._lock:
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._by_source.clear()
+            self._unowned.clear()
+
+
+def set_animation_speed(fig, speed):
+    """Patch the play button's frame/transition durations in place."""
+    if 'updatemenus' in fig.layout and len(fig.layout.updatemenus) > 0:
+        try:
+            fig.layout.updatemenus[0].buttons[0].args[1]['frame']['duration'] = int(speed)
+            fig.layout.updatemenus[0].buttons[0].args[1]['transition']['duration'] = int(speed) // 2
+            fig.layout.updatemenus[0].buttons[0].args[1]['transition']['easing'] = 'linear'
+        except Exception:
+            pass
@@ -0,0 +1,159 @@
+import base64
+import threading
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from _plotly_utils.utils import convert_to_base64, plotlyjsShortTypes
+
+_DTYPES = {short: np.dtype(name) for name, short in plotlyjsShortTypes.items()}
+
+
+class PayloadReport:
+    """Serialized size of one chart before and after `optimize`, as st.plotly_chart would send it."""
+
+    def __init__(self, chart: str, before: int, after: int, frames: int, stripped: int):
+        self.chart = chart
+        self.before = before
+        self.after = after
+        self.frames = frames
+        self.stripped = stripped
+
+    @property
+    def saved(self) -> float:
+        return 1 - self.after / self.before if self.before else 0.0
+
+    def to_dict(self) -> dict:
+        return {"chart": self.chart, "frames": self.frames, "bytes_before": self.before,
+                "bytes_after": self.after, "saved": round(self.saved, 3), "frame_keys_stripped": self.stripped}
+
+
+# Latest report per chart name, for the developer panel and benchmarks
+REPORTS: dict[str, PayloadReport] = {}
+_reports_lock = threading.Lock()
+
+
+def payload_bytes(fig) -> int:
+    """Bytes of the JSON spec Streamlit builds for `fig` (to_dict, then to_json)."""
+    spec = fig.to_dict() if isinstance(fig, go.Figure) else fig
+    return len(pio.to_json(spec, validate=False))
+
+
+def optimize(fig: go.Figure, chart: str) -> go.Figure:
+    """Smaller equivalent of an (animated) figure, built once and meant to be cached.
+
+    - numeric trace arrays are quantized: integral floats become ints, other floats float32;
+    - every numeric trace array (including plain lists) is sent as a base64 typed-array buffer;
+    - per-frame trace attributes that are identical in every frame and in the base trace
+      are dropped from the frames, since plotly.js keeps a trace's current value for
+      anything a frame leaves out.
+
+    The layout is left as it is: its numeric info-arrays (axis and geo `domain`s, ...) do not
+    accept typed-array buffers, and go.Figure would silently drop them.
+    """
+    before = payload_bytes(fig)
+    spec = fig.to_dict()
+    for trace in _traces(spec):
+        quantize(trace)
+    stripped = strip_frame_constants(spec)
+    for trace in _traces(spec):
+        convert_to_base64(trace)
+
+    optimized = go.Figure(spec)
+    report = PayloadReport(chart, before, payload_bytes(optimized), len(spec.get("frames", [])), stripped)
+    with _reports_lock:
+        REPORTS[chart] = report
+    return optimized
+
+
+def _traces(spec: dict):
+    """Trace dicts of the figure and of every animation frame."""
+    yield from spec.get("data") or []
+    for frame in spec.get("frames") or []:
+        yield from frame.get("data") or []
+
+
+def quantize(obj):
+    """Narrow numeric arrays in a trace dict in place (recursing into dicts and lists)."""
+    items = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else ()
+    for key, value in items:
+        if key in ("range", "geojson", "domain"):
+            continue
+        if _is_typed_array(value):
+            obj[key] = quantize_array(_decode(value))
+        elif isinstance(value, (dict, list)) and not _is_number_list(value):
+            quantize(value)
+        elif _is_number_list(value) or isinstance(value, np.ndarray):
+            obj[key] = quantize_array(value)
+
+
+def quantize_array(values):
+    arr = np.asarray(values)
+    if arr.dtype.kind == "f":
+        finite = arr[np.isfinite(arr)]
+        if len(finite) == len(arr) and np.array_equal(finite, np.round(finite)):
+            return _smallest_int(arr.astype(np.int64))
+        return arr.astype(np.float32)
+    if arr.dtype.kind in "iu":
+        return _smallest_int(arr.astype(np.int64))
+    return values
+
+
+def _smallest_int(arr: np.ndarray) -> np.ndarray:
+    if arr.size == 0:
+        return arr
+    lo, hi = arr.min(), arr.max()
+    for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32):
+        info = np.iinfo(dtype)
+        if lo >= info.min and hi <= info.max:
+            return arr.astype(dtype)
+    return arr
+
+
+def _is_typed_array(value) -> bool:
+    # {"dtype": "i4", "bdata": "..."}: the base64 form Figure.to_dict already uses for numpy arrays
+    return isinstance(value, dict) and "bdata" in value and "shape" not in value and value.get("dtype") in _DTYPES
+
+
+def _decode(spec: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype=_DTYPES[spec["dtype"]])
+
+
+def _is_number_list(value) -> bool:
+    return (isinstance(value, list) and len(value) > 1
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value))
+
+
+def strip_frame_constants(spec: dict) -> int:
+    """Remove frame trace keys whose value is the same in every frame and in the base trace."""
+    frames = spec.get("frames") or []
+    if not frames:
+        return 0
+    removed = 0
+    for i, base in enumerate(spec["data"]):
+        traces = [_frame_trace(frame, i) for frame in frames]
+        if any(t is None for t in traces):
+            continue
+        for key in list(traces[0]):
+            # `type` stays so each frame trace is still self-describing
+            if key == "type" or key not in base:
+                continue
+            if all(key in t and _same(t[key], base[key]) for t in traces):
+                for t in traces:
+                    del t[key]
+                removed += 1
+    return removed
+
+
+def _frame_trace(frame: dict, i: int):
+    # px frames list every trace in order; a `traces` list would map frame data to other indices
+    data = frame.get("data") or []
+    if frame.get("traces") is not None and list(frame["traces"]) != list(range(len(data))):
+        return None
+    return data[i] if i < len(data) else None
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        a, b = np.asarray(a), np.asarray(b)
+        return a.shape == b.shape and a.dtype.kind == b.dtype.kind and bool(np.all(a == b))
+    return a == b
@@ -0,0 +1,50 @@
+import importlib
+import threading
+import time
+
+# Tab name -> (module, class). Modules are imported the first time their tab becomes active,
+# so the Overview page renders without pulling in plotly or the dataset.
+TABS = {
+    "Overview": ("Tabs.tab_one", "tab_one"),
+    "Trends (Time Series)": ("Tabs.tab_two", "tab_two"),
+    "Comparisons (Animated)": ("Tabs.tab_three", "tab_three"),
+    "Regional Analysis": ("Tabs.tab_four", "tab_four"),
+    "Geospatial Heatmap": ("Tabs.tab_five", "tab_five"),
+    "Actors/Dyads": ("Tabs.tab_six", "tab_six"),
+}
+
+_lock = threading.Lock()
+_instances = {}
+# Seconds spent importing each tab's module and constructing its instance (data load included)
+import_seconds = {}
+init_seconds = {}
+
+
+def get_tab(name: str):
+    """Return the shared instance for `name`, importing and constructing it on first use.
+
+    Tab objects hold no per-session state (their data comes from the shared dataset store),
+    so one instance per process is reused by every session.
+    """
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _instances:
+            module_name, class_name = TABS[name]
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            import_seconds[name] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _instances[name] = getattr(module, class_name)()
+            init_seconds[name] = time.perf_counter() - start
+        return _instances[name]
+
+
+def timings() -> dict:
+    """Import and construction cost per tab loaded so far in this process."""
+    return {
+        name: {"import_seconds": import_seconds[name], "init_seconds": init_seconds.get(name)}
+        for name in import_seconds
+    }
@@ -0,0 +1,230 @@
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+SESSION_KEY = "_result_cache_session"
+
+
+class ResultCache:
+    """Computed view results (aggregates and their figures) kept between reruns, under a byte budget.
+
+    Entries are keyed on a tab's normalized filter parameters and tied (weakly) to the object
+    they were computed from (the aggregate cube), so a reloaded dataset never serves old results.
+    Each session keeps its own LRU of keys, but a result is stored once however many
+    sessions use it, so the budget counts every stored byte once.
+
+    Two limits keep memory bounded and sessions fair:
+    - a session using more than `session_bytes` (counting every entry it uses at full
+      size) evicts its own least recently used entries first;
+    - while the store is over `budget_bytes`, the session using the most bytes gives up
+      its least recently used entry, so one heavy user cannot push everyone else out.
+    A result larger than `session_bytes` is returned but not kept.
+    Streamlit does not say when a browser session ends, so a session that has not used the
+    cache for `idle_seconds` is forgotten (its bookkeeping, and results only it used).
+    """
+
+    def __init__(self, budget_bytes: int, session_bytes: int | None = None, idle_seconds: float = 3600):
+        self.budget_bytes = budget_bytes
+        self.session_bytes = min(session_bytes or budget_bytes // 4, budget_bytes)
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # key -> [weak ref(s) to the source, value, nbytes, sessions using it]
+        self._values: dict[tuple, list] = {}
+        # session -> its keys, least recently used first
+        self._sessions: dict[str, OrderedDict[tuple, None]] = {}
+        self._session_bytes: dict[str, int] = {}
+        self._last_used: dict[str, float] = {}
+        self._next_sweep = time.monotonic() + idle_seconds
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, key: tuple, compute, source=None, session: str | None = None):
+        """The cached result for `key` computed from `source`, calling `compute()` on a miss."""
+        if self.budget_bytes <= 0:
+            return compute()
+        session = session or session_id()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and _same(entry[0], source):
+                self.hits += 1
+                self._use(session, key, entry)
+                # Picking up another session's result counts against this session's share too
+                self._evict(session)
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock; two sessions racing on the same key just compute it twice
+        value = compute()
+        nbytes = estimate_bytes(value)
+        with self._lock:
+            if nbytes > self.session_bytes:
+                self.rejected += 1
+                return value
+            old = self._values.get(key)
+            if old is not None and not _same(old[0], source):
+                self._drop(key)
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [_weak(source), value, nbytes, set()]
+                self.bytes += nbytes
+            self._use(session, key, entry)
+            self._evict(session)
+            return entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._sessions.clear()
+            self._session_bytes.clear()
+            self._last_used.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "rejected": self.rejected, "entries": len(self._values),
+                "bytes": self.bytes, "budget_bytes": self.budget_bytes, "sessions": len(self._sessions),
+                "largest_session_bytes": max(self._session_bytes.values(), default=0),
+            }
+
+    # ---- internals (called with the lock held) ----
+    def _use(self, session: str, key: tuple, entry: list) -> None:
+        keys = self._sessions.setdefault(session, OrderedDict())
+        if key not in keys:
+            entry[3].add(session)
+            self._session_bytes[session] = self._session_bytes.get(session, 0) + entry[2]
+        keys[key] = None
+        keys.move_to_end(key)
+        self._last_used[session] = time.monotonic()
+
+    def _release(self, session: str, key: tuple) -> None:
+        entry = self._values.get(key)
+        self._sessions[session].pop(key, None)
+        if entry is None:
+            return
+        entry[3].discard(session)
+        self._session_bytes[session] -= entry[2]
+        if not entry[3]:
+            del self._values[key]
+            self.bytes -= entry[2]
+
+    def _drop(self, key: tuple) -> None:
+        for session in list(self._values[key][3]):
+            self._release(session, key)
+
+    def _drop_session(self, session: str) -> None:
+        """Forget a session's entries (results other sessions still use stay)."""
+        for key in list(self._sessions.get(session, ())):
+            self._release(session, key)
+        self._sessions.pop(session, None)
+        self._session_bytes.pop(session, None)
+        self._last_used.pop(session, None)
+
+    def _sweep_idle(self) -> None:
+        # At most once per idle period, so a cache hit does not scan every session
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.idle_seconds
+        for session, last_used in list(self._last_used.items()):
+            if now - last_used > self.idle_seconds:
+                self._drop_session(session)
+
+    def _evict(self, session: str) -> None:
+        self._sweep_idle()
+        # The current session's newest entry is never evicted by its own insert
+        while self._session_bytes.get(session, 0) > self.session_bytes and len(self._sessions[session]) > 1:
+            self._evict_oldest(session)
+        while self.bytes > self.budget_bytes:
+            candidates = [s for s, keys in self._sessions.items() if len(keys) > (1 if s == session else 0)]
+            if not candidates:
+                break
+            self._evict_oldest(max(candidates, key=self._session_bytes.get))
+
+    def _evict_oldest(self, session: str) -> None:
+        key = next(iter(self._sessions[session]))
+        self._release(session, key)
+        self.evictions += 1
+        if not self._sessions[session]:
+            self._drop_session(session)
+
+
+def result_key(view: str, **filters) -> tuple:
+    """Cache key for `view` under `filters`: selections are order-free (sorted), ranges are int tuples."""
+    return (view, *sorted((name, _normalize(value)) for name, value in filters.items()))
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize(v) for v in value]
+        # Two-number ranges (year sliders) keep their order; name selections do not
+        if len(items) == 2 and all(isinstance(v, (int, float, np.integer)) for v in items):
+            return tuple(int(v) for v in items)
+        return tuple(sorted(items, key=str))
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _weak(source):
+    # Entries must not keep a replaced dataset's cube alive; None stays None
+    if isinstance(source, tuple):
+        return tuple(_weak(s) for s in source)
+    return weakref.ref(source) if source is not None else None
+
+
+def _same(stored, source) -> bool:
+    """True if `stored` (from _weak) still points at `source`; tuples compare item by item."""
+    if isinstance(stored, tuple) and isinstance(source, tuple):
+        return len(stored) == len(source) and all(_same(r, s) for r, s in zip(stored, source))
+    if stored is None or source is None:
+        return stored is None and source is None
+    return stored() is source
+
+
+def session_id() -> str:
+    """Stable id for the current browser session (a fresh one per session_state)."""
+    try:
+        return st.session_state.setdefault(SESSION_KEY, uuid.uuid4().hex)
+    except Exception:
+        # Outside a Streamlit session (warm-up thread, scripts): one shared pseudo-session
+        return "default"
+
+
+def estimate_bytes(value, _depth: int = 0) -> int:
+    """Approximate memory held by a result: frames and arrays by their buffers, figures by their trace data."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, "to_plotly_json"):
+        return estimate_bytes(value.to_plotly_json(), _depth + 1)
+    if _depth > 20:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k, _depth + 1) + estimate_bytes(v, _depth + 1)
+                                          for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v, _depth + 1) for v in value)
+    return sys.getsizeof(value)
+
+
+# One cache for every tab in this server process; UCDP_RESULT_CACHE_MB caps it (0 turns it off)
+RESULTS = ResultCache(
+    budget_bytes=int(float(os.environ.get("UCDP_RESULT_CACHE_MB", "256")) * 2**20),
+    session_bytes=int(float(os.environ.get("UCDP_RESULT_CACHE_SESSION_MB", "32")) * 2**20),
+)
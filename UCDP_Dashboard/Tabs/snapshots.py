@@ -0,0 +1,296 @@
+"""Figures for the tabs' default views (and configured popular ones), rendered ahead of time.
+
+    python -m Tabs.snapshots build [--views views.json] [--dataset path.csv]
+    python -m Tabs.snapshots status
+
+`build` runs each view through the tab's own figure function and writes the result into a
+snapshot set: a directory named after the dataset file and the SHA-256 of its contents,
+
+    <UCDP_SNAPSHOT_DIR or Dataset/snapshots>/<dataset stem>-<sha256[:16]>/
+        manifest.json    dataset, hash, format, plotly version, build time, view key -> file
+        <key id>.json    the figure(s) of one view, as plotly JSON
+
+The views are every tab's default view plus the entries of the views file (default
+`Tabs/snapshot_views.json`, or UCDP_SNAPSHOT_VIEWS): {"tab": <tab name>, ...filters}, where
+filters left out keep the tab's defaults.
+
+At run time a tab computes a view through `SNAPSHOTS.get(path, key, compute)`. If a set built
+from a file with the same content hash holds the view's key, the figure is loaded from it;
+otherwise (no set, another dataset, another key) `compute()` builds it live. Either way the
+result then goes into the tab's usual cache, so a snapshot is read at most once per process.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import plotly
+import plotly.graph_objects as go
+
+from Instrumentation import tracing
+
+logger = logging.getLogger(__name__)
+
+# 2: figures keep their layout domains (sets built before are ignored)
+FORMAT = 2
+MANIFEST = "manifest.json"
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "Dataset" / "snapshots"
+DEFAULT_VIEWS = Path(__file__).resolve().parent / "snapshot_views.json"
+
+
+class Snapshots:
+    """Lookup of pre-rendered view figures by (dataset content hash, view key)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # resolved dataset path -> (mtime_ns, size, snapshot directory or None)
+        self._sets: dict[Path, tuple[int, int, Path | None]] = {}
+        self._manifests: dict[Path, dict] = {}
+        self._recording = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, key: tuple, compute):
+        """The view's figure(s) from the matching snapshot set, else `compute()`."""
+        recorded = getattr(self._recording, "views", None)
+        if recorded is not None:
+            value = compute()
+            recorded[key] = value
+            return value
+        if not isinstance(path, Path):
+            return compute()
+
+        with tracing.span("snapshot"):
+            value = self._load(path, key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return compute() if value is None else value
+
+    @contextmanager
+    def recording(self):
+        """Within the block (on this thread) views are always computed, and collected as key -> value."""
+        self._recording.views = {}
+        try:
+            yield self._recording.views
+        finally:
+            self._recording.views = None
+
+    def directory_for(self, path: Path) -> Path | None:
+        """The snapshot set built from `path`'s current contents, if there is one."""
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        cached = self._sets.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        # Hashed once per file change (the same contents under a new mtime still match),
+        # and not at all while no set has been built
+        found = None
+        if any(self.root.glob(f"{path.stem}-*/{MANIFEST}")):
+            directory = self.root / set_name(path, content_hash(path))
+            found = directory if self._manifest(directory) is not None else None
+        with self._lock:
+            self._sets[path] = (stat.st_mtime_ns, stat.st_size, found)
+        return found
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "sets": sum(1 for *_, d in self._sets.values() if d is not None)}
+
+    def _load(self, path: Path, key: tuple):
+        directory = self.directory_for(path)
+        if directory is None:
+            return None
+        filename = self._manifest(directory)["views"].get(key_id(key))
+        if filename is None:
+            return None
+        try:
+            with open(directory / filename, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as exc:
+            logger.warning("Unreadable snapshot %s, computing the view instead: %s", directory / filename, exc)
+            return None
+        figures = tuple(go.Figure(figure) for figure in stored["figures"])
+        return figures if stored["tuple"] else figures[0]
+
+    def _manifest(self, directory: Path) -> dict | None:
+        manifest = self._manifests.get(directory)
+        if manifest is not None:
+            return manifest
+        try:
+            with open(directory / MANIFEST, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Figure JSON from another plotly major version may not load the same way
+        if manifest.get("format") != FORMAT or _major(manifest.get("plotly")) != _major(plotly.__version__):
+            logger.info("Ignoring snapshot set %s (format %s, plotly %s)", directory.name,
+                        manifest.get("format"), manifest.get("plotly"))
+            return None
+        with self._lock:
+            self._manifests[directory] = manifest
+        return manifest
+
+
+def key_id(key: tuple) -> str:
+    """Stable file-name-safe id for a view key (tuples of names, numbers and strings)."""
+    return hashlib.sha1(json.dumps(key, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def set_name(path: Path, sha256: str) -> str:
+    return f"{path.stem}-{sha256[:16]}"
+
+
+def _major(version) -> str:
+    return str(version).split(".")[0]
+
+
+def _serializable(value) -> bool:
+    if isinstance(value, tuple):
+        return bool(value) and all(isinstance(v, go.Figure) for v in value)
+    return isinstance(value, go.Figure)
+
+
+def load_views(path: Path | None) -> list[dict]:
+    """Popular views from the views file: a JSON list of {"tab": name, ...filters}."""
+    path = path or Path(os.environ.get("UCDP_SNAPSHOT_VIEWS") or DEFAULT_VIEWS)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        views = json.load(f)
+    if not isinstance(views, list) or not all(isinstance(v, dict) and "tab" in v for v in views):
+        raise ValueError(f"{path}: expected a list of objects with a \"tab\" name")
+    return views
+
+
+def build(views: list[dict], root: Path) -> Path:
+    """Render every tab's default view plus `views` into a new snapshot set; returns its directory."""
+    from Tabs import registry
+    # The tabs' own lookup object, also when this module runs as __main__
+    from Tabs.snapshots import SNAPSHOTS as lookup
+
+    requested = [{"tab": name} for name in registry.TABS] + views
+    recorded, datasets, failures = {}, set(), 0
+    for view in requested:
+        filters = {k: v for k, v in view.items() if k != "tab"}
+        try:
+            tab = registry.get_tab(view["tab"])
+        except KeyError:
+            logger.error("Unknown tab %r in %s", view["tab"], view)
+            failures += 1
+            continue
+        render = getattr(tab, "precompute", None)
+        if render is None:
+            continue
+        datasets.add(tab.data_handler.filepath)
+        start = time.perf_counter()
+        try:
+            with lookup.recording() as rendered:
+                render(filters, session="snapshot")
+        except Exception:
+            logger.exception("Could not render %s", view)
+            failures += 1
+            continue
+        recorded.update(rendered)
+        logger.info("%s %s: %d view(s) in %.2f s", view["tab"], filters or "(defaults)", len(rendered),
+                    time.perf_counter() - start)
+
+    # Every tab reads the same dataset file; the set is named after its contents
+    if len(datasets) != 1 or not isinstance(next(iter(datasets)), Path):
+        raise SystemExit(f"expected the tabs to read one dataset file, got {sorted(map(str, datasets))}")
+    dataset = next(iter(datasets))
+    sha256 = content_hash(dataset)
+    directory = root / set_name(dataset, sha256)
+    staging = root / f".{directory.name}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    entries = {}
+    for key, value in recorded.items():
+        if not _serializable(value):
+            # e.g. a view with no data (None); it stays a live computation
+            continue
+        figures = value if isinstance(value, tuple) else (value,)
+        name = f"{key_id(key)}.json"
+        with open(staging / name, "w", encoding="utf-8") as f:
+            f.write('{"key":' + json.dumps(key) + ',"tuple":' + json.dumps(isinstance(value, tuple))
+                    + ',"figures":[' + ",".join(fig.to_json(validate=False) for fig in figures) + "]}")
+        entries[key_id(key)] = name
+    with open(staging / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump({"format": FORMAT, "dataset": dataset.name, "sha256": sha256, "plotly": plotly.__version__,
+                   "built_at": time.time(), "views": entries}, f, indent=1)
+
+    # Swap the finished set in; a server reading the old one keeps its open files
+    if directory.exists():
+        shutil.rmtree(directory)
+    os.replace(staging, directory)
+    if failures:
+        raise SystemExit(f"{failures} view(s) failed; snapshot set written without them: {directory}")
+    return directory
+
+
+def status(root: Path) -> None:
+    from Dataset.dataset import UCDP_Data
+
+    dataset = UCDP_Data(columns=["year_cy"]).filepath
+    current = set_name(dataset, content_hash(dataset)) if isinstance(dataset, Path) else None
+    sets = sorted(p for p in root.glob("*") if (p / MANIFEST).exists()) if root.exists() else []
+    if not sets:
+        print(f"No snapshot sets in {root}")
+    for directory in sets:
+        with open(directory / MANIFEST, encoding="utf-8") as f:
+            manifest = json.load(f)
+        size = sum(p.stat().st_size for p in directory.iterdir())
+        print(f"{directory.name:<44} {len(manifest['views']):>4} views {size / 2**20:>7.1f} MiB  plotly "
+              f"{manifest['plotly']}  built {time.strftime('%Y-%m-%d %H:%M', time.localtime(manifest['built_at']))}"
+              f"{'  (current dataset)' if directory.name == current else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render the tabs' default and popular views.")
+    parser.add_argument("command", choices=["build", "status"])
+    parser.add_argument("--views", type=Path, help="JSON list of extra views (default Tabs/snapshot_views.json)")
+    parser.add_argument("--dataset", help="dataset file to build from (sets UCDP_DATA_PATH)")
+    parser.add_argument("--root", type=Path, default=SNAPSHOTS.root, help="where snapshot sets are kept")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    if args.command == "status":
+        status(args.root)
+        return
+    if args.dataset:
+        os.environ["UCDP_DATA_PATH"] = args.dataset
+    start = time.perf_counter()
+    directory = build(load_views(args.views), args.root)
+    print(f"Snapshot set {directory} written in {time.perf_counter() - start:.1f} s")
+
+
+# One lookup per server process; UCDP_SNAPSHOT_DIR moves the sets elsewhere
+SNAPSHOTS = Snapshots(Path(os.environ.get("UCDP_SNAPSHOT_DIR") or DEFAULT_ROOT))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,40 @@
 import streamlit as st
 import plotly.express as px
-from Dataset.dataset import UCDP_Data
+from Dataset.aggregates import VIOLENCE_TYPES
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Tabs.figure_cache import FigureCache
+from Tabs.figure_payload import optimize
+from Instrumentation import tracing
+from Tabs import controls
+from Tabs.result_cache import result_key
+from Tabs.snapshots import SNAPSHOTS
+
+# Built (payload-optimized) choropleths shared by all sessions, keyed on (dataset, year range, violence type, countries)
+MAP_FIGURES = FigureCache(maxsize=32)
+
+DEFAULT_YEAR_RANGE = (2000, 2020)
+
+# Remove modebar buttons that allow zooming/panning and keep the chart responsive
+MAP_CONFIG = {
+    "responsive": True,
+    "scrollZoom": False,
+    "modeBarButtonsToRemove": [
+        "zoom2d",
+        "pan2d",
+        "zoomIn2d",
+        "zoomOut2d",
+        "autoScale2d",
+        "resetScale2d",
+        "select2d",
+        "lasso2d",
+    ],
+    "displaylogo": False,
+}
 
 
 class tab_five:
     def __init__(self):
-        self.data_handler = UCDP_Data()
+        self.data_handler = UCDP_Data(columns=VIEW_COLUMNS, compact=True)
 
     def display(self, sidebar):
         st.header("Geographic Distribution of Deaths")
@@ -15,16 +44,11 @@ class tab_five:
         )
 
         # Sidebar controls
-        filters = sidebar.expander("Filters", expanded=True)
+        filters = controls.filter_panel(sidebar, "filters_tab5")
         year_min, year_max = self.data_handler.get_year_range()
-        year_range = filters.slider("Year range", year_min, year_max, (2000, 2020), key = "slider_tab5")
-
-        violence_types = {
-            "sb_total_deaths_best_cy": "State-based",
-            "ns_total_deaths_best_cy": "Non-state",
-            "os_total_deaths_best_cy": "One-sided",
-            "cumulative_total_deaths_in_orgvio_best_cy": "All types (cumulative)"
-        }
+        year_range = filters.slider("Year range", year_min, year_max, DEFAULT_YEAR_RANGE, key = "slider_tab5")
+
+        violence_types = VIOLENCE_TYPES
         type_selected = filters.selectbox(
             "Type",
             options = list(violence_types.keys()),
@@ -38,23 +62,77 @@ class tab_five:
             default = [],
             key="multiselect_tab5"
         )
+        filters.close()
+
+        # One row per country-year for the selected type, read from the precomputed aggregate cube
+        tracing.tag(year_range=year_range, type=type_selected, countries=countries)
+
+        cube = self.data_handler.aggregates()
+        with tracing.span("aggregate"):
+            filtered, dropped = self.map_rows(cube, type_selected, year_range, countries)
 
-        # Filter and clean data
-        filtered = self.data_handler.filter_data(year_range, countries)
-        filtered = self.data_handler.clean_death_counts(filtered)
+        # Countries without an ISO-3 code have no geometry: they are left out, but not silently
+        if not dropped.empty:
+            st.caption(
+                f"Not shown on the map (no ISO-3 code): {', '.join(sorted(set(dropped['country_cy'])))} "
+                f"— {int(dropped[type_selected].sum()):,} deaths in the selected years."
+            )
 
         if filtered.empty:
             st.info("No data available for the selected filters.")
             return
 
-        speed = st.session_state.get("speed_slider_tab5_main", 800)
-
-        # Animated choropleth map
-        # st.subheader("Geographic Distribution of Deaths")
+        with tracing.span("figure.cache"):
+            cached = self.cached_map(cube, filtered, year_range, type_selected, countries)
+
+        self.animated_map(cached)
+
+    @st.fragment
+    def animated_map(self, cached):
+        # Moving the speed slider reruns only this region: the cached map is re-sent with the new speed
+        with tracing.fragment("Geospatial Heatmap", "map"):
+            speed = st.session_state.get("speed_slider_tab5_main", 800)
+            with tracing.span("figure.render"), cached.animation_speed(speed) as fig_map:
+                st.plotly_chart(fig_map, use_container_width = True, config = MAP_CONFIG)
+            st.slider("Animation Duration (ms)", min_value=100, max_value=2000, step=100, value=800, key="speed_slider_tab5_main",
+                        help="Adjust how quickly the animation plays — higher values = slower animation.")
+
+    def warm(self):
+        """Build and cache the default map (all countries, first violence type)."""
+        self.precompute({})
+
+    def precompute(self, view, session=None):
+        """Build the map for `view` ({"years", "type", "countries"}, defaults for the rest)."""
+        cube = self.data_handler.aggregates()
+        year_range = tuple(view.get("years", DEFAULT_YEAR_RANGE))
+        type_selected = view.get("type", next(iter(VIOLENCE_TYPES)))
+        countries = view.get("countries", [])
+        filtered, _ = self.map_rows(cube, type_selected, year_range, countries)
+        self.cached_map(cube, filtered, year_range, type_selected, countries)
+
+    def map_rows(self, cube, type_selected, year_range, countries):
+        # Country-year rows for the map, split into those with an ISO-3 code and those without
+        rows = cube.per_year_by_country(type_selected, year_range, countries, with_iso3=True)
+        missing = rows["iso3_cy"].isna()
+        return rows[~missing], rows[missing]
+
+    def cached_map(self, cube, filtered, year_range, type_selected, countries):
+        # The figure only depends on the data filters; speed changes reuse it and patch the play button
+        key = (tuple(year_range), type_selected, tuple(sorted(countries)))
+        def build():
+            with tracing.span("figure.build"):
+                return optimize(self.build_map(filtered, type_selected, VIOLENCE_TYPES), "Choropleth map")
+
+        snapshot_key = result_key("tab_five.map", years=year_range, type=type_selected, countries=countries)
+        return MAP_FIGURES.get(key, lambda: SNAPSHOTS.get(self.data_handler.filepath, snapshot_key, build),
+                               source=cube)
+
+    def build_map(self, filtered, type_selected, violence_types):
+        # Animated choropleth map, located by the ISO-3 codes resolved at load time
         fig_map = px.choropleth(
             filtered,
-            locations = "country_cy",
-            locationmode = "country names",
+            locations = "iso3_cy",
+            locationmode = "ISO-3",
             color = type_selected,
             hover_name = "country_cy",
             animation_frame = "year_cy",
@@ -62,7 +140,6 @@ class tab_five:
             color_continuous_scale="Reds"
         )
 
-
         # Make the figure larger and improve layout for readability
         fig_map.update_layout(
             height = 750,
@@ -73,33 +150,4 @@ class tab_five:
 
         # Disable interactive panning/zooming while preserving hover and animation
         fig_map.update_layout(dragmode=False)
-
-        if 'updatemenus' in fig_map.layout and len(fig_map.layout.updatemenus) > 0:
-            try:
-                fig_map.layout.updatemenus[0].buttons[0].args[1]['frame']['duration'] = int(speed)
-                fig_map.layout.updatemenus[0].buttons[0].args[1]['transition']['duration'] = int(speed) // 2
-                fig_map.layout.updatemenus[0].buttons[0].args[1]['transition']['easing'] = 'linear'
-            except Exception:
-                pass
-
-        # Remove modebar buttons that allow zooming/panning and keep the chart responsive
-        config = {
-            "responsive": True,
-            "scrollZoom": False,
-            "modeBarButtonsToRemove": [
-                "zoom2d",
-                "pan2d",
-                "zoomIn2d",
-                "zoomOut2d",
-                "autoScale2d",
-                "resetScale2d",
-                "select2d",
-                "lasso2d",
-            ],
-            "displaylogo": False,
-        }
-
-        st.plotly_chart(fig_map, use_container_width = True, config = config)
-
-        st.slider("Animation Duration (ms)", min_value=100, max_value=2000, step=100, value=800, key="speed_slider_tab5_main",
-                    help="Adjust how quickly the animation plays — higher values = slower animation.")
+        return fig_map
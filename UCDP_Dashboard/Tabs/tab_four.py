@@ -1,11 +1,18 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from Dataset.dataset import UCDP_Data
+from Dataset.aggregates import VIOLENCE_TYPES
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Instrumentation import tracing
+from Tabs import controls
+from Tabs.result_cache import RESULTS, result_key
+from Tabs.snapshots import SNAPSHOTS
+
+DEFAULT_YEAR_RANGE = (2000, 2020)
 
 class tab_four:
     def __init__(self):
-        self.data_handler = UCDP_Data()
+        self.data_handler = UCDP_Data(columns=VIEW_COLUMNS, compact=True)
 
     def display(self, sidebar):
         st.header("Regional Analysis")
@@ -17,16 +24,11 @@ class tab_four:
         )
 
         # Sidebar controls (render into provided container)
-        filters = sidebar.expander("Filters", expanded=True)
+        filters = controls.filter_panel(sidebar, "filters_tab4")
         year_min, year_max = self.data_handler.get_year_range()
-        year_range = filters.slider("Year range", year_min, year_max, (2000, 2020), key = "slider_tab4")
-
-        violence_types = {
-            "sb_total_deaths_best_cy": "State-based",
-            "ns_total_deaths_best_cy": "Non-state",
-            "os_total_deaths_best_cy": "One-sided",
-            "cumulative_total_deaths_in_orgvio_best_cy": "All types (cumulative)"
-        }
+        year_range = filters.slider("Year range", year_min, year_max, DEFAULT_YEAR_RANGE, key = "slider_tab4")
+
+        violence_types = VIOLENCE_TYPES
         type_selected = filters.selectbox(
             "Type",
             options = list(violence_types.keys()),
@@ -57,25 +59,20 @@ class tab_four:
                 default = [],
                 key="multiselect_tab4"
             )
+            filters.close()
+
+            # Aggregates for the selected region come from the precomputed cube (countries optional)
+            cube = self.data_handler.aggregates()
 
-            # Filter and clean data for the selected region (countries optional)
-            filtered = self.data_handler.filter_data(year_range, countries, region=region_selected)
-            filtered = self.data_handler.clean_death_counts(filtered)
+            tracing.tag(year_range=year_range, type=type_selected, mode=compare_mode,
+                        region=region_selected, countries=countries)
 
             # If no countries chosen, pick top 5 countries by cumulative deaths in region
             if not countries:
-                top_countries = (
-                    filtered.groupby("country_cy")[list(violence_types.keys())]
-                    .sum()
-                    .sum(axis=1)
-                    .sort_values(ascending=False)
-                    .head(5)
-                    .index
-                    .tolist()
-                )
-                countries = top_countries
-
-            self.compare_countries_in_region(filtered, type_selected, violence_types, region_selected, countries)
+                with tracing.span("aggregate.top_countries"):
+                    countries = self.top_countries(cube, year_range, region_selected)
+
+            self.compare_countries_in_region(cube, year_range, type_selected, violence_types, region_selected, countries)
 
         else:
             # Regions vs Regions mode
@@ -85,15 +82,45 @@ class tab_four:
                 default = regions[:3],
                 key="multiselect_regions_tab4"
             )
+            filters.close()
 
-            # Filter data for year range (regions selected later when aggregating)
-            filtered = self.data_handler.filter_data(year_range)
-            filtered = self.data_handler.clean_death_counts(filtered)
+            # Region rollups for the year range come from the precomputed cube
+            cube = self.data_handler.aggregates()
 
             if not selected_regions:
                 selected_regions = regions[:2]
 
-            self.compare_regions(filtered, type_selected, violence_types, selected_regions)
+            tracing.tag(year_range=year_range, type=type_selected, mode=compare_mode, regions=selected_regions)
+
+            self.compare_regions(cube, year_range, type_selected, violence_types, selected_regions)
+
+    def warm(self):
+        """Precompute both default views (top countries of the first region, the first three regions)
+        into the shared result cache."""
+        self.precompute({}, session="warmup")
+
+    def precompute(self, view, session=None):
+        """Compute the views for `view` ({"years", "type", "region", "countries", "regions"}): the
+        countries view, and the regions view too unless only a region or countries are given."""
+        cube = self.data_handler.aggregates()
+        regions = list(self.data_handler.get_regions())
+        if not regions:
+            return
+        year_range = tuple(view.get("years", DEFAULT_YEAR_RANGE))
+        type_selected = view.get("type", next(iter(VIOLENCE_TYPES)))
+        if "regions" not in view:
+            region = view.get("region", regions[0])
+            # Without a country selection the tab shows the region's top countries
+            countries = view.get("countries") or self.top_countries(cube, year_range, region)
+            self.country_figures(cube, year_range, type_selected, VIOLENCE_TYPES, region, countries, session=session)
+        if "region" not in view and "countries" not in view:
+            self.region_figures(cube, year_range, type_selected, VIOLENCE_TYPES, view.get("regions", regions[:3]),
+                                session=session)
+
+    def top_countries(self, cube, year_range, region_selected, n=5):
+        # Countries with the most deaths of all types in the region over the selected years
+        codes = cube.rankings.top_country_codes(list(VIOLENCE_TYPES.keys()), year_range, n, region=region_selected)
+        return cube.countries[codes].tolist()
 
     def regional_analysis(self, filtered, type_selected, violence_types, region_selected):
         st.subheader(f"Total Deaths per Year in {region_selected} ({violence_types[type_selected]})")
@@ -107,24 +134,48 @@ class tab_four:
         )
         st.plotly_chart(fig_region_time, use_container_width = True)
 
-    def compare_countries_in_region(self, filtered, type_selected, violence_types, region_selected, countries):
+    def compare_countries_in_region(self, cube, year_range, type_selected, violence_types, region_selected, countries):
         st.subheader(f"Compare Countries in {region_selected} ({violence_types[type_selected]})")
-        if filtered.empty:
+
+        figures = self.country_figures(cube, year_range, type_selected, violence_types, region_selected, countries)
+        if figures is None:
             st.info("No data available for the selected filters.")
             return
 
-        # Aggregate deaths per year per country
-        agg = (
-            filtered[filtered["country_cy"].isin(countries)]
-            .groupby(["year_cy", "country_cy"])[type_selected]
-            .sum()
+        fig, fig2 = figures
+        with tracing.span("figure.render"):
+            st.plotly_chart(fig, use_container_width = True)
+            st.plotly_chart(fig2, use_container_width = True)
+
+    def country_figures(self, cube, year_range, type_selected, violence_types, region_selected, countries, session=None):
+        """(line, bar) figures for the countries view, or None without data; kept between reruns."""
+        def build():
+            with tracing.span("aggregate"):
+                agg, total_by_country = self.country_comparison(cube, year_range, type_selected, region_selected, countries)
+            if agg.empty:
+                return None
+            with tracing.span("figure.build"):
+                return self.build_country_figures(agg, total_by_country, type_selected, violence_types, region_selected)
+
+        key = result_key("tab_four.countries", years=year_range, type=type_selected, region=region_selected,
+                         countries=countries)
+        with tracing.span("result_cache"):
+            return RESULTS.get(key, lambda: SNAPSHOTS.get(self.data_handler.filepath, key, build), source=cube,
+                               session=session)
+
+    def country_comparison(self, cube, year_range, type_selected, region_selected, countries):
+        # Deaths per year per country
+        agg = cube.per_year_by_country(type_selected, year_range, countries, region_selected)
+
+        # Total deaths per country across the selected years
+        total_by_country = (
+            cube.totals_by_country(type_selected, year_range, countries, region_selected)
             .reset_index()
+            .sort_values(type_selected, ascending = False)
         )
+        return agg, total_by_country
 
-        if agg.empty:
-            st.info("No data for the selected countries in this region.")
-            return
-
+    def build_country_figures(self, agg, total_by_country, type_selected, violence_types, region_selected):
         fig = px.line(
             agg,
             x = "year_cy",
@@ -133,13 +184,8 @@ class tab_four:
             title = f"{violence_types[type_selected]} over time by country in {region_selected}",
             labels = {type_selected: "Deaths", "year_cy": "Year", "country_cy": "Country"}
         )
-        st.plotly_chart(fig, use_container_width = True)
 
         # Also show a stacked bar of total deaths per country across the selected years
-        total_by_country = (
-            agg.groupby("country_cy")[type_selected].sum().reset_index().sort_values(type_selected, ascending = False)
-        )
-
         fig2 = px.bar(
             total_by_country,
             x = type_selected,
@@ -148,23 +194,48 @@ class tab_four:
             title = f"Total {violence_types[type_selected]} in {region_selected} (selected years)",
             labels = {type_selected: "Deaths", "country_cy": "Country"}
         )
-        st.plotly_chart(fig2, use_container_width = True)
+        return fig, fig2
 
-    def compare_regions(self, filtered, type_selected, violence_types, selected_regions):
+    def compare_regions(self, cube, year_range, type_selected, violence_types, selected_regions):
         st.subheader(f"Compare Regions ({violence_types[type_selected]})")
 
-        # Aggregate deaths per year per region
-        agg = (
-            filtered[filtered["region_cy"].isin(selected_regions)]
-            .groupby(["year_cy", "region_cy"])[type_selected]
-            .sum()
-            .reset_index()
-        )
-
-        if agg.empty:
+        figures = self.region_figures(cube, year_range, type_selected, violence_types, selected_regions)
+        if figures is None:
             st.info("No data available for the selected regions in the chosen year range.")
             return
 
+        fig, fig2 = figures
+        with tracing.span("figure.render"):
+            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width = True)
+
+    def region_figures(self, cube, year_range, type_selected, violence_types, selected_regions, session=None):
+        """(line, bar) figures for the regions view, or None without data; kept between reruns."""
+        def build():
+            with tracing.span("aggregate"):
+                agg, total_by_region = self.region_comparison(cube, year_range, type_selected, selected_regions)
+            if agg.empty:
+                return None
+            with tracing.span("figure.build"):
+                return self.build_region_figures(agg, total_by_region, type_selected, violence_types)
+
+        key = result_key("tab_four.regions", years=year_range, type=type_selected, regions=selected_regions)
+        with tracing.span("result_cache"):
+            return RESULTS.get(key, lambda: SNAPSHOTS.get(self.data_handler.filepath, key, build), source=cube,
+                               session=session)
+
+    def region_comparison(self, cube, year_range, type_selected, selected_regions):
+        # Deaths per year per region
+        agg = cube.per_year_by_region(type_selected, year_range, selected_regions)
+
+        # Total deaths per region across selected years, largest first
+        total_by_region = (
+            cube.rankings.top_regions(type_selected, year_range, len(selected_regions), selected_regions)
+            .reset_index()
+        )
+        return agg, total_by_region
+
+    def build_region_figures(self, agg, total_by_region, type_selected, violence_types):
         # Line chart: regions over time
         fig = px.line(
             agg,
@@ -174,12 +245,8 @@ class tab_four:
             title = f"{violence_types[type_selected]} over time by region",
             labels = {type_selected: "Deaths", "year_cy": "Year", "region_cy": "Region"}
         )
-        st.plotly_chart(fig, use_container_width=True)
 
         # Bar chart: total deaths per region across selected years
-        total_by_region = (
-            agg.groupby("region_cy")[type_selected].sum().reset_index().sort_values(type_selected, ascending = False)
-        )
         fig2 = px.bar(
             total_by_region,
             x = type_selected,
@@ -188,5 +255,4 @@ class tab_four:
             title = f"Total {violence_types[type_selected]} by region (selected years)",
             labels = {type_selected: "Deaths", "region_cy": "Region"}
         )
-        st.plotly_chart(fig2, use_container_width = True)
-
+        return fig, fig2
@@ -71,6 +71,7 @@ class tab_one:
             - **Comparisons (Animated):** Compare how different countries and violence types evolve dynamically  
             - **Regional Analysis:** Examine conflict distribution across world regions  
             - **Geospatial Heatmaps:** Visualize where conflict intensity is concentrated on the map  
+            - **Actors/Dyads:** Find a dyad by name or id and see the country-years it is active in  
             """
         )
 
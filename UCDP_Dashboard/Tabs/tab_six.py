@@ -0,0 +1,133 @@
+import time
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from Dataset.dataset import UCDP_Data, DYAD_VIEW_COLUMNS
+from Dataset.dyads import DYAD_TYPES
+from Instrumentation import tracing
+from Tabs import controls
+from Tabs.result_cache import RESULTS, result_key
+
+# Matches listed for a search; the index answers beyond this, the table just stops
+MAX_MATCHES = 50
+
+
+class tab_six:
+    def __init__(self):
+        self.data_handler = UCDP_Data(columns=DYAD_VIEW_COLUMNS, compact=True)
+
+    def display(self, sidebar):
+        st.header("Actors and Dyads")
+        st.write(
+            "Look up a dyad (the two sides of a conflict, or an actor and civilians) by name or by "
+            "UCDP dyad id, and see every country-year it appears in."
+        )
+
+        # Sidebar controls
+        filters = controls.filter_panel(sidebar, "filters_tab6")
+        year_min, year_max = self.data_handler.get_year_range()
+        year_range = filters.slider("Year range", year_min, year_max, (year_min, year_max), key="slider_tab6")
+        dyad_type = filters.selectbox(
+            "Type",
+            options = [None] + list(DYAD_TYPES),
+            format_func = lambda t: "All types" if t is None else DYAD_TYPES[t],
+            key="type_tab6"
+        )
+        filters.close()
+
+        text = st.text_input(
+            "Search dyads",
+            key="search_tab6",
+            placeholder="Words of a name (e.g. \"gov afgh taleban\") or a dyad id (e.g. 726)",
+        ).strip()
+        tracing.tag(search=text, year_range=year_range, type=dyad_type)
+
+        index = self.data_handler.dyad_index()
+        start = time.perf_counter()
+        with tracing.span("dyads.lookup"):
+            if text.isdigit():
+                matches = index.id_matches(text, dyad_type)
+            else:
+                matches = index.search(text, dyad_type, limit=MAX_MATCHES)
+        lookup_ms = (time.perf_counter() - start) * 1000
+
+        if not len(matches):
+            st.info(f"No dyad matches \"{text}\".")
+            return
+
+        st.subheader("Matching dyads" if text else "Dyads with the most country-years")
+        st.dataframe(self.match_table(index, matches), hide_index=True, use_container_width=True)
+        st.caption(f"{len(matches)} match{'es' if len(matches) != 1 else ''} in {lookup_ms:.2f} ms"
+                   + (f" (first {MAX_MATCHES} shown)" if len(matches) == MAX_MATCHES else "") + ".")
+
+        name = st.selectbox("Dyad", options=index.names[matches].tolist(), key="dyad_tab6")
+        self.dyad_detail(index, index.name_code(name), year_range)
+
+    def warm(self):
+        """Parse the dyad columns into the shared dyad index."""
+        self.data_handler.dyad_index()
+
+    def match_table(self, index, matches):
+        return pd.DataFrame({
+            "Dyad": index.names[matches],
+            "Type": [DYAD_TYPES[index.type_of_name(c)] for c in matches],
+            "Country-years": index.name_offsets[matches + 1] - index.name_offsets[matches],
+            "Dyad ids": [", ".join(map(str, index.ids_for_name(c))) for c in matches],
+        })
+
+    def dyad_detail(self, index, code, year_range):
+        dyad_type = index.type_of_name(code)
+        start = time.perf_counter()
+        with tracing.span("dyads.rows"):
+            rows = index.rows_for_name(code)
+            rows = rows[(index.years[rows] >= year_range[0]) & (index.years[rows] <= year_range[1])]
+        lookup_ms = (time.perf_counter() - start) * 1000
+        country_years = index.country_years(rows, dyad_type)
+
+        st.subheader(index.names[code])
+        if country_years.empty:
+            st.info("This dyad is not active in the selected years.")
+            return
+
+        with tracing.span("result_cache"):
+            fig = RESULTS.get(
+                result_key("tab_six.timeline", dyad=index.names[code], years=year_range),
+                lambda: self.build_timeline(country_years, dyad_type),
+                source=index,
+            )
+        with tracing.span("figure.render"):
+            st.plotly_chart(fig, use_container_width=True)
+
+        deaths_column = f"{dyad_type}_total_deaths_best_cy"
+        st.dataframe(
+            country_years.rename(columns={"year_cy": "Year", "country_cy": "Country",
+                                          deaths_column: f"{DYAD_TYPES[dyad_type]} deaths (country-year)"}),
+            hide_index=True, use_container_width=True,
+        )
+
+        ambiguous = [int(index.ids[c]) for c in map(index.id_code, index.ids_for_name(code)) if index.id_name[c] < 0]
+        st.caption(
+            f"{len(country_years)} country-years, found in {lookup_ms:.2f} ms. Deaths are the country-year's "
+            f"{DYAD_TYPES[dyad_type].lower()} total, not this dyad's own."
+            + (f" UCDP only lists dyad id{'s' if len(ambiguous) > 1 else ''} "
+               f"{', '.join(map(str, ambiguous))} together with other dyads, so which of them carries this name "
+               f"cannot be told from the country-year data." if ambiguous else "")
+        )
+
+    def build_timeline(self, country_years, dyad_type):
+        # One marker per country-year the dyad is listed in
+        with tracing.span("figure.build"):
+            deaths_column = f"{dyad_type}_total_deaths_best_cy"
+            fig = px.scatter(
+                country_years,
+                x = "year_cy",
+                y = "country_cy",
+                color = deaths_column if deaths_column in country_years else None,
+                color_continuous_scale = "Reds",
+                labels = {"year_cy": "Year", "country_cy": "Country", deaths_column: "Deaths"},
+                title = "Country-years the dyad is active in",
+            )
+            fig.update_traces(marker = dict(size = 10, symbol = "square"))
+            fig.update_layout(height = max(250, 60 + 40 * country_years["country_cy"].nunique()), title_x = 0.5)
+            return fig
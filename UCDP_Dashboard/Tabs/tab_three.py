@@ -1,81 +1,101 @@
-import pandas as pd
 import streamlit as st
 import plotly.express as px
-from Dataset.dataset import UCDP_Data
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS
+from Dataset.bar_race import bar_race, CONFLICT_TYPE_LABELS
+from Instrumentation import tracing
+from Tabs import controls
+from Tabs.figure_cache import FigureCache
+from Tabs.figure_payload import optimize
+from Tabs.result_cache import result_key
+from Tabs.snapshots import SNAPSHOTS
+
+# Built (payload-optimized) bar races shared by all sessions, keyed on (dataset, year range, countries, top N)
+RACE_FIGURES = FigureCache(maxsize=32)
+
+DEFAULT_YEAR_RANGE = (2000, 2020)
+DEFAULT_TOP_N = 10
+DEFAULT_SPEED = 800
 
 class tab_three:
     def __init__(self):
-        self.data_handler = UCDP_Data()
+        self.data_handler = UCDP_Data(columns=VIEW_COLUMNS, compact=True)
 
     def display(self, sidebar):
         st.header("Animated Deaths Over Time")
         st.write(
             "The Animated Deaths tab presents a dynamic bar chart showing how deaths from state-based, "
-            "non-state, and one-sided conflicts change over time. It highlights the top 10 most affected "
-            "countries each year, allowing users to track shifts in conflict intensity and compare how "
-            "different types of violence evolve across nations. Users can also filter and compare specific "
-            "countries through the sidebar controls."
+            "non-state, and one-sided conflicts change over time. It highlights the most affected countries "
+            "each year (top 10 by default, adjustable in the sidebar), allowing users to track shifts in "
+            "conflict intensity and compare how different types of violence evolve across nations. "
+            "Users can also filter and compare specific countries through the sidebar controls."
         )
 
 
         # Sidebar controls (render into provided container)
-        filters = sidebar.expander("Filters", expanded=True)
+        filters = controls.filter_panel(sidebar, "filters_tab3")
         year_min, year_max = self.data_handler.get_year_range()
-        year_range = filters.slider("Year range", year_min, year_max, (2000, 2020), key = "slider_tab3")
+        year_range = filters.slider("Year range", year_min, year_max, DEFAULT_YEAR_RANGE, key = "slider_tab3")
         countries = filters.multiselect(
             "Countries",
             self.data_handler.get_countries(),
             default = []
         )
 
-        # Filter and clean data
-        filtered = self.data_handler.filter_data(year_range, countries)
-        filtered = self.data_handler.clean_death_counts(filtered)
+        top_n = filters.slider("Top N countries", 5, 50, DEFAULT_TOP_N, step = 5, key = "top_n_tab3")
+        filters.close()
 
-        # Melt the data
-        melted = filtered.melt(
-            id_vars = ["year_cy", "country_cy"],
-            value_vars = ["sb_total_deaths_best_cy", "ns_total_deaths_best_cy", "os_total_deaths_best_cy"],
-            var_name = "Conflict Type",
-            value_name = "Deaths"
-        )
+        tracing.tag(year_range=year_range, countries=countries, top_n=top_n)
 
-        conflict_type_labels = {
-            "sb_total_deaths_best_cy": "State-based",
-            "ns_total_deaths_best_cy": "Non-state",
-            "os_total_deaths_best_cy": "One-sided"
-        }
-        melted["Conflict Type"] = melted["Conflict Type"].map(conflict_type_labels)
-
-        # Find total deaths by country across the selected range and pick top N overall
-        total_deaths = (
-            melted.groupby(["year_cy", "country_cy"])['Deaths']
-            .sum()
-            .reset_index()
-        )
+        speed = st.session_state.get("speed_slider_tab3_main", DEFAULT_SPEED)
 
-        # Choose a stable set of top countries across the entire selected range.
-        # Take the top N by summed deaths over the filtered years.
-        N = min(10, melted['country_cy'].nunique())
-        top_countries = (
-            total_deaths.groupby('country_cy')['Deaths']
-            .sum()
-            .nlargest(N)
-            .index
-            .tolist()
-        )
+        with tracing.span("figure.cache"):
+            cached = self.cached_figure(self.data_handler.aggregates(), year_range, countries, top_n, speed)
+        self.animated_chart(cached)
+
+    @st.fragment
+    def animated_chart(self, cached):
+        # Moving the speed slider reruns only this region: the cached figure is re-sent with the new speed
+        with tracing.fragment("Comparisons (Animated)", "bar_race"):
+            speed = st.session_state.get("speed_slider_tab3_main", DEFAULT_SPEED)
+            with tracing.span("figure.render"), cached.animation_speed(speed) as fig:
+                st.plotly_chart(fig, use_container_width = True)
+            st.slider("Animation Duration (ms)", min_value=100, max_value=2000, step=100, value=DEFAULT_SPEED, key="speed_slider_tab3_main",
+                        help="Adjust how quickly the animation plays — higher values = slower animation.")
+
+    def warm(self):
+        """Build and cache the default bar race."""
+        self.precompute({})
+
+    def precompute(self, view, session=None):
+        """Build the bar race for `view` ({"years", "countries", "top_n"}, defaults for the rest)."""
+        self.cached_figure(self.data_handler.aggregates(), tuple(view.get("years", DEFAULT_YEAR_RANGE)),
+                           view.get("countries", []), view.get("top_n", DEFAULT_TOP_N), DEFAULT_SPEED)
+
+    def cached_figure(self, cube, year_range, countries, top_n, speed):
+        # The figure only depends on the data filters; speed changes reuse it and patch the play button
+        key = (tuple(year_range), tuple(sorted(countries)), top_n)
+
+        def build():
+            # Top-N selection, per-frame values and axis bound come from one memoized pipeline over the cube.
+            # Dense frames keep the country list identical in every frame so it is only sent once.
+            with tracing.span("aggregate"):
+                race = bar_race(cube, year_range, countries, top_n, dense=True)
+            merged = race.frames
 
-        merged = melted[melted['country_cy'].isin(top_countries)].copy()
+            # Fix category order so the countries keep the same vertical position across frames
+            country_order = race.countries
 
-        # Fix category order so the countries keep the same vertical position across frames
-        country_order = top_countries
-        merged['country_cy'] = pd.Categorical(merged['country_cy'], categories=country_order[::-1], ordered=True)
+            # Fixed x-axis range based on max total deaths across countries and years
+            max_total = race.x_max
 
-        # Compute a fixed x-axis range based on max total deaths across countries and years
-        max_total = total_deaths.groupby(['year_cy', 'country_cy'])['Deaths'].sum().max()
+            with tracing.span("figure.build"):
+                return optimize(self.build_figure(merged, country_order, max_total, speed), "Animated bar race")
 
-        speed = st.session_state.get("speed_slider_tab3_main", 800)
+        snapshot_key = result_key("tab_three.race", years=year_range, countries=countries, top_n=top_n)
+        return RACE_FIGURES.get(key, lambda: SNAPSHOTS.get(self.data_handler.filepath, snapshot_key, build),
+                                source=cube)
 
+    def build_figure(self, merged, country_order, max_total, speed):
         fig = px.bar(
             merged,
             x = "Deaths",
@@ -85,7 +105,7 @@ class tab_three:
             animation_frame = "year_cy",
             animation_group = "country_cy",
             barmode = "group",
-            category_orders={'country_cy': country_order[::-1]},
+            category_orders={'country_cy': country_order[::-1], 'Conflict Type': list(CONFLICT_TYPE_LABELS.values())},
             labels = {"country_cy": "Country", "Deaths": "Number of Deaths"},
             title = "Animated Deaths by Conflict Type and Country Over Time"
         )
@@ -105,7 +125,5 @@ class tab_three:
                 fig.layout.updatemenus[0].buttons[0].args[1]['transition']['easing'] = 'linear'
             except Exception:
                 pass
-        st.plotly_chart(fig, use_container_width = True)
-        st.slider("Animation Duration (ms)", min_value=100, max_value=2000, step=100, value=800, key="speed_slider_tab3_main",
-                    help="Adjust how quickly the animation plays — higher values = slower animation.")
+        return fig
         
\ No newline at end of file
@@ -1,10 +1,18 @@
 import streamlit as st
 import plotly.express as px
-from Dataset.dataset import UCDP_Data
+from Dataset.dataset import UCDP_Data, VIEW_COLUMNS, DATASET_VERSIONS
+from Dataset.aggregates import VIOLENCE_TYPES, deaths_per_year_by_version, version_changes
+from Instrumentation import tracing
+from Tabs import controls
+from Tabs.result_cache import RESULTS, result_key
+from Tabs.snapshots import SNAPSHOTS
+
+DEFAULT_YEAR_RANGE = (2000, 2020)
+
 
 class tab_two:
     def __init__(self):
-        self.data_handler = UCDP_Data()
+        self.data_handler = UCDP_Data(columns=VIEW_COLUMNS, compact=True)
 
     def display(self, sidebar):
         st.header("Trends")
@@ -15,16 +23,31 @@ class tab_two:
         )
 
         # Sidebar controls (rendered into the provided container)        
-        filters = sidebar.expander("Filters", expanded=True)
-        year_min, year_max = self.data_handler.get_year_range()
-        year_range = filters.slider("Year range", year_min, year_max, (2000, 2020), key = "slider_tab2")
-
-        violence_types = {
-            "sb_total_deaths_best_cy": "State-based",
-            "ns_total_deaths_best_cy": "Non-state",
-            "os_total_deaths_best_cy": "One-sided",
-            "cumulative_total_deaths_in_orgvio_best_cy": "All types (cumulative)"
-        }
+        filters = controls.filter_panel(sidebar, "filters_tab2")
+
+        # Release selection only appears when more than one UCDP version is on disk
+        version, compare_with = self.data_handler.version, None
+        versions = DATASET_VERSIONS.versions()
+        if len(versions) > 1:
+            version = filters.selectbox(
+                "Dataset version",
+                options = versions,
+                index = versions.index(version) if version in versions else len(versions) - 1,
+                format_func = lambda v: f"v{v}",
+                key="version_tab2"
+            )
+            compare_with = filters.selectbox(
+                "Compare with",
+                options = [None] + [v for v in versions if v != version],
+                format_func = lambda v: "No comparison" if v is None else f"v{v}",
+                key="compare_version_tab2"
+            )
+        handler = self.handler_for(version)
+
+        year_min, year_max = handler.get_year_range()
+        year_range = filters.slider("Year range", year_min, year_max, DEFAULT_YEAR_RANGE, key = "slider_tab2")
+
+        violence_types = VIOLENCE_TYPES
         type_selected = filters.selectbox(
             "Type",
             options = list(violence_types.keys()),
@@ -33,26 +56,105 @@ class tab_two:
 
         countries = filters.multiselect(
             "Countries",
-            self.data_handler.get_countries(),
+            handler.get_countries(),
             default = [],
             key="multiselect_tab2"
         )
+        filters.close()
+
+        tracing.tag(year_range=year_range, type=type_selected, countries=countries, version=version,
+                    compare_with=compare_with)
 
-        # Filter and clean data
-        filtered = self.data_handler.filter_data(year_range, countries)
-        filtered = self.data_handler.clean_death_counts(filtered)
+        if compare_with is not None:
+            # Both releases' cubes; other versions are loaded on first use and evicted least-recently-used
+            cubes = {version: handler.aggregates(), compare_with: self.handler_for(compare_with).aggregates()}
+            self.version_comparison(cubes, year_range, type_selected, violence_types, countries, version, compare_with)
+            return
 
-        self.time_series_analysis(filtered, type_selected, violence_types)
+        self.time_series_analysis(handler.aggregates(), version, year_range, type_selected, violence_types, countries)
 
-    def time_series_analysis(self, filtered, type_selected, violence_types):
+    def handler_for(self, version):
+        """Data handler for a release; the tab's own handler for its default version."""
+        if version is None or version == self.data_handler.version:
+            return self.data_handler
+        return UCDP_Data(version=version, columns=VIEW_COLUMNS, compact=True)
+
+    def warm(self):
+        """Precompute the default view (cube, yearly totals, figure) into the shared result cache."""
+        self.precompute({}, session="warmup")
+
+    def precompute(self, view, session=None):
+        """Compute the trend for `view` ({"years", "type", "countries"}, defaults for the rest)."""
+        self.time_series_figure(self.data_handler.aggregates(), self.data_handler.version,
+                                tuple(view.get("years", DEFAULT_YEAR_RANGE)), view.get("type", next(iter(VIOLENCE_TYPES))),
+                                VIOLENCE_TYPES, view.get("countries", []), session=session)
+
+    def time_series_analysis(self, cube, version, year_range, type_selected, violence_types, countries):
         st.subheader(f"Total Deaths per Year ({violence_types[type_selected]})")
-        deaths_per_year = filtered.groupby("year_cy")[type_selected].sum().reset_index()
-        fig_time = px.line(
+        fig_time = self.time_series_figure(cube, version, year_range, type_selected, violence_types, countries)
+        with tracing.span("figure.render"):
+            st.plotly_chart(fig_time, use_container_width=True)
+
+    def time_series_figure(self, cube, version, year_range, type_selected, violence_types, countries, session=None):
+        """Yearly totals (straight from the aggregate cube) as a line chart; kept between reruns."""
+        def build():
+            with tracing.span("aggregate"):
+                deaths_per_year = cube.deaths_per_year(type_selected, year_range, countries)
+            with tracing.span("figure.build"):
+                return self.build_time_series(deaths_per_year, type_selected, violence_types)
+
+        key = result_key("tab_two.trend", version=version, years=year_range, type=type_selected, countries=countries)
+        path = self.handler_for(version).filepath
+        with tracing.span("result_cache"):
+            # Pre-rendered views come from the snapshot set, the rest are built live
+            return RESULTS.get(key, lambda: SNAPSHOTS.get(path, key, build), source=cube, session=session)
+
+    def version_comparison(self, cubes, year_range, type_selected, violence_types, countries, base, other):
+        st.subheader(f"Total Deaths per Year ({violence_types[type_selected]}): v{base} vs v{other}")
+
+        def build():
+            with tracing.span("aggregate"):
+                by_version = deaths_per_year_by_version(cubes, type_selected, year_range, countries)
+                changes = version_changes(by_version, type_selected, base, other)
+            with tracing.span("figure.build"):
+                return (*self.build_version_comparison(by_version, changes, type_selected, violence_types, base, other),
+                        changes)
+
+        key = result_key("tab_two.versions", base=base, other=other, years=year_range, type=type_selected,
+                         countries=countries)
+        with tracing.span("result_cache"):
+            fig, fig_change, changes = RESULTS.get(key, build, source=(cubes[base], cubes[other]))
+        with tracing.span("figure.render"):
+            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig_change, use_container_width=True)
+        st.caption(
+            f"v{base}: {changes[base].sum():,} deaths, v{other}: {changes[other].sum():,} deaths "
+            f"({changes['change'].sum():+,}); {int((changes['change'] != 0).sum())} of {len(changes)} years revised."
+        )
+
+    def build_version_comparison(self, by_version, changes, type_selected, violence_types, base, other):
+        fig = px.line(
+            by_version.assign(version = "v" + by_version["version"]),
+            x = "year_cy",
+            y = type_selected,
+            color = "version",
+            title = f"Deaths Over Time ({violence_types[type_selected]}) by Release",
+            labels = {type_selected: "Deaths", "year_cy": "Year", "version": "Release"}
+        )
+        fig_change = px.bar(
+            changes,
+            x = "year_cy",
+            y = "change",
+            title = f"Revision from v{base} to v{other}",
+            labels = {"change": "Change in deaths", "year_cy": "Year"}
+        )
+        return fig, fig_change
+
+    def build_time_series(self, deaths_per_year, type_selected, violence_types):
+        return px.line(
             deaths_per_year,
             x = "year_cy",
             y = type_selected,
             title = f"Deaths Over Time ({violence_types[type_selected]})",
             labels = {type_selected: "Deaths", "year_cy": "Year"}
         )
-        
-        st.plotly_chart(fig_time, use_container_width=True)
@@ -0,0 +1,116 @@
+"""Server warm-up and background dataset refresh.
+
+`start()` is called by main.py at the end of every rerun but only does anything the first
+time in a process: it starts one daemon thread that constructs every tab (loading the dataset,
+cube and filter index), precomputes each tab's default view (the one its DEFAULT_* filter
+constants produce, through the tab's `warm()`), and then watches the loaded files. When
+a file changes on disk the thread refreshes it through the shared store (the old
+generation keeps being served until the new one is complete) and warms the default
+views again. The dataset modules (and pandas with them) are imported on that
+thread, so importing this module keeps the landing page light.
+
+Configuration (environment):
+    UCDP_WARMUP=0                 disable warm-up and background refresh
+    UCDP_REFRESH_SECONDS          how often to check the dataset files (default 30)
+"""
+import logging
+import os
+import threading
+import time
+
+from Instrumentation import tracing
+from Tabs import registry
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+# Seconds the last warm-up took per tab, and when the whole warm-up last finished
+warm_seconds: dict[str, float] = {}
+last_warmed_at: float | None = None
+
+
+def enabled() -> bool:
+    return os.environ.get("UCDP_WARMUP", "1") != "0"
+
+
+def start() -> threading.Thread | None:
+    """Start the warm-up/refresh thread once per process; later calls are no-ops."""
+    global _thread
+    if not enabled():
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="ucdp-warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def warm_all() -> dict[str, float]:
+    """Construct every tab and precompute its default view, returning seconds per tab."""
+    global last_warmed_at
+    for name in registry.TABS:
+        start = time.perf_counter()
+        try:
+            tab = registry.get_tab(name)
+            warm = getattr(tab, "warm", None)
+            if warm is not None:
+                warm()
+        except Exception:
+            # A broken view must not take the others (or the server) down with it
+            logger.exception("Warm-up of %r failed", name)
+            continue
+        warm_seconds[name] = time.perf_counter() - start
+    last_warmed_at = time.time()
+    return dict(warm_seconds)
+
+
+def refresh_changed() -> list[str]:
+    """Refresh every loaded dataset file that changed on disk; returns the refreshed paths."""
+    from Dataset import ged
+    from Dataset.dataset import SHARED_FRAMES, SHARED_STORE
+
+    # A changed GED event file is re-aggregated first; the store then sees its country-year CSV change
+    ged_path = ged.configured_path()
+    if ged_path is not None:
+        ged.ingest_ged(ged_path)
+    refreshed = []
+    for path in SHARED_STORE.paths():
+        if SHARED_STORE.is_stale(path) and SHARED_STORE.refresh(path):
+            logger.info("Reloaded %s", path)
+            refreshed.append(path)
+    # Another process published a newer shared generation of an unchanged file: re-attach to it
+    if SHARED_FRAMES is not None:
+        for path in SHARED_FRAMES.republished():
+            if path not in refreshed and SHARED_STORE.refresh(path, force=True):
+                logger.info("Re-attached %s to a newer shared generation", path)
+                refreshed.append(path)
+    return refreshed
+
+
+def _interval() -> float:
+    try:
+        return max(float(os.environ.get("UCDP_REFRESH_SECONDS", "30")), 1.0)
+    except ValueError:
+        return 30.0
+
+
+def _run() -> None:
+    from Dataset.dataset import SHARED_STORE
+
+    # Stale lookups now return the loaded frame and leave reloading to a background refresh
+    SHARED_STORE.background_refresh = True
+    with tracing.span("warmup.warm_all"):
+        warm_all()
+    warmed_generation = SHARED_STORE.refresh_count
+    while True:
+        time.sleep(_interval())
+        try:
+            refresh_changed()
+            # Also re-warm after refreshes that a session's stale lookup started
+            if SHARED_STORE.refresh_count != warmed_generation:
+                warmed_generation = SHARED_STORE.refresh_count
+                with tracing.span("warmup.warm_all"):
+                    warm_all()
+        except Exception:
+            logger.exception("Background dataset refresh failed")
@@ -1,10 +1,15 @@
 # main.py — Sidebar shows only the active view's controls
 import streamlit as st
-from Tabs.tab_one import tab_one as T1
-from Tabs.tab_two import tab_two as T2
-from Tabs.tab_three import tab_three as T3
-from Tabs.tab_four import tab_four as T4
-from Tabs.tab_five import tab_five as T5
+from Tabs import registry, dev_panel, controls
+from Instrumentation import tracing
+
+
+def start_warmup():
+    """Warm every tab's default view in the background (once per server process)."""
+    # Imported here so the landing page does not wait for the dataset modules
+    from Tabs import warmup
+    warmup.start()
+
 
 st.set_page_config(page_title="", layout="wide")
 st.title("UCDP Global Conflict Visualization Hub")
@@ -17,14 +22,8 @@ st.markdown(
     """
 )
 
-# ---- Tab registry (name -> class) ----
-TABS = {
-    "Overview": None,
-    "Trends (Time Series)": T2,
-    "Comparisons (Animated)": T3,
-    "Regional Analysis": T4,
-    "Geospatial Heatmap": T5
-}
+# ---- Tab registry (name -> module/class, imported lazily on first activation) ----
+TABS = registry.TABS
 
 # ---- Keep track of active tab in session state ----
 if "active_tab" not in st.session_state:
@@ -44,18 +43,21 @@ st.markdown("---")
 st.sidebar.empty()
 active = st.session_state.active_tab
 
-# ---- Render main content + per-view sidebar ----
-if active == "Overview":
-    T1().display(st.sidebar)
-
-elif active == "Trends (Time Series)":
-    T2().display(st.sidebar)
-
-elif active == "Comparisons (Animated)":
-    T3().display(st.sidebar)
+# ---- Live filters, or filters that wait for an "Apply" press (one rerun per batch of edits) ----
+controls.apply_toggle(st.sidebar)
 
-elif active == "Regional Analysis":
-    T4().display(st.sidebar)
-
-elif active == "Geospatial Heatmap":
-    T5().display(st.sidebar)
+# ---- Render main content + per-view sidebar ----
+# Sampled reruns (every rerun while the developer panel is shown) record a timed span per stage
+show_dev_panel = dev_panel.enabled()
+with tracing.rerun(active, force=show_dev_panel):
+    # The tab's module and data are loaded the first time it is opened, then reused
+    with tracing.span("tab.load"):
+        tab = registry.get_tab(active)
+    with tracing.span("tab.display"):
+        tab.display(st.sidebar)
+
+if show_dev_panel:
+    dev_panel.render(st.sidebar, active)
+
+# ---- After the page has rendered ----
+start_warmup()